@@ -0,0 +1,215 @@
+"""
+User accounts for the 5/3/1 Workout Tracker.
+
+Provides the Accounts class, which stores lifters' credentials in a small accounts database
+and records where each lifter's own workout database (their shard) lives.
+"""
+
+import os
+import re
+import sqlite3
+from datetime import datetime
+from typing import List, Optional, Tuple, cast
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from backups import BACKUP_PAGES, BACKUP_PAUSE, copy_database
+from workout_db import ConnectionPool
+
+USERNAME_PATTERN: str = r"[A-Za-z0-9_.-]{3,32}"
+MIN_PASSWORD_LENGTH: int = 8
+
+
+class Accounts:
+    """
+    A registry of users and their database shards.
+
+    Each user's data lives in its own SQLite file under `data_dir/users/`. `legacy_db`, the
+    single-user database from before accounts existed, is only handed to a user created
+    with adopt_legacy=True, so its history never goes to whoever registers first.
+    """
+
+    def __init__(self, data_dir: str, legacy_db: Optional[str] = None) -> None:
+        """
+        Args:
+            data_dir (str): Directory holding accounts.db and the users/ shard directory.
+            legacy_db (Optional[str]): Path of a pre-accounts database for its owner to adopt.
+        """
+        self.data_dir: str = data_dir
+        self.legacy_db: Optional[str] = os.path.abspath(legacy_db) if legacy_db else None
+        # Set once the legacy database is adopted, which is permanent, to skip the lookup
+        self._legacy_claimed: bool = False
+        os.makedirs(os.path.join(data_dir, "users"), exist_ok=True)
+        self.pool: ConnectionPool = ConnectionPool(os.path.join(data_dir, "accounts.db"), size=4)
+
+        with self.pool.connection() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS users (
+                       id INTEGER PRIMARY KEY,
+                       username TEXT NOT NULL UNIQUE COLLATE NOCASE,
+                       password_hash TEXT NOT NULL,
+                       db_file TEXT NOT NULL,
+                       created_at TEXT
+                   )"""
+            )
+
+    # -----------------------------------------------------------------------------
+
+    def close(self) -> None:
+        """
+        Closes the accounts database.
+        """
+        self.pool.close()
+
+    # -----------------------------------------------------------------------------
+
+    def backup(self, path: str, pages: int = BACKUP_PAGES, pause: float = BACKUP_PAUSE) -> None:
+        """
+        Writes a verified snapshot of the accounts database to `path` while it stays online
+        (see backups.copy_database()).
+
+        Raises:
+            sqlite3.DatabaseError: If the snapshot fails the integrity check; it is not kept.
+        """
+        with self.pool.connection() as conn:
+            copy_database(conn, path, pages, pause)
+
+    # -----------------------------------------------------------------------------
+
+    def create_user(self, username: str, password: str, adopt_legacy: bool = False) -> int:
+        """
+        Registers a user and assigns their database shard.
+
+        Args:
+            username (str): 3-32 letters, digits, '_', '.' or '-'; unique ignoring case.
+            password (str): At least MIN_PASSWORD_LENGTH characters.
+            adopt_legacy (bool): Give the user the legacy database instead of a new shard.
+
+        Returns:
+            The new user's id.
+
+        Raises:
+            ValueError: If the username or password is invalid, the username is taken, or
+                adopt_legacy is set but there is no unclaimed legacy database.
+        """
+        if not re.fullmatch(USERNAME_PATTERN, username):
+            raise ValueError("Usernames are 3-32 letters, digits, '_', '.' or '-'.")
+        if len(password) < MIN_PASSWORD_LENGTH:
+            raise ValueError(f"Passwords must be at least {MIN_PASSWORD_LENGTH} characters.")
+
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                c: sqlite3.Cursor = conn.execute(
+                    """SELECT 1 FROM users WHERE username = ?""", (username,)
+                )
+                if c.fetchone() is not None:
+                    raise ValueError(f"The username '{username}' is taken.")
+
+                c = conn.execute(
+                    """INSERT INTO users (username, password_hash, db_file, created_at)
+                       VALUES (?, ?, '', ?)""",
+                    (username, generate_password_hash(password), datetime.now().isoformat()),
+                )
+                user_id: int = c.lastrowid
+
+                db_file: str = os.path.join("users", f"{user_id}.db")
+                if adopt_legacy:
+                    if not self._legacy_unclaimed(conn):
+                        raise ValueError("There is no unclaimed legacy database to adopt.")
+                    db_file = cast(str, self.legacy_db)
+
+                conn.execute("""UPDATE users SET db_file = ? WHERE id = ?""", (db_file, user_id))
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+        return user_id
+
+    # -----------------------------------------------------------------------------
+
+    def legacy_unclaimed(self) -> bool:
+        """
+        Returns whether the legacy database exists and no user has adopted it yet.
+        """
+        if self._legacy_claimed:
+            return False
+        with self.pool.connection() as conn:
+            return self._legacy_unclaimed(conn)
+
+    def _legacy_unclaimed(self, conn: sqlite3.Connection) -> bool:
+        if self._legacy_claimed or not self.legacy_db or not os.path.exists(self.legacy_db):
+            return False
+        row = conn.execute("""SELECT 1 FROM users WHERE db_file = ?""", (self.legacy_db,)).fetchone()
+        self._legacy_claimed = row is not None
+        return row is None
+
+    # -----------------------------------------------------------------------------
+
+    def authenticate(self, username: str, password: str) -> Optional[int]:
+        """
+        Checks a username and password.
+
+        Returns:
+            The user's id if the credentials match; otherwise, None.
+        """
+        with self.pool.connection() as conn:
+            row: Optional[Tuple[int, str]] = conn.execute(
+                """SELECT id, password_hash FROM users WHERE username = ?""", (username,)
+            ).fetchone()
+
+        if row is None or not check_password_hash(row[1], password):
+            return None
+        return row[0]
+
+    # -----------------------------------------------------------------------------
+
+    def get_username(self, user_id: int) -> Optional[str]:
+        """
+        Returns the username for a user id, or None if there is no such user.
+        """
+        with self.pool.connection() as conn:
+            row: Optional[Tuple[str]] = conn.execute(
+                """SELECT username FROM users WHERE id = ?""", (user_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    # -----------------------------------------------------------------------------
+
+    def get_user_id(self, username: str) -> Optional[int]:
+        """
+        Returns the id for a username (ignoring case), or None if there is no such user.
+        """
+        with self.pool.connection() as conn:
+            row: Optional[Tuple[int]] = conn.execute(
+                """SELECT id FROM users WHERE username = ?""", (username,)
+            ).fetchone()
+        return row[0] if row else None
+
+    # -----------------------------------------------------------------------------
+
+    def list_users(self) -> List[Tuple[int, str]]:
+        """
+        Returns every user as (id, username), in registration order.
+        """
+        with self.pool.connection() as conn:
+            return conn.execute("""SELECT id, username FROM users ORDER BY id""").fetchall()
+
+    # -----------------------------------------------------------------------------
+
+    def shard_path(self, user_id: int) -> str:
+        """
+        Returns the path of a user's database file.
+
+        Raises:
+            KeyError: If there is no such user.
+        """
+        with self.pool.connection() as conn:
+            row: Optional[Tuple[str]] = conn.execute(
+                """SELECT db_file FROM users WHERE id = ?""", (user_id,)
+            ).fetchone()
+
+        if row is None:
+            raise KeyError(user_id)
+        return os.path.join(self.data_dir, row[0])
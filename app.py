@@ -5,33 +5,456 @@ This module defines the routes for setting/viewing training maxes, logging worko
 viewing history, correcting mistakes, viewing volume history, and generating progress graphs.
 """
 
+import atexit
+import hmac
+import importlib.metadata
+import io
+import os
+import secrets
+import sqlite3
+import tempfile
+import time
 from datetime import datetime, date, timedelta
-from typing import Any, Dict, List, Optional, Tuple
+from functools import lru_cache, wraps
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple, cast
+from urllib.parse import urlsplit
+
+import click
+from flask import (
+    Flask, render_template, request, redirect, url_for, flash, jsonify, send_file, session,
+    make_response, Response, g
+)
+from jinja2 import FileSystemBytecodeCache
+from werkzeug.local import LocalProxy
+
+from accounts import Accounts
+from backups import list_snapshots, take_snapshot, verify_snapshot
+from data_io import EXPORT_FORMATS, MIMETYPES, ImportReport, format_rows, import_workouts
+from metrics import Metrics
+from page_cache import PageCache
+from planner import CYCLE_INCREMENTS, SUPPLEMENTAL_NAMES, WEEKS, PlannedSet, group_plan, parse_supplemental
+from records import PersonalRecord, summarize_records
+from shards import ShardCache
+from workout_db import (
+    ARCHIVE_AFTER_WEEKS, Database, SessionPage, WorkoutRow, MAIN_LIFTS, TRAINING_MAX_HISTORY_COLUMNS,
+    WORKOUT_HISTORY_COLUMNS, parse_reps,
+)
+
+# plotly is imported lazily by the progress graph routes; importing it here would add
+# about half a second to every worker's startup on the Pi.
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+HISTORY_PAGE_SIZE: int = 50
+MAX_VOLUME_WEEKS: int = 520
+PLOTLY_JS_MAX_AGE: int = 365 * 24 * 3600
+PAGE_CACHE_SIZE: int = 128
+TM_TIMELINE_ENTRIES: int = 12
+MAX_EXERCISE_MATCHES: int = 50
+ACCESSORY_SESSIONS_PAGE: int = 5
+
+# Each lifter's database shard gets a small connection pool; at most MAX_OPEN_SHARDS idle
+# shards stay open, and any shard unused for SHARD_IDLE_SECONDS is closed.
+SHARD_POOL_SIZE: int = 4
+MAX_OPEN_SHARDS: int = int(os.environ.get("MAX_OPEN_SHARDS", "32"))
+SHARD_IDLE_SECONDS: float = 300.0
+
+# GROUP_COMMIT_MS turns on group commit: set logging goes through one writer thread per
+# shard that commits concurrent writes together, waiting this long to gather each group.
+# 0 is the setting to use: a group already takes in every write that arrives during the
+# previous commit's sync, and a longer wait only added latency in benchmarks/bench.py
+GROUP_COMMIT: Optional[float] = (
+    float(os.environ["GROUP_COMMIT_MS"]) / 1000 if os.environ.get("GROUP_COMMIT_MS") else None
+)
+
+# Largest accepted request body, which bounds the rows in one /api/import/workouts upload
+MAX_UPLOAD_BYTES: int = int(os.environ.get("MAX_UPLOAD_MB", "32")) * 1024 * 1024
+
+# Snapshots kept per database by `flask backup`
+BACKUP_KEEP: int = int(os.environ.get("BACKUP_KEEP", "14"))
+
+# Without SECRET_KEY, login sessions are signed with a random key generated once and kept
+# in this file under the data directory
+SECRET_KEY_FILE: str = "secret_key"
+
+# /metrics answers scrapes from this host, or from anywhere with this bearer token
+METRICS_TOKEN: str = os.environ.get("METRICS_TOKEN", "")
+LOOPBACK_ADDRESSES: Tuple[str, ...] = ("127.0.0.1", "::1")
+
+# Endpoints that can be reached without logging in
+PUBLIC_ENDPOINTS: Tuple[str, ...] = ("login", "register", "metrics_page", "plotly_js", "static")
+
+
+def parse_cursor(value: Optional[str]) -> Optional[Tuple[str, int]]:
+    """
+    Parse a pagination cursor of the form 'YYYY-MM-DD:id' from a query string.
+
+    Args:
+        value (Optional[str]): The raw query string value.
 
-import plotly.graph_objects as go
-from flask import Flask, render_template, request, redirect, url_for, flash, Response
+    Returns:
+        The (date, id) tuple, or None if the value is missing or malformed.
+    """
+    if not value:
+        return None
 
-from workout_db import Database
+    date_part, _, id_part = value.rpartition(":")
+    try:
+        return date_part, int(id_part)
+    except ValueError:
+        return None
 
 
-def round_to_nearest_2_5(weight: float) -> float:
+def page_url(direction: str, cursor: Optional[Tuple[str, int]]) -> Optional[str]:
     """
-    Round weight to the nearest 2.5 increment.
-    
+    Build the URL of a neighbouring page for the current endpoint, keeping its filters.
+
     Args:
-        weight (float): The weight to round.
-        
+        direction (str): 'before' for the next (older) page or 'after' for the previous one.
+        cursor (Optional[Tuple[str, int]]): The (date, id) cursor of the page boundary.
+
+    Returns:
+        The URL, or None if there is no page in that direction.
+    """
+    if cursor is None:
+        return None
+
+    args: Dict[str, Any] = {
+        k: v for k, v in request.args.items() if k not in ("before", "after")
+    }
+    args[direction] = f"{cursor[0]}:{cursor[1]}"
+    return url_for(request.endpoint, **args)
+
+
+def training_max_timelines(
+    current: Dict[str, Tuple[float, float]], timeline: List[Tuple[str, str, float, float, Optional[float]]]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Combine the current training maxes and the timeline rows into one entry per lift.
+
+    Args:
+        current (Dict[str, Tuple[float, float]]): As returned by Database.get_current_training_maxes().
+        timeline (List[Tuple]): As returned by Database.get_training_max_timeline().
+
     Returns:
-        float: Weight rounded to nearest 2.5.
+        Per lift, the current one-rep and training max (or None) and the timeline entries,
+        oldest first, as dictionaries.
     """
-    return round(weight / 2.5) * 2.5
+    lifts: Dict[str, Dict[str, Any]] = {}
+
+    for exercise, (one_rm, training_max) in current.items():
+        lifts[exercise] = {"current": {"one_rm": one_rm, "training_max": training_max}, "timeline": []}
+
+    for exercise, day, one_rm, training_max, change in timeline:
+        lifts.setdefault(exercise, {"current": None, "timeline": []})["timeline"].append(
+            {"date": day, "one_rm": one_rm, "training_max": training_max, "change": change}
+        )
+
+    return lifts
+
+
+@lru_cache(maxsize=None)
+def plotlyjs_version() -> str:
+    """
+    Return the version used to cache-bust the plotly.js bundle.
+
+    This is the version of the plotly package, which pins the bundle it ships, and is read
+    from package metadata so plotly itself does not have to be imported.
+    """
+    return importlib.metadata.version("plotly")
+
+
+def load_secret_key(path: str) -> str:
+    """
+    Return the session signing key stored at `path`, generating it on first use.
+
+    A new key is written to a private temporary file and hard-linked into place, so workers
+    starting together all end up with the key from whichever linked first.
+
+    Raises:
+        RuntimeError: If the key file exists but is empty.
+    """
+    if not os.path.exists(path):
+        directory: str = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, partial = tempfile.mkstemp(dir=directory, prefix=".secret_key-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(secrets.token_hex(32))
+            try:
+                os.link(partial, path)
+            except FileExistsError:
+                pass
+        finally:
+            os.remove(partial)
+
+    with open(path) as f:
+        key: str = f.read().strip()
+    if not key:
+        raise RuntimeError(f"{path} is empty; delete it to generate a new key, or set SECRET_KEY")
+    return key
 
 
 app = Flask(__name__)
-app.secret_key = "your_secret_key_here"  # Needed for flashing messages
+app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_BYTES
+
+# Cache compiled templates on disk so new workers skip Jinja compilation
+# (populated at image build time by `flask warm-templates`)
+jinja_cache_dir: str = os.environ.get("JINJA_CACHE_DIR", os.path.join(app.root_path, ".jinja_cache"))
+try:
+    os.makedirs(jinja_cache_dir, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(jinja_cache_dir)
+except OSError:
+    pass
+
+# Per-statement SQL and per-endpoint request metrics, exposed at /metrics
+metrics: Metrics = Metrics()
+
+# User accounts and their database shards. WORKOUT_DATA_DIR holds accounts.db, users/ and secret_key;
+# WORKOUT_DB, the single-user database from before accounts, is adopted by the first user.
+legacy_db: str = os.environ.get("WORKOUT_DB", "workout.db")
+data_dir: str = os.environ.get("WORKOUT_DATA_DIR") or os.path.dirname(os.path.abspath(legacy_db))
+backup_dir: str = os.environ.get("BACKUP_DIR") or os.path.join(data_dir, "backups")
+allow_registration: bool = os.environ.get("ALLOW_REGISTRATION", "1") != "0"
+app.secret_key = os.environ.get("SECRET_KEY") or load_secret_key(os.path.join(data_dir, SECRET_KEY_FILE))
+accounts: Accounts = Accounts(data_dir, legacy_db=legacy_db)
+atexit.register(lambda: accounts.close())
+
+
+def open_shard(user_id: Hashable) -> Database:
+    """Open a user's database shard."""
+    return Database(
+        accounts.shard_path(cast(int, user_id)),
+        pool_size=SHARD_POOL_SIZE,
+        on_query=metrics.record_query,
+        group_commit=GROUP_COMMIT,
+    )
+
+
+shards: ShardCache = ShardCache(open_shard, max_open=MAX_OPEN_SHARDS, idle_seconds=SHARD_IDLE_SECONDS)
+atexit.register(lambda: shards.close())
+
+# The logged-in user's database, leased from the shard cache for the current request
+db: Database = cast(Database, LocalProxy(lambda: g.db))
+
+# Rendered read-only pages, invalidated by the database's data version
+page_cache: PageCache = PageCache(PAGE_CACHE_SIZE)
+
+
+def cached_page(view: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Cache a read-only page until the next database write and answer conditional requests.
+
+    The cache key (and ETag) combines the user, path, query arguments, today's date and
+    the user's data version, so a matching If-None-Match gets a 304 and a cache hit returns
+    the stored body, both without running the page's queries. Requests with pending flash messages
+    bypass the cache since the rendered page includes them.
+    """
 
-# Instantiate the database
-db: Database = Database()
+    @wraps(view)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if session.get("_flashes"):
+            return view(*args, **kwargs)
+
+        key: Hashable = (
+            g.user_id,
+            request.path,
+            tuple(sorted(request.args.items(multi=True))),
+            date.today().isoformat(),
+            db.get_data_version(),
+        )
+        etag: str = PageCache.etag(key)
+
+        if etag in request.if_none_match:
+            response: Response = make_response("", 304)
+        else:
+            body: Optional[str] = page_cache.get(key)
+            if body is None:
+                result: Any = view(*args, **kwargs)
+                if not isinstance(result, str):
+                    return result
+                body = result
+                page_cache.put(key, body)
+            response = make_response(body)
+
+        response.set_etag(etag)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
+
+    return wrapper
+
+
+@app.before_request
+def start_request_timer() -> None:
+    """Start timing the request and counting its SQL statements."""
+    g.request_start = time.perf_counter()
+    metrics.begin_request()
+
+
+@app.after_request
+def record_request_metrics(response: Response) -> Response:
+    """
+    Record the request's latency and query count against its endpoint.
+
+    Streamed responses are timed up to the first byte, since the body is sent after this
+    hook runs.
+    """
+    start: Optional[float] = g.pop("request_start", None)
+    if start is not None:
+        metrics.end_request(request.endpoint or "unmatched", response.status_code, time.perf_counter() - start)
+    return response
+
+
+@app.before_request
+def load_user() -> Optional[Response]:
+    """
+    Lease the logged-in user's database for the request, or send anonymous visitors to the
+    login page (API routes answer 401 instead).
+    """
+    user_id: Optional[int] = session.get("user_id")
+    g.username = accounts.get_username(user_id) if user_id is not None else None
+    if g.username is None:
+        session.pop("user_id", None)
+        user_id = None
+
+    g.user_id = user_id
+    if user_id is not None:
+        g.db = shards.acquire(user_id)
+        g.shard_leased = True
+        return None
+
+    if request.endpoint in PUBLIC_ENDPOINTS:
+        return None
+    if request.path.startswith("/api/"):
+        return jsonify(error="Login required."), 401
+    return redirect(url_for("login", next=request.full_path.rstrip("?")))
+
+
+@app.teardown_request
+def release_shard(exc: Optional[BaseException]) -> None:
+    """Return the request's database to the shard cache."""
+    if g.pop("shard_leased", False):
+        shards.release(g.user_id)
+
+
+@app.context_processor
+def inject_user() -> Dict[str, Any]:
+    """Make the logged-in username available to every template."""
+    return {"username": g.get("username"), "allow_registration": registration_open()}
+
+
+def registration_open() -> bool:
+    """
+    Return whether visitors can register. Registration stays closed while a legacy
+    database is unclaimed, so only its owner (via `flask create-user --adopt-legacy`) can
+    take over that history.
+    """
+    return allow_registration and not accounts.legacy_unclaimed()
+
+
+# -----------------------------------------------------------------------------
+
+
+def safe_next(target: Optional[str]) -> str:
+    """
+    Return a post-login redirect target, allowing only local paths. Browsers read a
+    backslash as a slash and drop tabs and newlines, so "/\\evil.example" or "/\\t/evil.example"
+    would act like "//evil.example"; targets with either are rejected.
+    """
+    if target and target.startswith("/") and not any(ch == "\\" or ch <= " " for ch in target):
+        parts = urlsplit(target)
+        if not parts.scheme and not parts.netloc and not target.startswith("//"):
+            return target
+    return url_for("index")
+
+
+@app.route("/login", methods=["GET", "POST"])
+def login() -> Response:
+    """
+    Log a user in.
+
+    GET: Render the login form.
+    POST: Check the credentials and redirect to the page the user asked for.
+    """
+    if request.method == "POST":
+        user_id: Optional[int] = accounts.authenticate(
+            request.form.get("username", "").strip(), request.form.get("password", "")
+        )
+        if user_id is None:
+            flash("Invalid username or password.", "error")
+            return redirect(url_for("login", next=request.args.get("next")))
+
+        session.clear()
+        session["user_id"] = user_id
+        return redirect(safe_next(request.args.get("next")))
+
+    return render_template("login.html")
+
+
+@app.route("/register", methods=["GET", "POST"])
+def register() -> Response:
+    """
+    Create an account with its own workout database.
+
+    GET: Render the registration form.
+    POST: Create the user and log them in.
+    """
+    if not registration_open():
+        flash("Registration is closed. Ask an administrator for an account.", "error")
+        return redirect(url_for("login"))
+
+    if request.method == "POST":
+        password: str = request.form.get("password", "")
+        if password != request.form.get("confirm_password", ""):
+            flash("Passwords do not match.", "error")
+            return redirect(url_for("register"))
+
+        try:
+            user_id: int = accounts.create_user(request.form.get("username", "").strip(), password)
+        except ValueError as e:
+            flash(str(e), "error")
+            return redirect(url_for("register"))
+
+        session.clear()
+        session["user_id"] = user_id
+        flash("Account created.", "success")
+        return redirect(url_for("index"))
+
+    return render_template("register.html")
+
+
+@app.route("/logout", methods=["POST"])
+def logout() -> Response:
+    """Log the current user out."""
+    session.clear()
+    return redirect(url_for("login"))
+
+
+# -----------------------------------------------------------------------------
+
+
+@app.route("/metrics")
+def metrics_page() -> Response:
+    """
+    Expose request latency, queries per request and per-statement SQL timings in the
+    Prometheus text format.
+
+    The timings cover every user, so only scrapes from this host or carrying
+    `Authorization: Bearer <METRICS_TOKEN>` are answered; others get a 403.
+    """
+    authorization: str = request.headers.get("Authorization", "")
+    if METRICS_TOKEN:
+        allowed: bool = hmac.compare_digest(authorization.encode(), f"Bearer {METRICS_TOKEN}".encode())
+    else:
+        allowed = request.remote_addr in LOOPBACK_ADDRESSES
+    if not allowed:
+        return Response("Forbidden\n", status=403, mimetype="text/plain")
+
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+# -----------------------------------------------------------------------------
 
 
 @app.route("/")
@@ -78,15 +501,78 @@ def set_training_maxes() -> Response:
 
 
 @app.route("/view-training-maxes")
+@cached_page
 def view_training_maxes() -> str:
     """
-    View training max history for all lifts.
+    View the current training max of each main lift and its recent history.
+
+    Query Parameters:
+        all: Show each lift's whole history instead of the last TM_TIMELINE_ENTRIES entries.
 
     Returns:
-        Rendered template with training max history.
+        Rendered template with the training max timelines.
     """
-    tms: List[Any] = db.get_training_max_history()
-    return render_template("view_training_maxes.html", tms=tms)
+    show_all: bool = bool(request.args.get("all"))
+    timelines: Dict[str, Dict[str, Any]] = training_max_timelines(
+        db.get_current_training_maxes(),
+        db.get_training_max_timeline(limit=None if show_all else TM_TIMELINE_ENTRIES),
+    )
+    return render_template(
+        "view_training_maxes.html",
+        lifts=[lift for lift in MAIN_LIFTS if lift in timelines],
+        timelines=timelines,
+        increments=CYCLE_INCREMENTS,
+        show_all=show_all,
+        limit=TM_TIMELINE_ENTRIES,
+    )
+
+
+@app.route("/advance-cycle", methods=["POST"])
+def advance_cycle() -> Response:
+    """
+    Start the next cycle: add the standard per-cycle increment to every main lift's
+    training max in one transaction.
+    """
+    advanced: Dict[str, Tuple[float, float]] = db.advance_cycle()
+    if not advanced:
+        flash("Please set your Training Max first.", "error")
+        return redirect(url_for("set_training_maxes"))
+
+    flash(
+        "Cycle advanced: " + ", ".join(f"{lift} {old:g} -> {new:g}" for lift, (old, new) in advanced.items()),
+        "success",
+    )
+    return redirect(url_for("view_training_maxes"))
+
+
+@app.route("/api/training-maxes")
+def training_maxes_data() -> Response:
+    """
+    Return the current training max and timeline of each main lift as JSON.
+
+    Query Parameters:
+        exercise: Restrict to one lift
+        start_date: Only timeline entries from this date on (YYYY-MM-DD)
+        limit: Only the most recent `limit` timeline entries per lift
+
+    Returns:
+        JSON mapping each lift to {"current": {one_rm, training_max}, "timeline": [...]},
+        with each timeline entry's change from the previous one.
+    """
+    exercise: Optional[str] = request.args.get("exercise")
+    start_date: Optional[str] = request.args.get("start_date")
+    limit: Optional[int] = request.args.get("limit", type=int)
+
+    if start_date:
+        try:
+            date.fromisoformat(start_date)
+        except ValueError:
+            return jsonify(error="start_date must be YYYY-MM-DD."), 400
+
+    return jsonify(training_max_timelines(
+        db.get_current_training_maxes(exercise),
+        db.get_training_max_timeline(exercise, start_date=start_date, limit=limit),
+    ))
 
 
 # -----------------------------------------------------------------------------
@@ -126,31 +612,25 @@ def perform_workout(lift: str) -> Response:
     GET: Render the workout form.
     POST: Validate and log the workout.
     """
-    tm: Optional[float] = db.get_training_max(lift)
-    if tm is None:
+    supplemental: Optional[str] = parse_supplemental(request.values.get("supplemental"))
+
+    # The whole cycle for the lift was planned when its training max was set
+    plan: Dict[int, Dict[str, List[PlannedSet]]] = group_plan(
+        db.get_cycle_plan(lift, supplemental=supplemental)
+    ).get(lift, {})
+    if not plan:
         flash("Please set your Training Max first.", "error")
         return redirect(url_for("set_training_maxes"))
 
-    # Define percentages and rep schemes for each week
-    percentages: Dict[str, List[float]] = {
-        "1": [0.65, 0.75, 0.85],
-        "2": [0.70, 0.80, 0.90],
-        "3": [0.75, 0.85, 0.95],
-    }
-
-    reps_schemes: Dict[str, List[str]] = {
-        "1": ["5", "5", "5+"],
-        "2": ["3", "3", "3+"],
-        "3": ["5", "3", "1+"],
-    }
-
-    # Use the week provided in the query string (GET) or default to "1"
-    selected_week: str = request.args.get("week", "1")
+    # Use the week provided in the query string (GET) or default to week 1
+    selected_week: int = request.args.get("week", 1, type=int)
+    if selected_week not in plan:
+        selected_week = 1
 
     if request.method == "POST":
-        week: Optional[str] = request.form.get("week")
+        week: Optional[int] = request.form.get("week", type=int)
 
-        if week not in percentages:
+        if week not in plan:
             flash("Invalid week selected.", "error")
             return redirect(url_for("perform_workout", lift=lift))
 
@@ -163,25 +643,44 @@ def perform_workout(lift: str) -> Response:
             except ValueError:
                 pass
 
-        for idx in range(3):
-            reps: Optional[str] = request.form.get(f"set_{idx+1}")
+        rows: List[WorkoutRow] = []
+        for planned in plan[week]["main"]:
+            reps: Optional[str] = request.form.get(f"set_{planned.set_number}")
             if reps is None or reps == "":
                 flash("Please fill in all the set results.", "error")
-                return redirect(url_for("perform_workout", lift=lift))
+                return redirect(url_for("perform_workout", lift=lift, week=week, supplemental=supplemental))
+
+            # A trailing "+" marks the AMRAP set ("8+" is 8 reps on a "5+" set)
+            if planned.reps.endswith("+"):
+                reps = reps.rstrip("+") + "+"
+
+            rows.append((datetime.now().date(), lift, planned.weight, reps, workout_duration))
+
+        # Supplemental sets are optional; log the ones that were filled in
+        if supplemental:
+            for planned in plan[week].get(supplemental, []):
+                reps = request.form.get(f"{supplemental}_{planned.set_number}")
+                if reps:
+                    rows.append((datetime.now().date(), lift, planned.weight, reps, workout_duration))
 
-            weight: float = round_to_nearest_2_5(tm * percentages[week][idx])
-            db.log_workout(datetime.now().date(), lift, weight, reps, workout_duration)
+        prs: List[PersonalRecord] = db.log_workouts(rows)
 
         flash("Workout logged successfully!", "success")
+        for pr in prs:
+            flash(pr.describe(), "success")
         return redirect(url_for("add_accessory"))
 
     return render_template(
         "perform_workout.html",
         lift=lift,
-        tm=tm,
-        percentages=percentages,
-        reps_schemes=reps_schemes,
+        tm=plan[1]["main"][0].training_max,
+        plan={
+            week: {kind: [planned._asdict() for planned in sets] for kind, sets in kinds.items()}
+            for week, kinds in plan.items()
+        },
         selected_week=selected_week,
+        supplemental=supplemental,
+        supplemental_names=SUPPLEMENTAL_NAMES,
     )
 
 
@@ -214,7 +713,10 @@ def add_accessory() -> Response:
                 except ValueError:
                     pass
             
-            total_sets_logged = 0
+            # Collect every set first and write them in one transaction, so a validation
+            # error part-way through the form saves nothing
+            rows: List[WorkoutRow] = []
+            new_exercises: Dict[str, str] = {}
             
             # Process each exercise
             for exercise_num in range(1, total_exercises + 1):
@@ -230,12 +732,12 @@ def add_accessory() -> Response:
                     total_sets = int(total_sets_str) if total_sets_str else 1
                     
                     # Check if exercise exists in exercises table
-                    bp: Optional[str] = db.get_exercise_body_part(exercise)
+                    bp: Optional[str] = new_exercises.get(exercise) or db.get_exercise_body_part(exercise)
                     if bp is None and not body_part:
                         flash(f"New accessory exercise '{exercise}'. Please enter the primary body part.", "error")
                         return redirect(url_for("add_accessory"))
                     elif bp is None:
-                        db.add_exercise(exercise, body_part)
+                        new_exercises[exercise] = body_part
 
                     # Process each set for this exercise
                     for set_num in range(1, total_sets + 1):
@@ -247,8 +749,7 @@ def add_accessory() -> Response:
                                 weight_val: float = float(weight_str)
                                 # Only assign workout duration to the first set of the first exercise to avoid duplication
                                 set_duration = workout_duration if exercise_num == 1 and set_num == 1 else None
-                                db.log_workout(datetime.now().date(), exercise, weight_val, reps_str, set_duration)
-                                total_sets_logged += 1
+                                rows.append((datetime.now().date(), exercise, weight_val, reps_str, set_duration))
                             except ValueError:
                                 flash(f"Invalid weight for exercise '{exercise}', set {set_num}. Please enter a number.", "error")
                                 return redirect(url_for("add_accessory"))
@@ -260,70 +761,138 @@ def add_accessory() -> Response:
                     flash(f"Invalid data provided for exercise {exercise_num}.", "error")
                     return redirect(url_for("add_accessory"))
 
-            flash(f"{total_sets_logged} set(s) across {total_exercises} exercise(s) logged successfully!", "success")
+            prs: List[PersonalRecord] = db.log_workouts(rows, new_exercises)
+            flash(f"{len(rows)} set(s) across {total_exercises} exercise(s) logged successfully!", "success")
+            for pr in prs:
+                flash(pr.describe(), "success")
 
         except ValueError:
             flash("Invalid data provided.", "error")
 
         return redirect(url_for("add_accessory"))
 
-    # GET: Render the accessory form along with accessory workout history.
-    past_exercises: List[str] = db.get_past_accessory_exercises()
-    all_records: List[Any] = db.get_workout_history()
-    main_lifts: Tuple[str, str, str, str] = ("Squat", "Bench Press", "Deadlift", "Press")
-    accessory_history = [r for r in all_records if r[2] not in main_lifts]
-    return render_template("add_accessory.html", past_exercises=past_exercises, accessory_history=accessory_history)
+    # GET: Render the accessory form along with the most recent accessory sessions; older
+    # ones are loaded from /add-accessory/sessions as the history is scrolled. Exercise
+    # names are suggested as they are typed, from /api/exercises.
+    page: SessionPage = db.get_accessory_sessions(ACCESSORY_SESSIONS_PAGE)
+    return render_template("add_accessory.html", sessions=page.sessions, next_cursor=page.next_cursor)
+
+
+@app.route("/add-accessory/sessions")
+@cached_page
+def accessory_sessions() -> Any:
+    """
+    Render the next page of accessory sessions as table rows, for the add-accessory page
+    to append to its history.
+
+    Query Parameters:
+        before: Only sessions before this date (YYYY-MM-DD), the previous page's last session
+    """
+    before: Optional[str] = request.args.get("before")
+    if before:
+        try:
+            date.fromisoformat(before)
+        except ValueError:
+            return "before must be YYYY-MM-DD.", 400
+
+    page: SessionPage = db.get_accessory_sessions(ACCESSORY_SESSIONS_PAGE, before=before)
+    return render_template("accessory_sessions.html", sessions=page.sessions, next_cursor=page.next_cursor)
+
+
+@app.route("/api/exercises")
+def exercises_data() -> Response:
+    """
+    Return exercises whose names start with a prefix (ignoring case) as JSON, for
+    autocomplete. Matches are ranked by how often and how recently they were done.
+
+    Query Parameters:
+        prefix: The start of the exercise name (default: match every exercise)
+        type: 'main' or 'accessory' to restrict the matches
+        limit: Maximum number of matches (default 10, at most MAX_EXERCISE_MATCHES)
+
+    Returns:
+        JSON list of {exercise, body_part, sets, last_date}, best match first.
+    """
+    limit: int = min(max(request.args.get("limit", 10, type=int), 1), MAX_EXERCISE_MATCHES)
+    matches = db.search_exercises(
+        request.args.get("prefix", ""), limit=limit, exercise_type=request.args.get("type")
+    )
+    return jsonify([match._asdict() for match in matches])
 
 
 # -----------------------------------------------------------------------------
 
 
 @app.route("/history")
+@cached_page
 def history() -> str:
     """
-    Display the workout history with optional filtering by exercise type and week limit.
+    Display one page of the workout history with optional filtering.
 
     Query Parameters:
         type: Filter by 'main' or 'accessory'
         limit_weeks: Number of weeks to limit the history
+        exercise: Filter by exercise name
+        start_date / end_date: Restrict to a date range (YYYY-MM-DD)
+        before / after: Page cursors ('YYYY-MM-DD:id') for older / newer rows
 
     Returns:
         Rendered template with workout records.
     """
     exercise_type: Optional[str] = request.args.get("type")  # 'main' or 'accessory'
     limit_weeks: Optional[int] = request.args.get("limit_weeks", type=int)
-
-    records: List[Any] = db.get_workout_history()  # reverse to show oldest first
-    main_lifts: tuple = ("Squat", "Bench Press", "Deadlift", "Press")
-
-    if exercise_type == "main":
-        records = [r for r in records if r[2] in main_lifts]
-    elif exercise_type == "accessory":
-        records = [r for r in records if r[2] not in main_lifts]
+    start_date: Optional[str] = request.args.get("start_date")
+    end_date: Optional[str] = request.args.get("end_date")
 
     if limit_weeks:
-        today: date = date.today()
-        start_date = today - timedelta(weeks=limit_weeks)
-        records = [
-            r for r in records if datetime.strptime(r[1], "%Y-%m-%d").date() >= start_date
-        ]
+        cutoff: str = (date.today() - timedelta(weeks=limit_weeks)).isoformat()
+        start_date = max(start_date, cutoff) if start_date else cutoff
+
+    page = db.get_workout_history_page(
+        exercise_type=exercise_type,
+        start_date=start_date,
+        end_date=end_date,
+        exercise=request.args.get("exercise") or None,
+        before=parse_cursor(request.args.get("before")),
+        after=parse_cursor(request.args.get("after")),
+        page_size=HISTORY_PAGE_SIZE,
+    )
 
-    return render_template("history.html", records=records)
+    return render_template(
+        "history.html",
+        records=page.records,
+        next_url=page_url("before", page.next_cursor),
+        prev_url=page_url("after", page.prev_cursor),
+    )
 
 
 # -----------------------------------------------------------------------------
 
 
 @app.route("/correct-mistake")
+@cached_page
 def correct_mistake() -> str:
     """
-    Display the workout entries in reverse order to allow corrections.
+    Display the most recent workout entries, one page at a time, to allow corrections.
+
+    Query Parameters:
+        before / after: Page cursors ('YYYY-MM-DD:id') for older / newer entries
 
     Returns:
-        Rendered template with a list of workout entries.
+        Rendered template with a page of workout entries.
     """
-    records: List[Any] = db.get_workout_history()
-    return render_template("correct_mistake.html", records=records)
+    page = db.get_workout_history_page(
+        before=parse_cursor(request.args.get("before")),
+        after=parse_cursor(request.args.get("after")),
+        page_size=HISTORY_PAGE_SIZE,
+    )
+
+    return render_template(
+        "correct_mistake.html",
+        records=page.records,
+        next_url=page_url("before", page.next_cursor),
+        prev_url=page_url("after", page.prev_cursor),
+    )
 
 
 # -----------------------------------------------------------------------------
@@ -346,7 +915,10 @@ def update_entry(entry_id: int) -> Response:
 
         try:
             new_weight_val: Optional[float] = float(new_weight) if new_weight else None
-            new_reps_val: Optional[int] = int(new_reps) if new_reps else None
+            # Reps are whole numbers, with a trailing "+" on AMRAP sets as shown in history
+            new_reps_val: Optional[str] = new_reps.strip() if new_reps else None
+            if new_reps_val is not None and parse_reps(new_reps_val)[0] is None:
+                raise ValueError(f"invalid reps '{new_reps_val}'")
 
             db.update_workout_entry_by_id(
                 entry_id, new_weight=new_weight_val, new_reps=new_reps_val
@@ -360,8 +932,7 @@ def update_entry(entry_id: int) -> Response:
         return redirect(url_for("correct_mistake"))
 
     # GET: Fetch the entry details to pre-fill the form
-    records: List[Any] = db.get_workout_history()
-    entry: Optional[Any] = next((r for r in records if r[0] == entry_id), None)
+    entry: Optional[Any] = db.get_workout_entry(entry_id)
 
     if not entry:
         flash("Entry not found.", "error")
@@ -390,35 +961,175 @@ def delete_entry(entry_id: int) -> Response:
 
 
 @app.route("/volume-history")
+@cached_page
 def volume_history() -> str:
     """
     View weekly volume history broken down by body part.
 
+    Query Parameters:
+        weeks: Number of weeks to look back, including the current one (default 4)
+        start_date / end_date: A custom date range (YYYY-MM-DD) instead of `weeks`
+
     Returns:
         Rendered template with weekly volume data.
     """
     today: date = date.today()
+    num_weeks: int = max(1, min(request.args.get("weeks", 4, type=int), MAX_VOLUME_WEEKS))
+
+    try:
+        end: date = date.fromisoformat(request.args.get("end_date") or today.isoformat())
+        start_arg: Optional[str] = request.args.get("start_date")
+        start: Optional[date] = date.fromisoformat(start_arg) if start_arg else None
+    except ValueError:
+        flash("Invalid date range. Please use YYYY-MM-DD.", "error")
+        return redirect(url_for("volume_history"))
+
+    # Align the range to whole Monday-to-Sunday weeks
+    last_monday: date = end - timedelta(days=end.weekday())
+    if start is None:
+        first_monday: date = last_monday - timedelta(weeks=num_weeks - 1)
+    else:
+        first_monday = start - timedelta(days=start.weekday())
+        first_monday = max(first_monday, last_monday - timedelta(weeks=MAX_VOLUME_WEEKS - 1))
+
+    volume_by_week: Dict[str, Dict[str, int]] = db.get_volume_by_week(
+        first_monday.isoformat(), (last_monday + timedelta(days=6)).isoformat()
+    )
 
-    # Get the most recent Monday
-    monday: date = today - timedelta(days=today.weekday())
     weeks: List[Dict[str, Any]] = []
+    start_date: date = last_monday
 
-    for i in range(4):
-        start_date: date = monday - timedelta(weeks=i)
+    while start_date >= first_monday:
         end_date: date = start_date + timedelta(days=6)
-        volume: Dict[str, int] = db.get_weekly_volume_by_body_part(
-            start_date.isoformat(), end_date.isoformat()
-        )
-
         weeks.append(
             {
                 "start": start_date.isoformat(),
                 "end": end_date.isoformat(),
-                "volume": volume,
+                "volume": volume_by_week.get(start_date.isoformat(), {}),
             }
         )
+        start_date -= timedelta(weeks=1)
 
-    return render_template("volume_history.html", weeks=weeks)
+    return render_template(
+        "volume_history.html",
+        weeks=weeks,
+        num_weeks=len(weeks),
+        start_date=first_monday.isoformat(),
+        end_date=end.isoformat(),
+    )
+
+
+# -----------------------------------------------------------------------------
+
+
+def build_progress_figure(exercise: str, daily_best: List[Tuple[str, float, int]]) -> "go.Figure":
+    """
+    Build the weight/reps progress figure for an exercise.
+
+    Args:
+        exercise (str): The exercise name, used in the title.
+        daily_best (List[Tuple[str, float, int]]): (date, weight, reps) of the heaviest set per day.
+
+    Returns:
+        go.Figure: A figure with weight on the left axis and reps on the right.
+    """
+    import plotly.graph_objects as go
+
+    dates: List[str] = [row[0] for row in daily_best]
+    weights: List[float] = [row[1] for row in daily_best]
+    reps_list: List[int] = [row[2] for row in daily_best]
+
+    # Create a Plotly figure with two traces
+    fig: go.Figure = go.Figure()
+
+    fig.add_trace(
+        go.Scatter(
+            x=dates,
+            y=weights,
+            mode="lines+markers",
+            name="Weight",
+            line=dict(color="blue"),
+        )
+    )
+
+    fig.add_trace(
+        go.Scatter(
+            x=dates,
+            y=reps_list,
+            mode="lines+markers",
+            name="Reps",
+            yaxis="y2",
+            line=dict(color="red"),
+        )
+    )
+
+    fig.update_layout(
+        title=f"Progress for {exercise}",
+        xaxis_title="Date",
+        yaxis=dict(
+            title={"text": "Weight", "font": {"color": "blue"}},
+            tickfont={"color": "blue"},
+        ),
+        yaxis2=dict(
+            title={"text": "Reps", "font": {"color": "red"}},
+            tickfont={"color": "red"},
+            overlaying="y",
+            side="right",
+        ),
+        legend=dict(x=0, y=1.1, orientation="h"),
+        margin=dict(l=40, r=40, t=80, b=40),
+    )
+
+    return fig
+
+
+@app.route("/plan")
+@cached_page
+def plan() -> str:
+    """
+    Show the current cycle for every main lift: each week's sets with weights and plate
+    loadouts, precomputed when the training maxes were set.
+
+    Query Parameters:
+        supplemental: 'bbb' or 'fsl' to include that supplemental template (default: none)
+    """
+    supplemental: Optional[str] = parse_supplemental(request.args.get("supplemental"))
+    return render_template(
+        "plan.html",
+        plan=group_plan(db.get_cycle_plan(supplemental=supplemental)),
+        lifts=MAIN_LIFTS,
+        weeks=sorted(WEEKS),
+        supplemental=supplemental,
+        supplemental_names=SUPPLEMENTAL_NAMES,
+    )
+
+
+# -----------------------------------------------------------------------------
+
+
+@app.route("/records")
+@cached_page
+def records() -> str:
+    """
+    Display each exercise's best estimated 1RM and its rep records (the heaviest set at
+    each rep count), read from the incrementally maintained records table.
+    """
+    return render_template("records.html", records=summarize_records(db.get_records()))
+
+
+@app.route("/api/records")
+def records_data() -> Response:
+    """
+    Return rep records and best estimated 1RMs as JSON, keyed by exercise.
+
+    Query Parameters:
+        exercise: Restrict to a single exercise (404 if it has no records)
+    """
+    exercise: Optional[str] = request.args.get("exercise")
+    summary: Dict[str, Dict[str, Any]] = summarize_records(db.get_records(exercise))
+    if exercise is not None and not summary:
+        return jsonify(error=f"No records for '{exercise}'."), 404
+    return jsonify(summary)
 
 
 # -----------------------------------------------------------------------------
@@ -427,12 +1138,14 @@ def volume_history() -> str:
 @app.route("/progress-graph", methods=["GET", "POST"])
 def progress_graph() -> str:
     """
-    Generate and display a progress graph for a selected exercise using Plotly.
+    Display a progress graph for a selected exercise using Plotly.
+
+    The page only carries the exercise list; the browser loads plotly.js once from a
+    long-cached static URL and fetches the figure data from /api/progress-graph.
 
     GET: Render the form to select an exercise.
-    POST: Generate the graph for the selected exercise.
+    POST: Render the page with the graph for the selected exercise.
     """
-    graph_html: Optional[str] = None
     exercises: List[str] = db.get_all_exercises()
     selected_exercise: Optional[str] = None
 
@@ -442,93 +1155,397 @@ def progress_graph() -> str:
             flash("Please select an exercise.", "error")
             return redirect(url_for("progress_graph"))
 
-        # Get workout history for the selected exercise
-        records: List[Any] = db.get_workout_history_by_exercise(selected_exercise)
-        if not records:
-            flash("No data available for this exercise.", "error")
-            return redirect(url_for("progress_graph"))
+    return render_template(
+        "progress_graph.html",
+        exercises=exercises,
+        selected_exercise=selected_exercise,
+        plotly_version=plotlyjs_version(),
+    )
 
-        # Group records by date and choose the entry with the maximum weight for each date
-        date_weight_reps: Dict[str, List[Any]] = {}
 
-        for record in records:
-            date_str, exercise, weight, reps = record
-            dt: str = date_str
+# -----------------------------------------------------------------------------
 
-            try:
-                reps_val: int = int(reps)
-            except ValueError:
-                continue
 
-            if dt in date_weight_reps:
-                date_weight_reps[dt].append((weight, reps_val))
-            else:
-                date_weight_reps[dt] = [(weight, reps_val)]
+@app.route("/api/progress-graph/<path:exercise>")
+def progress_graph_data(exercise: str) -> Response:
+    """
+    Return the Plotly figure for an exercise as JSON.
 
-        if not date_weight_reps:
-            flash("No valid data available for plotting.", "error")
-            return redirect(url_for("progress_graph"))
+    Args:
+        exercise (str): The exercise name.
 
-        # Sort dates and select max entry per date
-        dates: List[str] = sorted(date_weight_reps.keys())
-        weights: List[float] = []
-        reps_list: List[int] = []
-
-        for dt in dates:
-            max_entry = max(date_weight_reps[dt], key=lambda x: x[0])
-            weights.append(max_entry[0])
-            reps_list.append(max_entry[1])
-
-        # Create a Plotly figure with two traces
-        fig: go.Figure = go.Figure()
-
-        fig.add_trace(
-            go.Scatter(
-                x=dates,
-                y=weights,
-                mode="lines+markers",
-                name="Weight",
-                line=dict(color="blue"),
-            )
-        )
+    Returns:
+        The figure JSON, or a 404 with an error message if there is nothing to plot.
+    """
+    # Heaviest set per day, maintained incrementally by the database
+    daily_best: List[Tuple[str, float, int]] = db.get_daily_best(exercise)
+    if not daily_best:
+        return jsonify(error="No valid data available for plotting."), 404
 
-        fig.add_trace(
-            go.Scatter(
-                x=dates,
-                y=reps_list,
-                mode="lines+markers",
-                name="Reps",
-                yaxis="y2",
-                line=dict(color="red"),
-            )
-        )
+    fig: "go.Figure" = build_progress_figure(exercise, daily_best)
+    return Response(fig.to_json(), mimetype="application/json")
 
-        fig.update_layout(
-            title=f"Progress for {selected_exercise}",
-            xaxis_title="Date",
-            yaxis=dict(
-                title={"text": "Weight", "font": {"color": "blue"}},
-                tickfont={"color": "blue"},
-            ),
-            yaxis2=dict(
-                title={"text": "Reps", "font": {"color": "red"}},
-                tickfont={"color": "red"},
-                overlaying="y",
-                side="right",
-            ),
-            legend=dict(x=0, y=1.1, orientation="h"),
-            margin=dict(l=40, r=40, t=80, b=40),
-        )
 
-        # Convert the Plotly figure to an HTML snippet (without full HTML tags)
-        graph_html = fig.to_html(full_html=False, include_plotlyjs=True)
+# -----------------------------------------------------------------------------
 
-    return render_template(
-        "progress_graph.html",
-        exercises=exercises,
-        graph_html=graph_html,
-        selected_exercise=selected_exercise,
+
+@app.route("/assets/plotly-<version>.min.js")
+def plotly_js(version: str) -> Response:
+    """
+    Serve the plotly.js bundle shipped with the plotly package.
+
+    The version is part of the URL, so the response can be cached by the browser for a
+    year; upgrading plotly changes the URL.
+
+    Args:
+        version (str): The plotly package version requested.
+    """
+    import plotly
+
+    if version != plotlyjs_version():
+        return redirect(url_for("plotly_js", version=plotlyjs_version()))
+
+    path: str = os.path.join(os.path.dirname(plotly.__file__), "package_data", "plotly.min.js")
+    response: Response = send_file(path, mimetype="text/javascript", max_age=PLOTLY_JS_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+# -----------------------------------------------------------------------------
+
+
+@app.route("/api/tonnage")
+def tonnage_data() -> Response:
+    """
+    Return tonnage (weight x reps, summed over sets) per training day as JSON.
+
+    Query Parameters:
+        start_date / end_date: Date range (YYYY-MM-DD); defaults to the last 12 weeks
+        exercise: Restrict to a single exercise
+    """
+    try:
+        end: date = date.fromisoformat(request.args.get("end_date") or date.today().isoformat())
+        start: date = date.fromisoformat(request.args.get("start_date") or (end - timedelta(weeks=12)).isoformat())
+    except ValueError:
+        return jsonify(error="Invalid date range. Please use YYYY-MM-DD."), 400
+
+    tonnage: List[Tuple[str, float]] = db.get_tonnage(
+        start.isoformat(), end.isoformat(), request.args.get("exercise")
+    )
+    return jsonify([{"date": day, "tonnage": total} for day, total in tonnage])
+
+
+# -----------------------------------------------------------------------------
+
+
+def export_response(name: str, columns: Tuple[str, ...], rows: Any) -> Response:
+    """
+    Stream rows as a downloadable NDJSON or CSV file, chosen by the `format` query argument.
+
+    Args:
+        name (str): Base name of the downloaded file.
+        columns (Tuple[str, ...]): Column names, in row order.
+        rows (Any): Iterator of rows; only consumed while the response is sent.
+
+    Returns:
+        A streaming response, or a 400 if the format is not supported.
+    """
+    fmt: str = request.args.get("format", "ndjson")
+    if fmt not in EXPORT_FORMATS:
+        return jsonify(error=f"Unsupported format '{fmt}'. Use one of: {', '.join(EXPORT_FORMATS)}."), 400
+
+    response: Response = Response(format_rows(columns, rows, fmt), mimetype=MIMETYPES[fmt])
+    response.headers["Content-Disposition"] = f"attachment; filename={name}.{fmt}"
+
+    # The body is streamed after the request's shard lease ends, so hold another until it is sent
+    user_id: int = g.user_id
+    shards.acquire(user_id)
+    response.call_on_close(lambda: shards.release(user_id))
+    return response
+
+
+@app.route("/api/export/workouts")
+def export_workouts() -> Response:
+    """
+    Stream the workout history as NDJSON or CSV.
+
+    Query Parameters:
+        format: 'ndjson' (default) or 'csv'
+        start_date / end_date: Restrict to a date range (YYYY-MM-DD)
+        exercise: Restrict to a single exercise
+    """
+    rows = db.iter_workout_history(
+        start_date=request.args.get("start_date"),
+        end_date=request.args.get("end_date"),
+        exercise=request.args.get("exercise"),
+    )
+    return export_response("workouts", WORKOUT_HISTORY_COLUMNS, rows)
+
+
+@app.route("/api/export/training-maxes")
+def export_training_maxes() -> Response:
+    """
+    Stream the training max history as NDJSON or CSV.
+
+    Query Parameters:
+        format: 'ndjson' (default) or 'csv'
+        start_date / end_date: Restrict to a date range (YYYY-MM-DD)
+        exercise: Restrict to a single exercise
+    """
+    rows = db.iter_training_max_history(
+        start_date=request.args.get("start_date"),
+        end_date=request.args.get("end_date"),
+        exercise=request.args.get("exercise"),
     )
+    return export_response("training-maxes", TRAINING_MAX_HISTORY_COLUMNS, rows)
+
+
+@app.route("/api/import/workouts", methods=["POST"])
+def import_workouts_upload() -> Response:
+    """
+    Bulk-import historical sets from an uploaded NDJSON or CSV file.
+
+    The file is sent as the multipart field `file` or as the raw request body, with columns
+    date, exercise, weight, reps and optionally workout_duration and body_part.
+
+    Query Parameters:
+        format: 'ndjson' or 'csv' (default: from the file extension, else 'ndjson')
+
+    Returns:
+        JSON with the number of imported and rejected rows, errors and rows per second.
+    """
+    upload = request.files.get("file")
+    filename: str = (upload.filename or "") if upload else ""
+    fmt: str = request.args.get("format") or ("csv" if filename.lower().endswith(".csv") else "ndjson")
+    if fmt not in EXPORT_FORMATS:
+        return jsonify(error=f"Unsupported format '{fmt}'. Use one of: {', '.join(EXPORT_FORMATS)}."), 400
+
+    raw = upload.stream if upload else request.stream
+    stream = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+    report: ImportReport = import_workouts(db, stream, fmt)
+    return jsonify(report.to_dict())
+
+
+# -----------------------------------------------------------------------------
+
+
+def user_databases(username: Optional[str]) -> Iterator[Tuple[str, Database]]:
+    """
+    Yield (username, database) for one user, or for every user if no username is given.
+
+    Raises:
+        click.BadParameter: If the username does not exist.
+    """
+    if username is None:
+        users: List[Tuple[int, str]] = accounts.list_users()
+    else:
+        user_id: Optional[int] = accounts.get_user_id(username)
+        if user_id is None:
+            raise click.BadParameter(f"No such user: {username}", param_hint="--user")
+        users = [(user_id, username)]
+
+    for user_id, name in users:
+        with shards.checkout(user_id) as database:
+            yield name, database
+
+
+@app.cli.command("create-user")
+@click.argument("username")
+@click.password_option()
+@click.option("--adopt-legacy", is_flag=True, help="Give the user the pre-accounts WORKOUT_DB history.")
+def create_user_command(username: str, password: str, adopt_legacy: bool) -> None:
+    """Create a user account (for when ALLOW_REGISTRATION=0, or to adopt WORKOUT_DB)."""
+    try:
+        user_id: int = accounts.create_user(username, password, adopt_legacy=adopt_legacy)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    print(f"Created user {username} with database {accounts.shard_path(user_id)}.")
+
+
+# -----------------------------------------------------------------------------
+
+
+@app.cli.command("import-workouts")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--user", "username", required=True, help="The user whose history to import into.")
+@click.option("--format", "fmt", type=click.Choice(EXPORT_FORMATS), help="Defaults to the file extension.")
+@click.option("--chunk-size", default=5000, show_default=True, help="Rows per insert transaction.")
+def import_workouts_command(path: str, fmt: Optional[str], chunk_size: int, username: str) -> None:
+    """Bulk-import historical sets from an NDJSON or CSV file."""
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") else "ndjson")
+
+    for _, database in user_databases(username):
+        with open(path, encoding="utf-8-sig", newline="") as stream:
+            report: ImportReport = import_workouts(database, stream, fmt, chunk_size=chunk_size)
+
+    for error in report.errors:
+        print(f"Rejected {error}")
+
+    print(
+        f"Imported {report.imported} rows ({report.rejected} rejected) in "
+        f"{report.seconds:.2f}s: {report.rows_per_second:,.0f} rows/s"
+    )
+
+
+# -----------------------------------------------------------------------------
+
+
+@app.cli.command("warm-templates")
+def warm_templates_command() -> None:
+    """Compile every template into the Jinja bytecode cache."""
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+
+    print(f"Compiled templates into {jinja_cache_dir}.")
+
+
+# -----------------------------------------------------------------------------
+
+
+@app.cli.command("rebuild-daily-best")
+@click.option("--user", "username", help="Only this user (default: every user).")
+def rebuild_daily_best_command(username: Optional[str]) -> None:
+    """Recompute the per-exercise daily-best table used by the progress graph."""
+    for name, database in user_databases(username):
+        database.rebuild_daily_best()
+        print(f"Daily-best table rebuilt for {name}.")
+
+
+# -----------------------------------------------------------------------------
+
+
+@app.cli.command("rebuild-records")
+@click.option("--user", "username", help="Only this user (default: every user).")
+def rebuild_records_command(username: Optional[str]) -> None:
+    """Recompute the per-exercise rep records table from the workout history."""
+    for name, database in user_databases(username):
+        database.rebuild_records()
+        print(f"Records table rebuilt for {name}.")
+
+
+# -----------------------------------------------------------------------------
+
+
+@app.cli.command("rebuild-cycle-plan")
+@click.option("--user", "username", help="Only this user (default: every user).")
+def rebuild_cycle_plan_command(username: Optional[str]) -> None:
+    """Recompute the planned cycle from the current training maxes."""
+    for name, database in user_databases(username):
+        database.rebuild_cycle_plan()
+        print(f"Cycle plan rebuilt for {name}.")
+
+
+# -----------------------------------------------------------------------------
+
+
+@app.cli.command("archive-history")
+@click.option("--user", "username", help="Only this user (default: every user).")
+@click.option("--weeks", default=ARCHIVE_AFTER_WEEKS, show_default=True, help="Whole weeks of sets to keep hot.")
+def archive_history_command(username: Optional[str], weeks: int) -> None:
+    """Move old sets to the archive table and roll them up per exercise and week."""
+    for name, database in user_databases(username):
+        start: float = time.perf_counter()
+        archived: int = database.archive_history(weeks)
+        print(f"Archived {archived} sets for {name} in {time.perf_counter() - start:.2f}s.")
+
+
+# -----------------------------------------------------------------------------
+
+
+@app.cli.command("check-query-plans")
+@click.option("--user", "username", help="Only this user's database (default: the first user's).")
+def check_query_plans_command(username: Optional[str]) -> None:
+    """Verify that every hot query is served by an index (EXPLAIN QUERY PLAN)."""
+    users: List[Tuple[int, str]] = accounts.list_users()
+    if username is None and not users:
+        raise click.ClickException("No users yet; register one first.")
+
+    failures: Dict[str, List[str]] = {}
+    for _, database in user_databases(username or users[0][1]):
+        print(f"Schema version: {database.get_schema_version()}")
+        failures = database.check_query_plans()
+
+    for name, plan in failures.items():
+        print(f"FULL SCAN in {name}:")
+        for line in plan:
+            print(f"    {line}")
+
+    if failures:
+        raise SystemExit(1)
+
+    print("All hot queries use an index.")
+
+
+# -----------------------------------------------------------------------------
+
+
+@app.cli.command("backup")
+@click.option("--user", "username", help="Only this user (default: every user and the accounts database).")
+@click.option("--dir", "directory", default=lambda: backup_dir, show_default="BACKUP_DIR or <data dir>/backups")
+@click.option("--keep", default=BACKUP_KEEP, show_default=True, help="Snapshots to keep per database.")
+def backup_command(username: Optional[str], directory: str, keep: int) -> None:
+    """Snapshot the live databases without stopping the app, then prune old snapshots."""
+    start: float
+    path: str
+    if username is None:
+        start = time.perf_counter()
+        path = take_snapshot(accounts.backup, os.path.join(directory, "accounts"), keep)
+        print(f"Backed up accounts to {path} in {time.perf_counter() - start:.2f}s.")
+
+    for name, database in user_databases(username):
+        start = time.perf_counter()
+        path = take_snapshot(database.backup, os.path.join(directory, "users", name), keep)
+        print(f"Backed up {name} to {path} in {time.perf_counter() - start:.2f}s.")
+
+
+# -----------------------------------------------------------------------------
+
+
+@app.cli.command("restore")
+@click.argument("snapshot", type=click.Path(exists=True, dir_okay=False))
+@click.option("--user", "username", required=True, help="The user whose database to overwrite.")
+@click.confirmation_option(prompt="This replaces the user's workout history with the snapshot. Continue?")
+def restore_command(snapshot: str, username: str) -> None:
+    """Restore a user's database from a snapshot taken by `flask backup`."""
+    for name, database in user_databases(username):
+        try:
+            database.restore(snapshot)
+        except sqlite3.DatabaseError as e:
+            raise click.ClickException(str(e))
+        print(f"Restored {name} from {snapshot}.")
+
+
+# -----------------------------------------------------------------------------
+
+
+@app.cli.command("verify-backup")
+@click.argument("paths", nargs=-1, type=click.Path(exists=True, dir_okay=False))
+@click.option("--dir", "directory", default=lambda: backup_dir, show_default="BACKUP_DIR or <data dir>/backups")
+def verify_backup_command(paths: Tuple[str, ...], directory: str) -> None:
+    """Run PRAGMA integrity_check on snapshots (default: every snapshot in the backup directory)."""
+    snapshots: List[str] = list(paths)
+    if not snapshots:
+        snapshots = list_snapshots(os.path.join(directory, "accounts"))
+        users_dir: str = os.path.join(directory, "users")
+        for name in sorted(os.listdir(users_dir)) if os.path.isdir(users_dir) else []:
+            snapshots.extend(list_snapshots(os.path.join(users_dir, name)))
+    if not snapshots:
+        raise click.ClickException(f"No snapshots in {directory}.")
+
+    failed: int = 0
+    for path in snapshots:
+        problems: List[str] = verify_snapshot(path)
+        if problems:
+            failed += 1
+            print(f"CORRUPT {path}:")
+            for problem in problems[:10]:
+                print(f"    {problem}")
+        else:
+            print(f"ok {path}")
+
+    if failed:
+        raise SystemExit(1)
 
 
 # -----------------------------------------------------------------------------
@@ -0,0 +1,170 @@
+"""
+Online backups for the 5/3/1 Workout Tracker.
+
+Provides copy_database(), which snapshots a live SQLite database with the backup API a few
+pages at a time, pausing between steps so requests keep running, restore_database() to copy
+a snapshot back, and helpers to verify snapshots with PRAGMA integrity_check and to rotate
+them in a backup directory.
+"""
+
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import Callable, List
+
+# Pages copied per backup step (1 MiB with SQLite's default 4 KiB pages) and the pause
+# between steps, during which other connections can read and write
+BACKUP_PAGES: int = 256
+BACKUP_PAUSE: float = 0.005
+
+SNAPSHOT_SUFFIX: str = ".db"
+
+
+def _pause_between_steps(pause: float) -> Callable[[int, int, int], None]:
+    """Returns a backup progress callback that sleeps after every step but the last."""
+
+    def progress(status: int, remaining: int, total: int) -> None:
+        if remaining:
+            time.sleep(pause)
+
+    return progress
+
+
+def copy_database(
+    source: sqlite3.Connection, dest_path: str, pages: int = BACKUP_PAGES, pause: float = BACKUP_PAUSE
+) -> None:
+    """
+    Copies a live database to a standalone, verified snapshot file.
+
+    The copy is written to `dest_path` + ".partial", checked with verify_snapshot(), and
+    only then renamed into place, so a snapshot is never seen half written or corrupt.
+    `source` holds one read transaction for the whole copy, so in WAL mode every step reads
+    the same snapshot while other connections keep writing; without it, SQLite restarts the
+    copy after each concurrent commit and a busy database might never finish. The snapshot
+    uses a rollback journal, so it is a single file with no -wal or -shm companions.
+
+    Args:
+        source (sqlite3.Connection): An autocommit connection to the database to copy.
+        dest_path (str): Path of the snapshot to create (replaced if it exists).
+        pages (int): Pages copied per step.
+        pause (float): Seconds to sleep between steps.
+
+    Raises:
+        sqlite3.DatabaseError: If the copy fails the integrity check; it is deleted.
+    """
+    partial: str = dest_path + ".partial"
+    if os.path.exists(partial):
+        os.remove(partial)
+
+    dest: sqlite3.Connection = sqlite3.connect(partial)
+    try:
+        # BEGIN is deferred; the first read starts the read transaction that pins the snapshot
+        source.execute("BEGIN")
+        try:
+            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            source.backup(dest, pages=pages, progress=_pause_between_steps(pause), sleep=pause)
+        finally:
+            source.execute("ROLLBACK")
+        dest.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        dest.close()
+
+    problems: List[str] = verify_snapshot(partial)
+    if problems:
+        os.remove(partial)
+        raise sqlite3.DatabaseError(f"Snapshot {dest_path} failed the integrity check: {'; '.join(problems[:5])}")
+
+    os.replace(partial, dest_path)
+
+
+def restore_database(
+    snapshot_path: str, target: sqlite3.Connection, pages: int = BACKUP_PAGES, pause: float = BACKUP_PAUSE
+) -> None:
+    """
+    Copies a snapshot over a live database through one of its connections, so other
+    connections see the restored data on their next read instead of a replaced file.
+
+    Args:
+        snapshot_path (str): The snapshot to restore.
+        target (sqlite3.Connection): A connection to the database to overwrite.
+        pages (int): Pages copied per step.
+        pause (float): Seconds to sleep between steps.
+    """
+    source: sqlite3.Connection = sqlite3.connect(f"file:{snapshot_path}?mode=ro", uri=True)
+    try:
+        source.backup(target, pages=pages, progress=_pause_between_steps(pause), sleep=pause)
+    finally:
+        source.close()
+
+
+def verify_snapshot(path: str) -> List[str]:
+    """
+    Runs PRAGMA integrity_check on a snapshot, opened read-only.
+
+    Returns:
+        The problems found. An empty list means the snapshot is intact.
+    """
+    if not os.path.isfile(path):
+        return [f"{path} does not exist"]
+
+    try:
+        conn: sqlite3.Connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            rows: List[str] = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError as e:
+        return [str(e)]
+
+    return [] if rows == ["ok"] else rows
+
+
+def snapshot_name(now: datetime) -> str:
+    """Returns the file name for a snapshot taken at `now`; names sort by time."""
+    return now.strftime("%Y%m%d-%H%M%S-%f") + SNAPSHOT_SUFFIX
+
+
+def list_snapshots(directory: str) -> List[str]:
+    """Returns the paths of the snapshots in a backup directory, oldest first."""
+    if not os.path.isdir(directory):
+        return []
+    return [
+        os.path.join(directory, name)
+        for name in sorted(os.listdir(directory))
+        if name.endswith(SNAPSHOT_SUFFIX)
+    ]
+
+
+def prune_snapshots(directory: str, keep: int) -> List[str]:
+    """
+    Deletes all but the newest `keep` snapshots in a backup directory.
+
+    Returns:
+        The paths of the deleted snapshots.
+    """
+    snapshots: List[str] = list_snapshots(directory)
+    expired: List[str] = snapshots[:max(0, len(snapshots) - keep)]
+    for path in expired:
+        os.remove(path)
+    return expired
+
+
+def take_snapshot(backup: Callable[[str], None], directory: str, keep: int) -> str:
+    """
+    Takes a new snapshot into a backup directory and applies the retention policy.
+
+    Args:
+        backup (Callable[[str], None]): Writes a verified snapshot to the given path,
+            such as Database.backup or Accounts.backup.
+        directory (str): The backup directory (created if necessary).
+        keep (int): Number of snapshots to keep, including the new one.
+
+    Returns:
+        The path of the new snapshot.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path: str = os.path.join(directory, snapshot_name(datetime.now()))
+    backup(path)
+    prune_snapshots(directory, keep)
+    return path
@@ -0,0 +1,482 @@
+"""
+Database and route micro-benchmarks for the 5/3/1 Workout Tracker.
+
+For each history size, builds a fresh database from the synthetic generator, then times
+every Database method and every route (through the Flask test client) and writes the
+results as JSON, optionally comparing them against a previous run.
+
+Usage:
+    python benchmarks/bench.py [--years 1,5,20] [--repeat 20] [--output results.json]
+                               [--baseline baseline.json] [--threshold 1.25]
+
+Route timings are taken with the page cache cleared before each request, so they measure
+queries and rendering rather than cache hits. Every response must have the status its case
+expects; a mismatch (or a bounce to the login page) stops the run.
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+REPO_ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# Keep the app's own accounts and database out of the way; each size gets its own user below
+os.environ.setdefault("WORKOUT_DB", os.path.join(tempfile.gettempdir(), "531-bench-app.db"))
+
+import app as app_module  # noqa: E402
+from accounts import Accounts  # noqa: E402
+from shards import ShardCache  # noqa: E402
+from synthetic import populate  # noqa: E402
+from workout_db import Database  # noqa: E402
+
+Case = Tuple[str, Callable[[], Any]]
+# A route case: name, request, optional untimed setup and the expected response status
+RouteCase = Tuple[str, Callable[[], Any], Optional[Callable[[], None]], int]
+
+# Methods without their own case: close() ends the run and import_workouts() is timed by
+# each size's build_seconds
+NOT_BENCHMARKED: Tuple[str, ...] = ("close", "import_workouts")
+
+
+def consume(result: Any) -> Any:
+    """Exhaust iterators and streamed responses so their full cost is measured."""
+    if hasattr(result, "get_data"):
+        result.get_data()
+    elif hasattr(result, "__next__"):
+        for _ in result:
+            pass
+    return result
+
+
+def time_case(fn: Callable[[], Any], repeat: int, before: Optional[Callable[[], None]] = None) -> Dict[str, float]:
+    """
+    Run a case `repeat` times and summarize its latency.
+
+    Args:
+        fn (Callable[[], Any]): The operation to time.
+        repeat (int): Number of timed runs (after one untimed warm-up).
+        before (Optional[Callable[[], None]]): Untimed setup run before each call.
+
+    Returns:
+        Dict[str, float]: Median, p95, min and max in milliseconds.
+    """
+    samples: List[float] = []
+
+    for i in range(repeat + 1):
+        if before:
+            before()
+        start: float = time.perf_counter()
+        consume(fn())
+        elapsed: float = (time.perf_counter() - start) * 1000
+        if i:
+            samples.append(elapsed)
+
+    samples.sort()
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "min_ms": round(samples[0], 3),
+        "max_ms": round(samples[-1], 3),
+    }
+
+
+def check_status(name: str, response: Any, expected: int) -> None:
+    """
+    Fail the run if a route answered with an unexpected status, or was bounced to the login
+    page, so an error or a lost session is not recorded as a fast timing.
+
+    Raises:
+        RuntimeError: On a mismatch.
+    """
+    location: str = response.headers.get("Location", "")
+    if response.status_code != expected or "/login?next=" in location:
+        raise RuntimeError(
+            f"{name} answered {response.status_code}{' -> ' + location if location else ''}, expected {expected}"
+        )
+
+
+def database_cases(db: Database) -> List[Case]:
+    """Return a benchmark case for every public Database method."""
+    today: date = date.today()
+    month_ago: str = (today - timedelta(days=30)).isoformat()
+    first_page = db.get_workout_history_page(page_size=50)
+    entry_id: int = first_page.records[0][0]
+    cursor = first_page.next_cursor
+    snapshot: str = db.path + ".bench-snapshot"
+    db.backup(snapshot)
+
+    def log_and_undo() -> None:
+        db.log_workout(today, "Squat", 225.0, "5")
+        newest = db.get_workout_history_page(exercise="Squat", page_size=1).records[0]
+        db.delete_workout_entry_by_id(newest[0])
+
+    def log_session_and_undo() -> None:
+        db.log_workouts([(today, "Dips", 0.0, "12", None)] * 20)
+        for record in db.get_workout_history_page(exercise="Dips", start_date=today.isoformat(), page_size=20).records:
+            db.delete_workout_entry_by_id(record[0])
+
+    def update_entry() -> None:
+        entry = db.get_workout_entry(entry_id)
+        db.update_workout_entry_by_id(entry_id, new_weight=entry[3])
+
+    return [
+        ("create_tables", db.create_tables),
+        ("get_schema_version", db.get_schema_version),
+        ("get_data_version", db.get_data_version),
+        ("check_query_plans", db.check_query_plans),
+        ("get_training_max", lambda: db.get_training_max("Squat")),
+        ("get_training_max_history", db.get_training_max_history),
+        ("get_current_training_maxes", db.get_current_training_maxes),
+        ("get_training_max_timeline", db.get_training_max_timeline),
+        ("get_training_max_timeline[limit]", lambda: db.get_training_max_timeline(limit=12)),
+        ("iter_training_max_history", db.iter_training_max_history),
+        ("get_workout_history", db.get_workout_history),
+        ("iter_workout_history", db.iter_workout_history),
+        ("get_workout_entry", lambda: db.get_workout_entry(entry_id)),
+        ("get_workout_history_page", lambda: db.get_workout_history_page(page_size=50)),
+        ("get_workout_history_page[accessory,8w]", lambda: db.get_workout_history_page(
+            exercise_type="accessory", start_date=(today - timedelta(weeks=8)).isoformat(), page_size=50)),
+        ("get_workout_history_page[cursor]", lambda: db.get_workout_history_page(before=cursor, page_size=50)),
+        ("get_workout_history_by_exercise", lambda: db.get_workout_history_by_exercise("Squat")),
+        ("get_accessory_sessions", db.get_accessory_sessions),
+        ("get_accessory_sessions[cursor]", lambda: db.get_accessory_sessions(
+            before=(today - timedelta(weeks=26)).isoformat())),
+        ("get_past_accessory_exercises", db.get_past_accessory_exercises),
+        ("search_exercises", lambda: db.search_exercises("", exercise_type="accessory")),
+        ("search_exercises[prefix]", lambda: db.search_exercises("d")),
+        ("get_all_exercises", db.get_all_exercises),
+        ("get_exercise_body_part", lambda: db.get_exercise_body_part("Dips")),
+        ("get_weekly_volume_by_body_part", lambda: db.get_weekly_volume_by_body_part(month_ago, today.isoformat())),
+        ("get_volume_by_week[4w]", lambda: db.get_volume_by_week(month_ago, today.isoformat())),
+        ("get_volume_by_week[52w]", lambda: db.get_volume_by_week(
+            (today - timedelta(weeks=52)).isoformat(), today.isoformat())),
+        ("get_daily_best", lambda: db.get_daily_best("Squat")),
+        ("get_tonnage[52w]", lambda: db.get_tonnage((today - timedelta(weeks=52)).isoformat(), today.isoformat())),
+        ("get_tonnage[exercise,52w]", lambda: db.get_tonnage(
+            (today - timedelta(weeks=52)).isoformat(), today.isoformat(), "Squat")),
+        ("get_records", db.get_records),
+        ("get_records[exercise]", lambda: db.get_records("Squat")),
+        ("get_cycle_plan", lambda: db.get_cycle_plan(supplemental="bbb")),
+        ("get_cycle_plan[exercise]", lambda: db.get_cycle_plan("Squat", supplemental="bbb")),
+        ("add_exercise", lambda: db.add_exercise("Dips", "Chest")),
+        ("set_training_max", lambda: db.set_training_max("Squat", 400.0, 360.0)),
+        ("advance_cycle", db.advance_cycle),
+        ("update_workout_entry_by_id", update_entry),
+        ("log_workout+delete_workout_entry_by_id", log_and_undo),
+        ("log_workouts[20]+delete", log_session_and_undo),
+        ("rebuild_daily_best", db.rebuild_daily_best),
+        ("rebuild_records", db.rebuild_records),
+        ("rebuild_cycle_plan", db.rebuild_cycle_plan),
+        ("backup", lambda: db.backup(snapshot)),
+        ("restore", lambda: db.restore(snapshot)),
+        # Archives everything but the last 26 weeks on its warm-up run; the reads after
+        # it (and the route cases) then combine hot sets, archived sets and rollups
+        ("archive_history", db.archive_history),
+        ("get_workout_history_page[archived]", lambda: db.get_workout_history_page(page_size=50)),
+        ("get_workout_history_by_exercise[archived]", lambda: db.get_workout_history_by_exercise("Squat")),
+        ("get_volume_by_week[52w,archived]", lambda: db.get_volume_by_week(
+            (today - timedelta(weeks=52)).isoformat(), today.isoformat())),
+        ("get_tonnage[52w,archived]", lambda: db.get_tonnage(
+            (today - timedelta(weeks=52)).isoformat(), today.isoformat())),
+    ]
+
+
+def route_cases(client: Any, db: Database, credentials: Dict[str, str]) -> List[RouteCase]:
+    """
+    Return a benchmark case, with an optional untimed setup step and the expected response
+    status, for every route.
+
+    The client is logged in with `credentials`. Registering and logging out switch the
+    client's session away from that user, so those cases come last.
+    """
+    entry_id: int = db.get_workout_history_page(page_size=1).records[0][0]
+    new_users: Iterator[int] = itertools.count()
+    import_body: bytes = b"date,exercise,weight,reps\n" + b"2020-01-01,Dips,0,10\n" * 10
+    to_delete: List[int] = []
+
+    def log_entry_to_delete() -> None:
+        db.log_workout(date.today(), "Squat", 135.0, "5")
+        to_delete.append(db.get_workout_history_page(exercise="Squat", page_size=1).records[0][0])
+
+    accessory_form: Dict[str, str] = {
+        "total_exercises": "1",
+        "exercise_1": "Dips",
+        "total_sets_1": "3",
+        "weight_1_1": "0", "reps_1_1": "12",
+        "weight_1_2": "0", "reps_1_2": "10",
+        "weight_1_3": "0", "reps_1_3": "8",
+    }
+
+    return [
+        ("GET /", lambda: client.get("/"), None, 200),
+        ("GET /set-training-maxes", lambda: client.get("/set-training-maxes"), None, 200),
+        ("POST /set-training-maxes", lambda: client.post("/set-training-maxes", data={"Squat": "400"}), None, 302),
+        ("GET /view-training-maxes", lambda: client.get("/view-training-maxes"), None, 200),
+        ("GET /view-training-maxes?all=1", lambda: client.get("/view-training-maxes?all=1"), None, 200),
+        ("POST /advance-cycle", lambda: client.post("/advance-cycle"), None, 302),
+        ("GET /api/training-maxes", lambda: client.get("/api/training-maxes"), None, 200),
+        ("GET /start-workout", lambda: client.get("/start-workout"), None, 200),
+        ("GET /perform-workout/Squat", lambda: client.get("/perform-workout/Squat"), None, 200),
+        ("GET /perform-workout/Squat?supplemental=bbb", lambda: client.get(
+            "/perform-workout/Squat?week=2&supplemental=bbb"), None, 200),
+        ("POST /perform-workout/Squat", lambda: client.post(
+            "/perform-workout/Squat", data={"week": "1", "set_1": "5", "set_2": "5", "set_3": "8"}), None, 302),
+        ("GET /add-accessory", lambda: client.get("/add-accessory"), None, 200),
+        ("GET /add-accessory/sessions", lambda: client.get(
+            f"/add-accessory/sessions?before={(date.today() - timedelta(weeks=26)).isoformat()}"), None, 200),
+        ("GET /api/exercises?prefix=", lambda: client.get("/api/exercises?prefix=d&type=accessory"), None, 200),
+        ("POST /add-accessory", lambda: client.post("/add-accessory", data=accessory_form), None, 302),
+        ("GET /history", lambda: client.get("/history"), None, 200),
+        ("GET /history?type=accessory&limit_weeks=8", lambda: client.get(
+            "/history?type=accessory&limit_weeks=8"), None, 200),
+        ("GET /correct-mistake", lambda: client.get("/correct-mistake"), None, 200),
+        ("GET /update-entry/<id>", lambda: client.get(f"/update-entry/{entry_id}"), None, 200),
+        ("POST /update-entry/<id>", lambda: client.post(
+            f"/update-entry/{entry_id}", data={"new_reps": "5"}), None, 302),
+        ("POST /delete-entry/<id>", lambda: client.post(f"/delete-entry/{to_delete.pop()}"), log_entry_to_delete, 302),
+        ("GET /volume-history", lambda: client.get("/volume-history"), None, 200),
+        ("GET /volume-history?weeks=52", lambda: client.get("/volume-history?weeks=52"), None, 200),
+        ("GET /progress-graph", lambda: client.get("/progress-graph"), None, 200),
+        ("POST /progress-graph", lambda: client.post("/progress-graph", data={"exercise": "Squat"}), None, 200),
+        ("GET /api/tonnage", lambda: client.get("/api/tonnage"), None, 200),
+        ("GET /records", lambda: client.get("/records"), None, 200),
+        ("GET /plan", lambda: client.get("/plan"), None, 200),
+        ("GET /plan?supplemental=fsl", lambda: client.get("/plan?supplemental=fsl"), None, 200),
+        ("GET /api/records", lambda: client.get("/api/records"), None, 200),
+        ("GET /api/progress-graph/Squat", lambda: client.get("/api/progress-graph/Squat"), None, 200),
+        ("GET /assets/plotly-<version>.min.js", lambda: client.get(
+            f"/assets/plotly-{app_module.plotlyjs_version()}.min.js"), None, 200),
+        ("GET /api/export/workouts", lambda: client.get("/api/export/workouts"), None, 200),
+        ("GET /api/export/workouts?format=csv", lambda: client.get("/api/export/workouts?format=csv"), None, 200),
+        ("GET /api/export/training-maxes", lambda: client.get("/api/export/training-maxes"), None, 200),
+        ("POST /api/import/workouts[10]", lambda: client.post(
+            "/api/import/workouts?format=csv", data=import_body), None, 200),
+        ("GET /metrics", lambda: client.get("/metrics"), None, 200),
+        ("GET /login", lambda: client.get("/login"), None, 200),
+        ("POST /login", lambda: client.post("/login", data=credentials), None, 302),
+        ("GET /register", lambda: client.get("/register"), None, 200),
+        ("POST /register", lambda: client.post("/register", data={
+            "username": f"{credentials['username']}-{next(new_users)}",
+            "password": credentials["password"],
+            "confirm_password": credentials["password"],
+        }), None, 302),
+        ("POST /logout", lambda: client.post("/logout"), lambda: client.post("/login", data=credentials), 302),
+    ]
+
+
+def warn_uncovered(db_cases: List[Case], routes: List[RouteCase]) -> None:
+    """Warn about Database methods and routes that have no benchmark case."""
+    db_names: str = " ".join(name for name, _ in db_cases)
+    for name in dir(Database):
+        if (
+            not name.startswith("_")
+            and callable(getattr(Database, name))
+            and name not in db_names
+            and name not in NOT_BENCHMARKED
+        ):
+            print(f"warning: Database.{name} is not benchmarked", file=sys.stderr)
+
+    route_names: str = " ".join(case[0] for case in routes)
+    for rule in app_module.app.url_map.iter_rules():
+        path: str = rule.rule.split("<")[0]
+        if rule.endpoint != "static" and path not in route_names:
+            print(f"warning: route {rule.rule} is not benchmarked", file=sys.stderr)
+
+
+def run_size(years: float, repeat: int, seed: int, workdir: str) -> Dict[str, Any]:
+    """
+    Build a database with `years` of synthetic history and benchmark it.
+
+    Returns:
+        Dict[str, Any]: Row counts, build time and per-case timings.
+    """
+    # Give the app fresh accounts for this size, with one user whose shard is benchmarked.
+    # The shard is opened through the app's own opener, so timings include the metrics overhead.
+    app_module.accounts = Accounts(os.path.join(workdir, f"{years:g}y"))
+    app_module.shards = ShardCache(app_module.open_shard)
+    credentials: Dict[str, str] = {"username": f"bench-{years:g}y", "password": "benchmark"}
+    user_id: int = app_module.accounts.create_user(credentials["username"], credentials["password"])
+    db: Database = app_module.shards.acquire(user_id)
+
+    start: float = time.perf_counter()
+    rows: int = populate(db, years, seed)
+    build_seconds: float = time.perf_counter() - start
+
+    client = app_module.app.test_client()
+    check_status("POST /login", client.post("/login", data=credentials), 302)
+
+    db_cases: List[Case] = database_cases(db)
+    routes: List[RouteCase] = route_cases(client, db, credentials)
+    warn_uncovered(db_cases, routes)
+
+    result: Dict[str, Any] = {
+        "rows": rows,
+        "build_seconds": round(build_seconds, 3),
+        "database": {},
+        "routes": {},
+    }
+
+    # Silence the progress prints some write paths emit
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name, fn in db_cases:
+            result["database"][name] = time_case(fn, repeat)
+
+        for name, fn, setup, status in routes:
+            def before(setup: Optional[Callable[[], None]] = setup) -> None:
+                app_module.page_cache.clear()
+                if setup:
+                    setup()
+
+            def request(name: str = name, fn: Callable[[], Any] = fn, status: int = status) -> Any:
+                response = fn()
+                check_status(name, response, status)
+                return response
+
+            result["routes"][name] = time_case(request, repeat, before=before)
+
+    app_module.shards.release(user_id)
+    app_module.shards.close()
+    app_module.accounts.close()
+    return result
+
+
+def bench_concurrent_writes(
+    workdir: str, thread_counts: Tuple[int, ...] = (1, 4, 8), writes: int = 50, runs: int = 3
+) -> Dict[str, Any]:
+    """
+    Measure set-logging throughput with concurrent writers, committing each write on its
+    own and with group commit. Both run at synchronous=FULL, so every acknowledged write is
+    on disk in every mode; direct writes at NORMAL (the default without group commit) are
+    included for reference.
+
+    Returns:
+        Dict[str, Any]: Median writes per second over `runs` runs, per mode and thread count.
+    """
+    modes: Dict[str, Tuple[Optional[float], str]] = {
+        "direct[NORMAL]": (None, "NORMAL"),
+        "direct[FULL]": (None, "FULL"),
+        "group_commit[0ms]": (0.0, "FULL"),
+        "group_commit[1ms]": (0.001, "FULL"),
+    }
+    result: Dict[str, Any] = {"writes_per_thread": writes, "threads": {}}
+    databases: Iterator[int] = itertools.count()
+
+    def throughput(window: Optional[float], synchronous: str, threads: int) -> float:
+        path: str = os.path.join(workdir, f"writes-{next(databases)}.db")
+        db = Database(path, group_commit=window, synchronous=synchronous)
+
+        def work() -> None:
+            for i in range(writes):
+                db.log_workout(date.today(), "Squat", 100.0 + i, "5")
+
+        workers: List[threading.Thread] = [threading.Thread(target=work) for _ in range(threads)]
+        start: float = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        seconds: float = time.perf_counter() - start
+        db.close()
+        return threads * writes / seconds
+
+    for threads in thread_counts:
+        result["threads"][str(threads)] = {
+            mode: {"writes_per_second": round(statistics.median(throughput(*setting, threads) for _ in range(runs)))}
+            for mode, setting in modes.items()
+        }
+
+    print(f"\n== concurrent writes (writes/s, median of {runs}) ==", file=sys.stderr)
+    print(f"{'threads':<8}" + "".join(f"{mode:>20}" for mode in modes), file=sys.stderr)
+    for threads, by_mode in result["threads"].items():
+        print(f"{threads:<8}" + "".join(f"{by_mode[mode]['writes_per_second']:>20}" for mode in modes), file=sys.stderr)
+
+    return result
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> int:
+    """
+    Print the median ratio of every case against a baseline run.
+
+    Returns:
+        int: The number of cases slower than `threshold` times the baseline.
+    """
+    regressions: int = 0
+
+    for size, size_result in results["sizes"].items():
+        base_size: Optional[Dict[str, Any]] = baseline.get("sizes", {}).get(size)
+        if not base_size:
+            continue
+
+        print(f"\n== {size} ({size_result['rows']} rows) vs baseline ==")
+        for group in ("database", "routes"):
+            for name, timing in size_result[group].items():
+                base: Optional[Dict[str, float]] = base_size.get(group, {}).get(name)
+                if not base or not base["median_ms"]:
+                    continue
+                ratio: float = timing["median_ms"] / base["median_ms"]
+                flag: str = "  REGRESSION" if ratio > threshold else ""
+                regressions += bool(flag)
+                print(f"{name:<48} {base['median_ms']:>10.3f} -> {timing['median_ms']:>10.3f} ms  x{ratio:5.2f}{flag}")
+
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", default="1,5,20", help="comma-separated history sizes in years")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per case")
+    parser.add_argument("--seed", type=int, default=531, help="synthetic data seed")
+    parser.add_argument("--output", default="bench_results.json", help="where to write the JSON results")
+    parser.add_argument("--baseline", help="previous results to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio flagged as a regression")
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "sizes": {},
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for years_str in args.years.split(","):
+            years: float = float(years_str)
+            label: str = f"{years:g}y"
+            print(f"Benchmarking {label} of history...", file=sys.stderr)
+            results["sizes"][label] = run_size(years, args.repeat, args.seed, workdir)
+
+        print("Benchmarking concurrent writes...", file=sys.stderr)
+        results["concurrent_writes"] = bench_concurrent_writes(workdir)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions: int = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{regressions} case(s) slower than x{args.threshold} of the baseline")
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Startup benchmark for the 5/3/1 Workout Tracker.
+
+Measures how long a fresh Python process takes to import the app and to serve its first
+responses, which is what every gunicorn worker pays after a container restart.
+
+Usage:
+    python benchmarks/startup.py [--runs N] [--gunicorn]
+
+With --gunicorn, the time from launching a real gunicorn server to its first successful
+HTTP response is measured as well.
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import Dict, List
+
+REPO_ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter so nothing is already imported or compiled. The client is
+# logged in through its session cookie rather than a request, so the timed requests are the
+# first the app serves, and each must render (200) rather than redirect to the login page.
+PROBE: str = """
+import json, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+user_id = app.accounts.get_user_id("startup") or app.accounts.create_user("startup", "startup-bench")
+client = app.app.test_client()
+with client.session_transaction() as session:
+    session["user_id"] = user_id
+t2 = time.perf_counter()
+response = client.get("/")
+assert response.status_code == 200, response.status
+t3 = time.perf_counter()
+response = client.get("/progress-graph")
+assert response.status_code == 200, response.status
+t4 = time.perf_counter()
+print(json.dumps({
+    "import_app": t1 - t0,
+    "first_response": t3 - t2,
+    "first_progress_graph": t4 - t3,
+}))
+"""
+
+
+def probe_once(env: Dict[str, str]) -> Dict[str, float]:
+    """
+    Time importing the app and serving the first requests in a new process.
+
+    Args:
+        env (Dict[str, str]): Environment for the child process.
+
+    Returns:
+        Dict[str, float]: Seconds spent in each phase.
+    """
+    output: str = subprocess.check_output(
+        [sys.executable, "-c", PROBE], cwd=REPO_ROOT, env=env, text=True
+    )
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def free_port() -> int:
+    """Return a TCP port that is free on localhost."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def gunicorn_once(env: Dict[str, str], timeout: float = 60.0) -> float:
+    """
+    Time from launching gunicorn to the first successful response.
+
+    Args:
+        env (Dict[str, str]): Environment for the server process.
+        timeout (float): Seconds to wait before giving up.
+
+    Returns:
+        float: Seconds until the login page answered.
+    """
+    port: int = free_port()
+    start: float = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "--bind", f"127.0.0.1:{port}", "app:app"],
+        cwd=REPO_ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/login", timeout=1):
+                    return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError("gunicorn did not answer in time")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def summarize(name: str, samples: List[float]) -> None:
+    """Print the median and spread of a list of timings."""
+    print(
+        f"{name:<22} median {statistics.median(samples) * 1000:8.1f} ms"
+        f"   min {min(samples) * 1000:8.1f} ms   max {max(samples) * 1000:8.1f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="number of fresh processes to time")
+    parser.add_argument("--gunicorn", action="store_true", help="also time a real gunicorn start")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env: Dict[str, str] = dict(os.environ, WORKOUT_DB=os.path.join(tmp, "workout.db"))
+
+        phases: Dict[str, List[float]] = {}
+        for _ in range(args.runs):
+            for phase, seconds in probe_once(env).items():
+                phases.setdefault(phase, []).append(seconds)
+
+        for phase, samples in phases.items():
+            summarize(phase, samples)
+
+        if args.gunicorn:
+            summarize("gunicorn_first_200", [gunicorn_once(env) for _ in range(args.runs)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Deterministic synthetic training history for benchmarks.
+
+Generates a realistic multi-year 5/3/1 log: four main-lift days a week following the
+three-week scheme plus a deload, accessory work with body parts, and a training max bump
+every cycle. The same seed, size and end date always produce the same data.
+"""
+
+import random
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from workout_db import Database, ImportRow
+
+# Weekday each main lift is trained on (Monday = 0)
+MAIN_LIFT_DAYS: Dict[int, str] = {0: "Squat", 1: "Bench Press", 3: "Deadlift", 4: "Press"}
+
+# (percentage of TM, prescribed reps) per week of the cycle; week 4 is the deload
+WEEK_SCHEME: Dict[int, List[Tuple[float, str]]] = {
+    1: [(0.65, "5"), (0.75, "5"), (0.85, "5+")],
+    2: [(0.70, "3"), (0.80, "3"), (0.90, "3+")],
+    3: [(0.75, "5"), (0.85, "3"), (0.95, "1+")],
+    4: [(0.40, "5"), (0.50, "5"), (0.60, "5")],
+}
+
+STARTING_ONE_RMS: Dict[str, float] = {
+    "Squat": 275.0,
+    "Bench Press": 205.0,
+    "Deadlift": 335.0,
+    "Press": 125.0,
+}
+
+# Per-cycle training max increase (lbs)
+CYCLE_INCREMENTS: Dict[str, float] = {
+    "Squat": 10.0,
+    "Bench Press": 5.0,
+    "Deadlift": 10.0,
+    "Press": 5.0,
+}
+
+# Accessory pool per main-lift day as (exercise, body part, starting weight)
+ACCESSORIES: Dict[str, List[Tuple[str, str, float]]] = {
+    "Squat": [("Leg Press", "Quads", 270.0), ("Leg Curl", "Hamstrings", 90.0), ("Hanging Leg Raise", "Abs", 0.0)],
+    "Bench Press": [("Dumbbell Row", "Back", 60.0), ("Dips", "Chest", 0.0), ("Tricep Pushdown", "Triceps", 50.0)],
+    "Deadlift": [("Good Morning", "Hamstrings", 95.0), ("Lat Pulldown", "Back", 120.0), ("Ab Wheel", "Abs", 0.0)],
+    "Press": [("Chin-up", "Back", 0.0), ("Lateral Raise", "Shoulders", 20.0), ("Barbell Curl", "Biceps", 65.0)],
+}
+
+
+def round_to_nearest_2_5(weight: float) -> float:
+    """Round weight to the nearest 2.5 increment, as the app does."""
+    return round(weight / 2.5) * 2.5
+
+
+def training_max_for(lift: str, cycle: int) -> float:
+    """Return the training max for a lift in a given (zero-based) cycle."""
+    return STARTING_ONE_RMS[lift] * 0.9 + CYCLE_INCREMENTS[lift] * cycle
+
+
+def start_date_for(years: float, end: date) -> date:
+    """Return the Monday on which a history of `years` ending at `end` starts."""
+    start: date = end - timedelta(days=int(years * 365))
+    return start - timedelta(days=start.weekday())
+
+
+def generate_workouts(years: float, seed: int = 531, end: Optional[date] = None) -> Iterator[ImportRow]:
+    """
+    Generate logged sets, oldest first.
+
+    Args:
+        years (float): Length of the history.
+        seed (int): Random seed; the same seed always produces the same history.
+        end (Optional[date]): Last day of the history; defaults to yesterday.
+
+    Yields:
+        ImportRow: (date, exercise, weight, reps, workout_duration, body_part).
+    """
+    rng = random.Random(seed)
+    end = end or date.today() - timedelta(days=1)
+    day: date = start_date_for(years, end)
+    first_monday: date = day
+
+    while day <= end:
+        lift: Optional[str] = MAIN_LIFT_DAYS.get(day.weekday())
+
+        # Skip roughly one planned session in ten
+        if lift is None or rng.random() < 0.1:
+            day += timedelta(days=1)
+            continue
+
+        week_index: int = (day - first_monday).days // 7
+        cycle, week = divmod(week_index, 4)
+        tm: float = training_max_for(lift, cycle)
+        duration: int = rng.randint(2700, 5400)
+
+        for idx, (pct, reps) in enumerate(WEEK_SCHEME[week + 1]):
+            if reps.endswith("+"):
+                # AMRAP: a few reps past the minimum, logged with a trailing "+"
+                base: int = int(reps[:-1])
+                reps = f"{base + rng.randint(0, 6)}+"
+            yield (
+                day.isoformat(),
+                lift,
+                round_to_nearest_2_5(tm * pct),
+                reps,
+                duration if idx == 0 else None,
+                None,
+            )
+
+        for exercise, body_part, start_weight in rng.sample(ACCESSORIES[lift], 2):
+            weight: float = round_to_nearest_2_5(start_weight * (1 + 0.02 * cycle))
+            for _ in range(rng.randint(3, 5)):
+                yield (day.isoformat(), exercise, weight, str(rng.randint(8, 15)), None, body_part)
+
+        day += timedelta(days=1)
+
+
+def generate_training_maxes(years: float, end: Optional[date] = None) -> Iterator[Tuple[str, str, float, float]]:
+    """
+    Generate training max updates, one per lift at the start of every cycle.
+
+    Args:
+        years (float): Length of the history.
+        end (Optional[date]): Last day of the history; defaults to yesterday.
+
+    Yields:
+        Tuple[str, str, float, float]: (date, lift, one_rm, training_max).
+    """
+    end = end or date.today() - timedelta(days=1)
+    cycle_start: date = start_date_for(years, end)
+    cycle: int = 0
+
+    while cycle_start <= end:
+        for lift in MAIN_LIFT_DAYS.values():
+            tm: float = training_max_for(lift, cycle)
+            yield cycle_start.isoformat(), lift, round(tm / 0.9, 1), tm
+        cycle_start += timedelta(weeks=4)
+        cycle += 1
+
+
+def populate(db: Database, years: float, seed: int = 531, end: Optional[date] = None) -> int:
+    """
+    Fill a database with a synthetic history.
+
+    Args:
+        db (Database): An empty database.
+        years (float): Length of the history.
+        seed (int): Random seed.
+        end (Optional[date]): Last day of the history; defaults to yesterday.
+
+    Returns:
+        int: The number of sets logged.
+    """
+    for day, lift, one_rm, tm in generate_training_maxes(years, end):
+        db.set_training_max(lift, one_rm, tm, date_value=day)
+
+    return db.import_workouts(generate_workouts(years, seed, end))
@@ -0,0 +1,222 @@
+"""
+Data import/export helpers for the 5/3/1 Workout Tracker.
+
+Provides functions to serialize rows streamed from the database as NDJSON or CSV,
+one chunk at a time, so exports use constant memory and start sending immediately,
+and to parse and validate NDJSON or CSV workout logs as a stream for bulk import.
+"""
+
+import csv
+import io
+import json
+import math
+import time
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+from workout_db import Database, ImportRow
+
+EXPORT_FORMATS: Tuple[str, ...] = ("ndjson", "csv")
+
+MIMETYPES: Dict[str, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def format_rows(
+    columns: Sequence[str], rows: Iterable[Sequence[Any]], fmt: str, chunk_rows: int = 500
+) -> Iterator[str]:
+    """
+    Serialize rows lazily as NDJSON (one object per line) or CSV (with a header row).
+
+    Args:
+        columns (Sequence[str]): Column names, in row order.
+        rows (Iterable[Sequence[Any]]): The rows to serialize.
+        fmt (str): 'ndjson' or 'csv'.
+        chunk_rows (int): Number of rows joined into each yielded chunk.
+
+    Yields:
+        str: Chunks of serialized output.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    pending: int = 0
+
+    if fmt == "csv":
+        writer.writerow(columns)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    for row in rows:
+        if fmt == "csv":
+            writer.writerow(row)
+        else:
+            buffer.write(json.dumps(dict(zip(columns, row))))
+            buffer.write("\n")
+
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    remainder: str = buffer.getvalue()
+    if remainder:
+        yield remainder
+
+
+def read_records(stream: TextIO, fmt: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Parse NDJSON or CSV (with a header row) lazily into dictionaries.
+
+    Args:
+        stream (TextIO): The text stream to read.
+        fmt (str): 'ndjson' or 'csv'.
+
+    Yields:
+        Tuple[int, Dict[str, Any]]: The line number and the parsed record. Lines that are
+        not valid JSON objects yield an empty record so validation reports them.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+    elif fmt == "ndjson":
+        for line_num, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record: Any = json.loads(line)
+            except json.JSONDecodeError:
+                record = {}
+            yield line_num, record if isinstance(record, dict) else {}
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def validate_workout_record(record: Dict[str, Any]) -> ImportRow:
+    """
+    Validate one imported record in the workout_history column layout.
+
+    Required fields are date (YYYY-MM-DD), exercise, weight and reps; workout_duration
+    (seconds) and body_part are optional, and an id column is ignored.
+
+    Args:
+        record (Dict[str, Any]): The parsed record.
+
+    Returns:
+        ImportRow: (date, exercise, weight, reps, workout_duration, body_part).
+
+    Raises:
+        ValueError: If a field is missing or invalid.
+    """
+    def field(name: str) -> Optional[str]:
+        value: Any = record.get(name)
+        return str(value).strip() if value is not None and str(value).strip() else None
+
+    date_str: Optional[str] = field("date")
+    exercise: Optional[str] = field("exercise")
+    weight_str: Optional[str] = field("weight")
+    reps: Optional[str] = field("reps")
+    duration_str: Optional[str] = field("workout_duration")
+
+    if not date_str or not exercise or not weight_str or not reps:
+        raise ValueError("date, exercise, weight and reps are required")
+
+    try:
+        day: date = date.fromisoformat(date_str[:10])
+    except ValueError:
+        raise ValueError(f"invalid date '{date_str}'") from None
+
+    # float() also accepts 'nan' and 'inf', which would poison every sum and maximum
+    try:
+        weight: float = float(weight_str)
+    except ValueError:
+        raise ValueError(f"invalid weight '{weight_str}'") from None
+    if not math.isfinite(weight):
+        raise ValueError(f"invalid weight '{weight_str}'")
+
+    try:
+        duration: Optional[int] = int(float(duration_str)) if duration_str else None
+    except (ValueError, OverflowError):
+        raise ValueError(f"invalid workout_duration '{duration_str}'") from None
+
+    return day.isoformat(), exercise, weight, reps, duration, field("body_part")
+
+
+class ImportReport:
+    """
+    Outcome of a bulk import: counts, the first validation errors and throughput.
+    """
+
+    MAX_ERRORS: int = 20
+
+    def __init__(self) -> None:
+        self.imported: int = 0
+        self.rejected: int = 0
+        self.errors: List[str] = []
+        self.seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        """Imported rows per second of wall-clock time."""
+        return self.imported / self.seconds if self.seconds else 0.0
+
+    def reject(self, line_num: int, message: str) -> None:
+        """Record a row that failed validation."""
+        self.rejected += 1
+        if len(self.errors) < self.MAX_ERRORS:
+            self.errors.append(f"line {line_num}: {message}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the report as a JSON-serializable dictionary."""
+        return {
+            "imported": self.imported,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+
+def import_workouts(db: Database, stream: TextIO, fmt: str, chunk_size: int = 5000) -> ImportReport:
+    """
+    Stream-validate a workout log and bulk-insert its valid rows.
+
+    Invalid rows are skipped and reported; valid rows are inserted in chunked transactions
+    as they are read, so the file is never held in memory.
+
+    Args:
+        db (Database): The database to import into.
+        stream (TextIO): NDJSON or CSV text in the workout_history column layout.
+        fmt (str): 'ndjson' or 'csv'.
+        chunk_size (int): Number of rows per insert transaction.
+
+    Returns:
+        ImportReport: Counts, errors and throughput.
+    """
+    report = ImportReport()
+
+    def valid_rows() -> Iterator[ImportRow]:
+        for line_num, record in read_records(stream, fmt):
+            try:
+                yield validate_workout_record(record)
+            except ValueError as e:
+                report.reject(line_num, str(e))
+
+    start: float = time.perf_counter()
+    report.imported = db.import_workouts(valid_rows(), chunk_size=chunk_size)
+    report.seconds = time.perf_counter() - start
+    return report
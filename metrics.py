@@ -0,0 +1,207 @@
+"""
+Request and SQL metrics for the 5/3/1 Workout Tracker.
+
+Provides the Metrics class, which aggregates per-statement query counts and times reported
+by the Database, per-endpoint request latency and queries-per-request, and renders them in
+the Prometheus text exposition format.
+"""
+
+import re
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+# Histogram buckets (upper bounds) for request latency in seconds and queries per request
+LATENCY_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_COUNT_BUCKETS: Tuple[float, ...] = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+QUANTILES: Tuple[float, ...] = (0.5, 0.95, 0.99)
+
+# Number of recent requests per endpoint used for the latency quantiles
+QUANTILE_WINDOW: int = 1024
+
+MAX_STATEMENT_LENGTH: int = 200
+
+
+def normalize_statement(sql: str) -> str:
+    """
+    Collapse whitespace in a SQL statement so each query shape gets one label value.
+
+    Args:
+        sql (str): The statement as executed (parameters are bound separately).
+
+    Returns:
+        str: The normalized statement, truncated to MAX_STATEMENT_LENGTH characters.
+    """
+    return re.sub(r"\s+", " ", sql).strip()[:MAX_STATEMENT_LENGTH]
+
+
+def escape_label(value: str) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Histogram:
+    """
+    A cumulative histogram with fixed buckets, as Prometheus expects.
+    """
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets: Tuple[float, ...] = tuple(buckets)
+        self.counts: List[int] = [0] * len(self.buckets)
+        self.total: float = 0.0
+        self.count: int = 0
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        self.total += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def render(self, name: str, labels: str) -> List[str]:
+        """Render the bucket, sum and count samples."""
+        lines: List[str] = [
+            f'{name}_bucket{{{labels},le="{bound:g}"}} {count}'
+            for bound, count in zip(self.buckets, self.counts)
+        ]
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.total:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class Metrics:
+    """
+    Thread-safe registry of SQL and request metrics.
+
+    The Database reports every statement through record_query() (pass it as on_query). Flask request hooks call
+    begin_request() and end_request(), and the statements a request issues on its thread
+    are counted towards it.
+    """
+
+    def __init__(self) -> None:
+        self._lock: threading.Lock = threading.Lock()
+        self._local: threading.local = threading.local()
+        self._statements: Dict[str, List[float]] = {}
+        self._latency: Dict[str, Histogram] = {}
+        self._recent: Dict[str, Deque[float]] = {}
+        self._queries: Dict[str, Histogram] = {}
+        self._responses: Dict[Tuple[str, str], int] = {}
+
+    # -----------------------------------------------------------------------------
+
+    def record_query(self, sql: str, seconds: float, executions: int = 1) -> None:
+        """
+        Record time spent on a statement; matches workout_db.QueryListener.
+
+        Args:
+            sql (str): The statement text.
+            seconds (float): Time spent executing it or fetching its rows.
+            executions (int): 1 for an execution, 0 for time spent fetching rows.
+        """
+        statement: str = normalize_statement(sql)
+
+        with self._lock:
+            stats: List[float] = self._statements.setdefault(statement, [0, 0.0])
+            stats[0] += executions
+            stats[1] += seconds
+
+        if executions and getattr(self._local, "queries", None) is not None:
+            self._local.queries += executions
+
+    # -----------------------------------------------------------------------------
+
+    def begin_request(self) -> None:
+        """Start counting the statements issued by the current thread."""
+        self._local.queries = 0
+
+    # -----------------------------------------------------------------------------
+
+    def end_request(self, endpoint: str, status: int, seconds: float) -> None:
+        """
+        Record a finished request.
+
+        Args:
+            endpoint (str): The Flask endpoint that handled it.
+            status (int): The response status code.
+            seconds (float): Time from the start of the request to the response.
+        """
+        queries: int = getattr(self._local, "queries", None) or 0
+        self._local.queries = None
+
+        with self._lock:
+            self._latency.setdefault(endpoint, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self._queries.setdefault(endpoint, Histogram(QUERY_COUNT_BUCKETS)).observe(queries)
+            self._recent.setdefault(endpoint, deque(maxlen=QUANTILE_WINDOW)).append(seconds)
+            key: Tuple[str, str] = (endpoint, str(status))
+            self._responses[key] = self._responses.get(key, 0) + 1
+
+    # -----------------------------------------------------------------------------
+
+    @staticmethod
+    def _quantile(ordered: List[float], q: float) -> Optional[float]:
+        """Return the q-quantile of an ascending list (nearest rank)."""
+        if not ordered:
+            return None
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    # -----------------------------------------------------------------------------
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format (version 0.0.4).
+
+        Returns:
+            str: The metrics page.
+        """
+        lines: List[str] = []
+
+        with self._lock:
+            lines.append("# HELP tracker_sql_queries_total SQL statements executed, by statement.")
+            lines.append("# TYPE tracker_sql_queries_total counter")
+            for statement, (count, _) in sorted(self._statements.items()):
+                lines.append(f'tracker_sql_queries_total{{statement="{escape_label(statement)}"}} {int(count)}')
+
+            lines.append("# HELP tracker_sql_query_seconds_total Time spent in SQL statements, by statement.")
+            lines.append("# TYPE tracker_sql_query_seconds_total counter")
+            for statement, (_, seconds) in sorted(self._statements.items()):
+                lines.append(f'tracker_sql_query_seconds_total{{statement="{escape_label(statement)}"}} {seconds:.6f}')
+
+            lines.append("# HELP tracker_http_responses_total Responses sent, by endpoint and status.")
+            lines.append("# TYPE tracker_http_responses_total counter")
+            for (endpoint, status), count in sorted(self._responses.items()):
+                lines.append(
+                    f'tracker_http_responses_total{{endpoint="{escape_label(endpoint)}",status="{status}"}} {count}'
+                )
+
+            lines.append("# HELP tracker_http_request_duration_seconds Request latency, by endpoint.")
+            lines.append("# TYPE tracker_http_request_duration_seconds histogram")
+            for endpoint, histogram in sorted(self._latency.items()):
+                lines.extend(
+                    histogram.render("tracker_http_request_duration_seconds", f'endpoint="{escape_label(endpoint)}"')
+                )
+
+            lines.append(
+                f"# HELP tracker_http_request_latency_seconds Request latency quantiles over the last "
+                f"{QUANTILE_WINDOW} requests, by endpoint."
+            )
+            lines.append("# TYPE tracker_http_request_latency_seconds summary")
+            for endpoint, recent in sorted(self._recent.items()):
+                ordered: List[float] = sorted(recent)
+                label: str = escape_label(endpoint)
+                for q in QUANTILES:
+                    lines.append(
+                        f'tracker_http_request_latency_seconds{{endpoint="{label}",quantile="{q:g}"}} '
+                        f"{self._quantile(ordered, q):.6f}"
+                    )
+                lines.append(f'tracker_http_request_latency_seconds_sum{{endpoint="{label}"}} {sum(ordered):.6f}')
+                lines.append(f'tracker_http_request_latency_seconds_count{{endpoint="{label}"}} {len(ordered)}')
+
+            lines.append("# HELP tracker_http_request_queries SQL statements issued per request, by endpoint.")
+            lines.append("# TYPE tracker_http_request_queries histogram")
+            for endpoint, histogram in sorted(self._queries.items()):
+                lines.extend(histogram.render("tracker_http_request_queries", f'endpoint="{escape_label(endpoint)}"'))
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,86 @@
+"""
+Rendered-page cache for the 5/3/1 Workout Tracker.
+
+Provides the PageCache class, a bounded LRU cache of rendered HTML keyed by route, query
+arguments and the database's data version, so read-only pages are only re-rendered after
+a write.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class PageCache:
+    """
+    A thread-safe, bounded LRU cache of rendered pages.
+    """
+
+    def __init__(self, max_entries: int = 128) -> None:
+        """
+        Args:
+            max_entries (int): Number of pages to keep before evicting the least recently used.
+        """
+        self.max_entries: int = max_entries
+        self._pages: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+
+    # -----------------------------------------------------------------------------
+
+    @staticmethod
+    def etag(key: Hashable) -> str:
+        """
+        Derives a strong ETag from a cache key. Because the key includes the data version,
+        the ETag can be checked without rendering the page.
+
+        Args:
+            key (Hashable): The cache key.
+
+        Returns:
+            The ETag value (without quotes).
+        """
+        return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+
+    # -----------------------------------------------------------------------------
+
+    def get(self, key: Hashable) -> Optional[str]:
+        """
+        Retrieves a cached page and marks it as recently used.
+
+        Args:
+            key (Hashable): The cache key.
+
+        Returns:
+            The rendered page if cached; otherwise, None.
+        """
+        with self._lock:
+            body: Optional[str] = self._pages.get(key)
+            if body is not None:
+                self._pages.move_to_end(key)
+            return body
+
+    # -----------------------------------------------------------------------------
+
+    def put(self, key: Hashable, body: str) -> None:
+        """
+        Stores a rendered page, evicting the least recently used ones beyond max_entries.
+
+        Args:
+            key (Hashable): The cache key.
+            body (str): The rendered page.
+        """
+        with self._lock:
+            self._pages[key] = body
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_entries:
+                self._pages.popitem(last=False)
+
+    # -----------------------------------------------------------------------------
+
+    def clear(self) -> None:
+        """
+        Removes every cached page.
+        """
+        with self._lock:
+            self._pages.clear()
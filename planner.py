@@ -0,0 +1,141 @@
+"""
+5/3/1 cycle planning for the 5/3/1 Workout Tracker.
+
+Provides the week-by-week percentages and rep schemes of a 5/3/1 cycle (three working
+weeks and a deload), the Boring But Big and First Set Last supplemental templates, plate
+loadouts, and plan_cycle() to lay out a whole cycle for a lift from its training max.
+The Database stores the result in cycle_plan whenever a training max changes.
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# Week -> main sets as (percentage of training max, reps); a trailing "+" marks the AMRAP set
+WEEKS: Dict[int, Tuple[Tuple[float, str], ...]] = {
+    1: ((0.65, "5"), (0.75, "5"), (0.85, "5+")),
+    2: ((0.70, "3"), (0.80, "3"), (0.90, "3+")),
+    3: ((0.75, "5"), (0.85, "3"), (0.95, "1+")),
+    4: ((0.40, "5"), (0.50, "5"), (0.60, "5")),
+}
+DELOAD_WEEK: int = 4
+
+# Supplemental templates, done after the main sets in weeks 1-3:
+# Boring But Big is 5x10 at 50% of the training max; First Set Last repeats the first set 5x5.
+SUPPLEMENTAL_TEMPLATES: Tuple[str, ...] = ("bbb", "fsl")
+SUPPLEMENTAL_NAMES: Dict[str, str] = {"bbb": "Boring But Big", "fsl": "First Set Last"}
+BBB_PERCENTAGE: float = 0.50
+SUPPLEMENTAL_SETS: int = 5
+
+# Training max increase per cycle: +10 lb for the lower-body lifts, +5 lb for the upper-body ones
+CYCLE_INCREMENTS: Dict[str, float] = {"Squat": 10.0, "Bench Press": 5.0, "Deadlift": 10.0, "Press": 5.0}
+
+BAR_WEIGHT: float = 45.0
+PLATES: Tuple[float, ...] = (45.0, 35.0, 25.0, 10.0, 5.0, 2.5)
+
+
+def round_to_nearest_2_5(weight: float) -> float:
+    """
+    Round weight to the nearest 2.5 increment.
+
+    Args:
+        weight (float): The weight to round.
+
+    Returns:
+        float: Weight rounded to nearest 2.5.
+    """
+    return round(weight / 2.5) * 2.5
+
+
+def plate_loadout(weight: float, bar: float = BAR_WEIGHT, plates: Tuple[float, ...] = PLATES) -> str:
+    """
+    Work out the plates to load on each side of the bar, heaviest first.
+
+    Args:
+        weight (float): The total weight, including the bar.
+        bar (float): The weight of the bar.
+        plates (Tuple[float, ...]): Available plate sizes, heaviest first.
+
+    Returns:
+        str: The plates per side, e.g. "45 + 10 + 2.5"; "bar" for just the bar, or "" if the
+        weight is lighter than the bar. Any remainder smaller than the lightest plate is dropped.
+    """
+    if weight < bar:
+        return ""
+
+    per_side: float = (weight - bar) / 2
+    loaded: List[str] = []
+    for plate in plates:
+        while per_side >= plate - 1e-9:
+            loaded.append(f"{plate:g}")
+            per_side -= plate
+
+    return " + ".join(loaded) or "bar"
+
+
+class PlannedSet(NamedTuple):
+    """One set of a planned cycle, as stored in the cycle_plan table."""
+
+    exercise: str
+    week: int
+    kind: str  # 'main', or the supplemental template ('bbb' or 'fsl')
+    set_number: int
+    percentage: float
+    weight: float
+    reps: str
+    plates: str
+    training_max: float
+
+
+def plan_cycle(exercise: str, training_max: float) -> List[PlannedSet]:
+    """
+    Lay out a full cycle for a lift: the main sets of every week and, for weeks 1-3, the
+    sets of each supplemental template.
+
+    Args:
+        exercise (str): The lift.
+        training_max (float): Its training max.
+
+    Returns:
+        List[PlannedSet]: The sets ordered by week, kind and set number.
+    """
+    planned: List[PlannedSet] = []
+
+    def add(week: int, kind: str, set_number: int, percentage: float, reps: str) -> None:
+        weight: float = round_to_nearest_2_5(training_max * percentage)
+        planned.append(PlannedSet(
+            exercise, week, kind, set_number, percentage, weight, reps, plate_loadout(weight), training_max
+        ))
+
+    for week, sets in WEEKS.items():
+        for i, (percentage, reps) in enumerate(sets, start=1):
+            add(week, "main", i, percentage, reps)
+
+        if week == DELOAD_WEEK:
+            continue
+
+        for i in range(1, SUPPLEMENTAL_SETS + 1):
+            add(week, "bbb", i, BBB_PERCENTAGE, "10")
+        for i in range(1, SUPPLEMENTAL_SETS + 1):
+            add(week, "fsl", i, sets[0][0], "5")
+
+    return planned
+
+
+def group_plan(rows: List[PlannedSet]) -> Dict[str, Dict[int, Dict[str, List[PlannedSet]]]]:
+    """
+    Group planned sets by exercise, week and kind, for rendering.
+
+    Args:
+        rows (List[PlannedSet]): Sets as returned by Database.get_cycle_plan().
+
+    Returns:
+        Dict[str, Dict[int, Dict[str, List[PlannedSet]]]]: exercise -> week -> kind -> sets.
+    """
+    grouped: Dict[str, Dict[int, Dict[str, List[PlannedSet]]]] = {}
+    for row in rows:
+        grouped.setdefault(row.exercise, {}).setdefault(row.week, {}).setdefault(row.kind, []).append(row)
+    return grouped
+
+
+def parse_supplemental(value: Optional[str]) -> Optional[str]:
+    """Return the supplemental template named by a query argument, or None if it names none."""
+    return value if value in SUPPLEMENTAL_TEMPLATES else None
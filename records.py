@@ -0,0 +1,118 @@
+"""
+Estimated one-rep max and personal record helpers for the 5/3/1 Workout Tracker.
+
+Provides the Epley and Brzycki e1RM formulas, the PersonalRecord tuple reported when a
+logged set beats a record, and summarize_records() to shape the per-exercise rep records
+kept by the Database for the /records page and API.
+"""
+
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+E1RM_FORMULAS: Tuple[str, ...] = ("epley", "brzycki")
+
+
+def epley(weight: float, reps: int) -> float:
+    """
+    Estimate a one-rep max with the Epley formula, weight * (1 + reps / 30).
+
+    A single is its own one-rep max.
+    """
+    if reps <= 1:
+        return float(weight)
+    return weight * (1 + reps / 30)
+
+
+def brzycki(weight: float, reps: int) -> Optional[float]:
+    """
+    Estimate a one-rep max with the Brzycki formula, weight * 36 / (37 - reps).
+
+    Returns None for 37 reps or more, where the formula is undefined.
+    """
+    if reps >= 37:
+        return None
+    if reps <= 1:
+        return float(weight)
+    return weight * 36 / (37 - reps)
+
+
+def estimate_one_rm(weight: float, reps: int, formula: str = "epley") -> Optional[float]:
+    """
+    Estimate a one-rep max from a set.
+
+    Args:
+        weight (float): The weight lifted.
+        reps (int): The reps completed.
+        formula (str): 'epley' or 'brzycki'.
+
+    Returns:
+        The estimated 1RM, or None if the formula does not apply.
+
+    Raises:
+        ValueError: If the formula is not supported.
+    """
+    if formula == "epley":
+        return epley(weight, reps)
+    if formula == "brzycki":
+        return brzycki(weight, reps)
+    raise ValueError(f"Unsupported e1RM formula: {formula}")
+
+
+class PersonalRecord(NamedTuple):
+    """A logged set that set a new rep record and/or estimated 1RM for its exercise."""
+
+    exercise: str
+    reps: int
+    weight: float
+    previous_weight: Optional[float]  # previous best weight for these reps, if any
+    e1rm: float
+    e1rm_pr: bool  # True if the set's Epley e1RM beats every earlier set of the exercise
+
+    def describe(self) -> str:
+        """Return a one-line description for a flash message."""
+        text: str = f"New PR: {self.exercise} {self.weight:g} x {self.reps}"
+        if self.previous_weight is not None:
+            text += f" (previous best {self.previous_weight:g})"
+        if self.e1rm_pr:
+            text += f", estimated 1RM {self.e1rm:.1f}"
+        return text
+
+
+def summarize_records(rows: Iterable[Tuple[str, int, float, str]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Group rep records by exercise and find each exercise's best estimated 1RM.
+
+    Args:
+        rows (Iterable[Tuple[str, int, float, str]]): (exercise, reps, weight, date) rows,
+            as returned by Database.get_records().
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Per exercise, the best Epley e1RM with the set it came
+        from, and the best weight at each rep count with both e1RM estimates.
+    """
+    summary: Dict[str, Dict[str, Any]] = {}
+
+    for exercise, reps, weight, day in rows:
+        entry: Dict[str, Any] = summary.setdefault(exercise, {"best_e1rm": None, "rep_records": []})
+        e1rm: float = round(epley(weight, reps), 1)
+        b: Optional[float] = brzycki(weight, reps)
+        entry["rep_records"].append({
+            "reps": reps,
+            "weight": weight,
+            "date": day,
+            "e1rm_epley": e1rm,
+            "e1rm_brzycki": round(b, 1) if b is not None else None,
+        })
+
+        best: Optional[Dict[str, Any]] = entry["best_e1rm"]
+        if best is None or e1rm > best["e1rm"]:
+            entry["best_e1rm"] = {"e1rm": e1rm, "weight": weight, "reps": reps, "date": day}
+
+    return summary
+
+
+def best_e1rm(records: Iterable[Tuple[int, float]]) -> Optional[float]:
+    """
+    Return the highest Epley e1RM among (reps, weight) rep records, or None if empty.
+    """
+    estimates: List[float] = [epley(weight, reps) for reps, weight in records]
+    return max(estimates) if estimates else None
@@ -0,0 +1,182 @@
+"""
+Per-user database shards for the 5/3/1 Workout Tracker.
+
+Provides the ShardCache class, a bounded LRU cache of open Database objects, so a
+deployment with many lifters keeps only the recently used shards (and their pooled
+connections and file handles) open.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Hashable, Iterator, List, Optional
+
+from workout_db import Database
+
+
+class ShardCache:
+    """
+    A thread-safe, bounded LRU cache of open per-user databases.
+
+    Databases are leased with acquire()/release() (or checkout()). A leased database is
+    never closed; when more than `max_open` are open, or one has been idle for
+    `idle_seconds`, the least recently used idle ones are closed. Databases are opened
+    outside the cache's lock, so one slow open (say, a migration waiting on a locked file)
+    only holds up requests for that key.
+    """
+
+    def __init__(
+        self, opener: Callable[[Hashable], Database], max_open: int = 32, idle_seconds: float = 300.0
+    ) -> None:
+        """
+        Args:
+            opener (Callable[[Hashable], Database]): Opens the database for a key.
+            max_open (int): Number of idle databases to keep open.
+            idle_seconds (float): Close databases that have not been used for this long.
+        """
+        self.opener: Callable[[Hashable], Database] = opener
+        self.max_open: int = max_open
+        self.idle_seconds: float = idle_seconds
+        self._open: "OrderedDict[Hashable, Database]" = OrderedDict()
+        self._leases: Dict[Hashable, int] = {}
+        self._last_used: Dict[Hashable, float] = {}
+        # Keys being opened, set when the open finishes (successfully or not)
+        self._opening: Dict[Hashable, threading.Event] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    # -----------------------------------------------------------------------------
+
+    def acquire(self, key: Hashable) -> Database:
+        """
+        Leases the database for a key, opening it if necessary.
+
+        Args:
+            key (Hashable): The shard key (a user id).
+
+        Returns:
+            The open database. It stays open until release() is called for it.
+
+        Raises:
+            Exception: Whatever the opener raised; the next acquire() for the key retries.
+        """
+        while True:
+            with self._lock:
+                database: Optional[Database] = self._open.get(key)
+                if database is not None:
+                    evicted: List[Database] = self._lease(key)
+                    break
+                opened: Optional[threading.Event] = self._opening.get(key)
+                if opened is None:
+                    opened = self._opening[key] = threading.Event()
+                    opening_here = True
+                else:
+                    opening_here = False
+
+            if not opening_here:
+                # Another thread is opening this key; use its result or retry if it failed
+                opened.wait()
+                continue
+
+            try:
+                database = self.opener(key)
+            except BaseException:
+                with self._lock:
+                    del self._opening[key]
+                opened.set()
+                raise
+
+            with self._lock:
+                del self._opening[key]
+                self._open[key] = database
+                evicted = self._lease(key)
+            opened.set()
+            break
+
+        for old in evicted:
+            old.close()
+        return database
+
+    # -----------------------------------------------------------------------------
+
+    def _lease(self, key: Hashable) -> List[Database]:
+        """
+        Leases an open database and evicts any now in excess. Must be called with the lock
+        held; the caller closes the returned databases.
+        """
+        self._open.move_to_end(key)
+        self._leases[key] = self._leases.get(key, 0) + 1
+        self._last_used[key] = time.monotonic()
+        return self._evict()
+
+    # -----------------------------------------------------------------------------
+
+    def release(self, key: Hashable) -> None:
+        """
+        Returns a database leased with acquire().
+        """
+        with self._lock:
+            self._leases[key] -= 1
+            if not self._leases[key]:
+                del self._leases[key]
+            # Keep the order in step with _last_used, which _evict() relies on to stop early
+            self._open.move_to_end(key)
+            self._last_used[key] = time.monotonic()
+            evicted: List[Database] = self._evict()
+
+        for old in evicted:
+            old.close()
+
+    # -----------------------------------------------------------------------------
+
+    @contextmanager
+    def checkout(self, key: Hashable) -> Iterator[Database]:
+        """
+        Leases the database for a key for the duration of the `with` block.
+        """
+        database: Database = self.acquire(key)
+        try:
+            yield database
+        finally:
+            self.release(key)
+
+    # -----------------------------------------------------------------------------
+
+    def _evict(self) -> List[Database]:
+        """
+        Removes idle databases beyond max_open or past idle_seconds, least recently used
+        first. Must be called with the lock held; the caller closes the returned databases.
+        """
+        now: float = time.monotonic()
+        idle: List[Hashable] = [key for key in self._open if key not in self._leases]
+        excess: int = len(self._open) - self.max_open
+        evicted: List[Database] = []
+
+        for key in idle:
+            if excess <= 0 and now - self._last_used[key] < self.idle_seconds:
+                break
+            evicted.append(self._open.pop(key))
+            del self._last_used[key]
+            excess -= 1
+
+        return evicted
+
+    # -----------------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._open)
+
+    # -----------------------------------------------------------------------------
+
+    def close(self) -> None:
+        """
+        Closes every open database. Leased ones finish their checked-out connections first.
+        """
+        with self._lock:
+            databases: List[Database] = list(self._open.values())
+            self._open.clear()
+            self._last_used.clear()
+
+        for database in databases:
+            database.close()
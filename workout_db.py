@@ -5,9 +5,1295 @@ Provides the Database class to handle all database operations such as creating t
 logging workouts, updating entries, and retrieving historical data.
 """
 
+import os
+import queue
 import sqlite3
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from backups import BACKUP_PAGES, BACKUP_PAUSE, copy_database, restore_database, verify_snapshot
+from planner import CYCLE_INCREMENTS, PlannedSet, plan_cycle
+from records import PersonalRecord, best_e1rm, epley
+
+MAIN_LIFTS: Tuple[str, str, str, str] = ("Squat", "Bench Press", "Deadlift", "Press")
+
+# Legacy sets with a missing or blank exercise name are kept under this exercise by
+# _migration_exercise_ids()
+UNNAMED_EXERCISE: str = "Unknown exercise"
+
+# A set to be logged: (date, exercise, weight, reps, workout_duration)
+WorkoutRow = Tuple[Any, str, float, str, Optional[int]]
+
+# A set to be imported: a WorkoutRow followed by the exercise's body part (or None)
+ImportRow = Tuple[Any, str, float, str, Optional[int], Optional[str]]
+
+# Column layouts used by the iter_* export methods
+WORKOUT_HISTORY_COLUMNS: Tuple[str, ...] = ("id", "date", "exercise", "weight", "reps", "workout_duration")
+TRAINING_MAX_HISTORY_COLUMNS: Tuple[str, ...] = ("date", "exercise", "one_rm", "training_max")
+
+# Most queued writes the group-commit writer applies in one transaction
+GROUP_COMMIT_MAX_BATCH: int = 64
+
+# search_exercises() ranks matches by sets logged, discounted by half every this many days
+# since the exercise was last done
+SEARCH_HALF_LIFE_DAYS: float = 28.0
+
+# archive_history() moves sets older than this many weeks out of workout_sets, this many
+# sets per transaction
+ARCHIVE_AFTER_WEEKS: int = 26
+ARCHIVE_BATCH: int = 5000
+
+# workout_history.day counts days since this date; 1970-01-01 was a Thursday
+EPOCH: date = date(1970, 1, 1)
+
+
+def day_number(value: Any) -> Optional[int]:
+    """
+    Converts a date, or a string starting with an ISO date, to workout_history.day.
+
+    Returns:
+        The number of days since EPOCH, or None if the value is not a date.
+    """
+    try:
+        return (date.fromisoformat(str(value)[:10]) - EPOCH).days
+    except ValueError:
+        return None
+
+
+def day_to_iso(day: int) -> str:
+    """Converts a workout_history.day number back to an ISO date (YYYY-MM-DD)."""
+    return (EPOCH + timedelta(days=day)).isoformat()
+
+
+def week_start(day: int) -> int:
+    """Returns the day number of the Monday of a day's week (day 0 was a Thursday)."""
+    return day - (day + 3) % 7
+
+
+def parse_reps(reps: Any) -> Tuple[Optional[int], bool]:
+    """
+    Parses logged reps into (reps_count, amrap). Reps are free-form text: a trailing '+'
+    marks an AMRAP set ("8+" is 8 reps on a "5+" set), and anything that is not a whole
+    number leaves reps_count as None. Mirrors the backfill in _migration_typed_columns().
+
+    Args:
+        reps (Any): The reps as logged.
+
+    Returns:
+        The reps as an integer (or None) and whether the set was AMRAP.
+    """
+    text: str = str(reps).strip(" ")
+    digits: str = text.rstrip("+")
+    count: Optional[int] = int(digits) if digits.isascii() and digits.isdigit() else None
+    return count, text.endswith("+")
+
+
+class ExerciseMatch(NamedTuple):
+    """An exercise returned by Database.search_exercises()."""
+
+    exercise: str
+    body_part: Optional[str]
+    sets: int
+    last_date: Optional[str]
+
+
+class SessionPage(NamedTuple):
+    """
+    Training sessions returned by Database.get_accessory_sessions().
+
+    Attributes:
+        sessions: (date, sets) per session, newest first; each set is a row of (id, date,
+            exercise, weight, reps, workout_duration), in logging order.
+        next_cursor: The date of the last session if older sessions exist; otherwise None.
+    """
+
+    sessions: List[Tuple[str, List[Tuple[Any, ...]]]]
+    next_cursor: Optional[str]
+
+
+class HistoryPage(NamedTuple):
+    """
+    One page of workout history returned by keyset pagination.
+
+    Attributes:
+        records: Rows of (id, date, exercise, weight, reps, workout_duration), newest first.
+        next_cursor: (date, id) of the last row if older rows exist; otherwise None.
+        prev_cursor: (date, id) of the first row if newer rows exist; otherwise None.
+    """
+
+    records: List[Tuple[Any, ...]]
+    next_cursor: Optional[Tuple[str, int]]
+    prev_cursor: Optional[Tuple[str, int]]
+
+
+def _migration_base_tables(c: sqlite3.Cursor) -> None:
+    """Creates the original tables for training maxes, workout history and exercises."""
+    c.execute(
+        """CREATE TABLE IF NOT EXISTS training_maxes (
+               exercise TEXT PRIMARY KEY, 
+               one_rm REAL, 
+               training_max REAL
+           )"""
+    )
+
+    c.execute(
+        """CREATE TABLE IF NOT EXISTS training_maxes_history (
+               date TEXT, 
+               exercise TEXT, 
+               one_rm REAL, 
+               training_max REAL
+           )"""
+    )
+
+    c.execute(
+        """CREATE TABLE IF NOT EXISTS workout_history (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               date TEXT, 
+               exercise TEXT, 
+               weight REAL, 
+               reps TEXT,
+               workout_duration INTEGER
+           )"""
+    )
+
+    c.execute(
+        """CREATE TABLE IF NOT EXISTS exercises (
+               exercise TEXT PRIMARY KEY, 
+               body_part TEXT
+           )"""
+    )
+
+
+def _migration_workout_duration(c: sqlite3.Cursor) -> None:
+    """Adds workout_duration to databases created before the column existed."""
+    c.execute("""PRAGMA table_info(workout_history)""")
+    columns: List[str] = [row[1] for row in c.fetchall()]
+
+    if "workout_duration" not in columns:
+        c.execute("""ALTER TABLE workout_history ADD COLUMN workout_duration INTEGER""")
+
+
+def _migration_history_indexes(c: sqlite3.Cursor) -> None:
+    """Adds indexes for the per-exercise, per-date and DISTINCT history queries."""
+    c.execute(
+        """CREATE INDEX IF NOT EXISTS idx_workout_history_exercise_date
+           ON workout_history (exercise, date)"""
+    )
+
+    c.execute(
+        """CREATE INDEX IF NOT EXISTS idx_workout_history_date_id
+           ON workout_history (date, id)"""
+    )
+
+    c.execute(
+        """CREATE INDEX IF NOT EXISTS idx_training_maxes_history_date
+           ON training_maxes_history (date)"""
+    )
+
+
+def _rebuild_daily_best(c: sqlite3.Cursor) -> None:
+    """Recomputes exercise_daily_best from scratch: the heaviest set per exercise and day."""
+    c.execute("""DELETE FROM exercise_daily_best""")
+    c.execute(
+        """INSERT INTO exercise_daily_best (exercise, date, weight, reps)
+            SELECT exercise, date, weight, reps_count FROM (
+                SELECT exercise, date, weight, reps_count,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY exercise, date ORDER BY weight DESC, id
+                       ) AS rank
+                FROM workout_history
+                WHERE reps_count IS NOT NULL
+            )
+            WHERE rank = 1"""
+    )
+
+
+def _refresh_daily_best(c: sqlite3.Cursor, keys: Iterable[Tuple[str, str]]) -> None:
+    """Recomputes the exercise_daily_best rows for the given (exercise, date) pairs."""
+    keys = list(set(keys))
+
+    c.executemany(
+        """DELETE FROM exercise_daily_best WHERE exercise = ? AND date = ?""", keys
+    )
+    # The day narrows the archived sets' (exercise_id, day) index to the one day
+    c.executemany(
+        """INSERT INTO exercise_daily_best (exercise, date, weight, reps)
+            SELECT exercise, date, weight, reps_count
+            FROM workout_history
+            WHERE exercise = ? AND date = ? AND day IS ? AND reps_count IS NOT NULL
+            ORDER BY weight DESC, id
+            LIMIT 1""",
+        [(exercise, date_value, day_number(date_value)) for exercise, date_value in keys],
+    )
+
+
+def _migration_daily_best(c: sqlite3.Cursor) -> None:
+    """
+    Adds the materialized per-exercise daily-best table used by the progress graph. It is
+    filled by _migration_typed_columns(), once reps_count exists.
+    """
+    c.execute(
+        """CREATE TABLE IF NOT EXISTS exercise_daily_best (
+               exercise TEXT,
+               date TEXT,
+               weight REAL,
+               reps INTEGER,
+               PRIMARY KEY (exercise, date)
+           ) WITHOUT ROWID"""
+    )
+
+
+# A set that can hold a rep record: (exercise, reps, weight, date)
+RecordRow = Tuple[str, int, float, str]
+
+# Keeps the heavier set per (exercise, reps); on a tie the earlier set keeps the record.
+_RECORD_UPSERT = """INSERT INTO exercise_records (exercise, reps, weight, date) VALUES (?, ?, ?, ?)
+    ON CONFLICT (exercise, reps) DO UPDATE
+    SET weight = excluded.weight, date = excluded.date
+    WHERE excluded.weight > exercise_records.weight
+       OR (excluded.weight = exercise_records.weight AND excluded.date < exercise_records.date)"""
+
+
+def _record_row(row: Tuple[Any, ...]) -> Optional[RecordRow]:
+    """
+    Returns the exercise_records candidate for a (date, exercise, weight, reps, ...) set, or
+    None if the set cannot hold a record (no whole, positive number of reps, or no weight).
+    """
+    reps: Optional[int] = parse_reps(row[3])[0]
+    if not reps or not row[2] or row[2] <= 0:
+        return None
+    # str() matches how sqlite3 stores date objects (ISO format)
+    return row[1], reps, float(row[2]), str(row[0])
+
+
+def _rebuild_records(c: sqlite3.Cursor) -> None:
+    """Recomputes exercise_records from scratch: the heaviest set per exercise and rep count."""
+    c.execute("""DELETE FROM exercise_records""")
+    c.execute(
+        """INSERT INTO exercise_records (exercise, reps, weight, date)
+            SELECT exercise, reps_count, weight, date FROM (
+                SELECT exercise, reps_count, weight, date,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY exercise, reps_count ORDER BY weight DESC, date, id
+                       ) AS rank
+                FROM workout_history
+                WHERE reps_count > 0 AND weight > 0
+            )
+            WHERE rank = 1"""
+    )
+
+
+def _refresh_records(c: sqlite3.Cursor, keys: Iterable[Tuple[str, int]]) -> None:
+    """Recomputes the exercise_records rows for the given (exercise, reps) pairs."""
+    keys = list(set(keys))
+
+    c.executemany(
+        """DELETE FROM exercise_records WHERE exercise = ? AND reps = ?""", keys
+    )
+    c.executemany(
+        """INSERT INTO exercise_records (exercise, reps, weight, date)
+            SELECT exercise, reps_count, weight, date
+            FROM workout_history
+            WHERE exercise = ? AND reps_count = ? AND weight > 0
+            ORDER BY weight DESC, date, id
+            LIMIT 1""",
+        keys,
+    )
+
+
+def _release_record(c: sqlite3.Cursor, old: Optional[RecordRow]) -> None:
+    """
+    Recomputes the record for a set that was edited or deleted, but only if that set held
+    it; otherwise the record is unaffected.
+    """
+    if old is None:
+        return
+    c.execute(
+        """SELECT 1 FROM exercise_records
+           WHERE exercise = ? AND reps = ? AND weight = ? AND date = ?""",
+        old,
+    )
+    if c.fetchone() is not None:
+        _refresh_records(c, [old[:2]])
+
+
+def _migration_records(c: sqlite3.Cursor) -> None:
+    """
+    Adds the per-exercise rep records table used for PRs and estimated 1RMs. It is filled
+    by _migration_typed_columns(), once reps_count exists.
+    """
+    c.execute(
+        """CREATE TABLE IF NOT EXISTS exercise_records (
+               exercise TEXT,
+               reps INTEGER,
+               weight REAL,
+               date TEXT,
+               PRIMARY KEY (exercise, reps)
+           ) WITHOUT ROWID"""
+    )
+
+
+# Inserts a set into workout_sets; see _typed_row()
+_INSERT_WORKOUT = """INSERT INTO workout_sets
+    (date, exercise_id, weight, reps, workout_duration, day, reps_count, amrap)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)"""
+
+
+def _typed_row(row: Tuple[Any, ...], exercise_ids: Dict[str, int]) -> Tuple[Any, ...]:
+    """
+    Converts a (date, exercise, weight, reps, workout_duration, ...) set into the
+    _INSERT_WORKOUT parameters, resolving the exercise through `exercise_ids`.
+    """
+    reps_count, amrap = parse_reps(row[3])
+    return (row[0], exercise_ids[row[1]], *row[2:5], day_number(row[0]), reps_count, int(amrap))
+
+
+def _exercise_ids(c: sqlite3.Cursor, names: Iterable[str]) -> Dict[str, int]:
+    """Returns the exercises.id of each name, registering (without a body part) any new ones."""
+    params: List[Tuple[str]] = [(name,) for name in set(names)]
+    c.executemany(
+        """INSERT INTO exercises (exercise) VALUES (?) ON CONFLICT (exercise) DO NOTHING""",
+        params,
+    )
+
+    ids: Dict[str, int] = {}
+    for (name,) in params:
+        c.execute("""SELECT id FROM exercises WHERE exercise = ?""", (name,))
+        ids[name] = c.fetchone()[0]
+    return ids
+
+
+def _migration_typed_columns(c: sqlite3.Cursor) -> None:
+    """
+    Adds typed copies of the free-form columns to workout_history and backfills them:
+    day (days since EPOCH), reps_count (whole reps, or NULL) and amrap. reps and date are
+    kept as logged, so existing reads are unchanged.
+
+    amrap is set only where the reps carry a trailing "+". Before this version AMRAP sets
+    were logged as plain numbers, and they cannot be told apart from the sets around them
+    (a day can hold supplemental sets or two sessions of the same lift), so they keep
+    amrap = 0.
+    """
+    c.execute("""PRAGMA table_info(workout_history)""")
+    columns: List[str] = [row[1] for row in c.fetchall()]
+
+    if "day" not in columns:
+        c.execute("""ALTER TABLE workout_history ADD COLUMN day INTEGER""")
+    if "reps_count" not in columns:
+        c.execute("""ALTER TABLE workout_history ADD COLUMN reps_count INTEGER""")
+    if "amrap" not in columns:
+        c.execute("""ALTER TABLE workout_history ADD COLUMN amrap INTEGER NOT NULL DEFAULT 0""")
+
+    # 2440587.5 is the Julian day of EPOCH at midnight
+    c.execute(
+        """UPDATE workout_history SET
+               day = CAST(julianday(substr(date, 1, 10)) - 2440587.5 AS INTEGER),
+               reps_count = CASE
+                   WHEN rtrim(trim(reps), '+') GLOB '[0-9]*'
+                        AND rtrim(trim(reps), '+') NOT GLOB '*[^0-9]*'
+                   THEN CAST(rtrim(trim(reps), '+') AS INTEGER)
+               END,
+               amrap = trim(reps) GLOB '*+'"""
+    )
+
+    c.execute(
+        """CREATE INDEX IF NOT EXISTS idx_workout_history_day
+           ON workout_history (day)"""
+    )
+    c.execute(
+        """CREATE INDEX IF NOT EXISTS idx_workout_history_exercise_day
+           ON workout_history (exercise, day)"""
+    )
+
+    _rebuild_daily_best(c)
+    _rebuild_records(c)
+
+
+def _migration_exercise_ids(c: sqlite3.Cursor) -> None:
+    """
+    Normalizes exercise names into the exercises dimension table. exercises gets an
+    integer id and a row for every exercise in the history (main lifts with no body part).
+    The sets move to workout_sets, which references exercises by id instead of repeating
+    the name. workout_history becomes a view with the original columns, so reads keep
+    working unchanged, while writes go to workout_sets.
+
+    Sets with a missing or blank exercise name are kept under UNNAMED_EXERCISE (and the
+    count is printed), and exercises rows without a name are dropped.
+
+    Raises:
+        sqlite3.IntegrityError: If any set could not be copied; the migration rolls back.
+    """
+    c.execute("""SELECT type FROM sqlite_master WHERE name = 'workout_history'""")
+    if c.fetchone()[0] == "view":
+        return
+
+    c.execute("""SELECT COUNT(*) FROM workout_history""")
+    total_sets: int = c.fetchone()[0]
+    c.execute("""SELECT COUNT(*) FROM workout_history WHERE trim(coalesce(exercise, '')) = ''""")
+    unnamed_sets: int = c.fetchone()[0]
+
+    c.execute(
+        """CREATE TABLE exercises_v2 (
+               id INTEGER PRIMARY KEY,
+               exercise TEXT NOT NULL UNIQUE,
+               body_part TEXT
+           )"""
+    )
+    c.execute(
+        """INSERT INTO exercises_v2 (exercise, body_part)
+           SELECT exercise, body_part FROM exercises WHERE trim(coalesce(exercise, '')) != ''
+           ORDER BY exercise
+           ON CONFLICT (exercise) DO NOTHING"""
+    )
+    c.execute(
+        """INSERT INTO exercises_v2 (exercise)
+           SELECT DISTINCT exercise FROM workout_history WHERE trim(coalesce(exercise, '')) != ''
+           ORDER BY exercise
+           ON CONFLICT (exercise) DO NOTHING"""
+    )
+    if unnamed_sets:
+        c.execute(
+            """INSERT INTO exercises_v2 (exercise) VALUES (?) ON CONFLICT (exercise) DO NOTHING""",
+            (UNNAMED_EXERCISE,),
+        )
+    c.execute("""DROP TABLE exercises""")
+    c.execute("""ALTER TABLE exercises_v2 RENAME TO exercises""")
+
+    c.execute(
+        """CREATE TABLE workout_sets (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               date TEXT,
+               exercise_id INTEGER NOT NULL REFERENCES exercises (id),
+               weight REAL,
+               reps TEXT,
+               workout_duration INTEGER,
+               day INTEGER,
+               reps_count INTEGER,
+               amrap INTEGER NOT NULL DEFAULT 0
+           )"""
+    )
+    c.execute(
+        """INSERT INTO workout_sets
+               (id, date, exercise_id, weight, reps, workout_duration, day, reps_count, amrap)
+           SELECT wh.id, wh.date, ex.id, wh.weight, wh.reps, wh.workout_duration,
+                  wh.day, wh.reps_count, wh.amrap
+           FROM workout_history wh
+           JOIN exercises ex ON ex.exercise = CASE
+               WHEN trim(coalesce(wh.exercise, '')) = '' THEN ? ELSE wh.exercise
+           END
+           ORDER BY wh.id""",
+        (UNNAMED_EXERCISE,),
+    )
+    c.execute("""SELECT COUNT(*) FROM workout_sets""")
+    copied_sets: int = c.fetchone()[0]
+    if copied_sets != total_sets:
+        raise sqlite3.IntegrityError(
+            f"Only {copied_sets} of {total_sets} sets could be mapped to an exercise id"
+        )
+    if unnamed_sets:
+        print(f"Kept {unnamed_sets} sets with no exercise name under '{UNNAMED_EXERCISE}'")
+
+    # Carry the AUTOINCREMENT high-water mark over so ids of deleted sets are not reused
+    c.execute("""DELETE FROM sqlite_sequence WHERE name = 'workout_sets'""")
+    c.execute(
+        """INSERT INTO sqlite_sequence (name, seq)
+           SELECT 'workout_sets', seq FROM sqlite_sequence WHERE name = 'workout_history'"""
+    )
+    c.execute("""DROP TABLE workout_history""")
+
+    c.execute(
+        """CREATE INDEX idx_workout_sets_exercise_date
+           ON workout_sets (exercise_id, date)"""
+    )
+    c.execute(
+        """CREATE INDEX idx_workout_sets_date_id
+           ON workout_sets (date, id)"""
+    )
+    c.execute(
+        """CREATE INDEX idx_workout_sets_day
+           ON workout_sets (day)"""
+    )
+    c.execute(
+        """CREATE INDEX idx_workout_sets_exercise_day
+           ON workout_sets (exercise_id, day)"""
+    )
+
+    c.execute(
+        """CREATE VIEW workout_history AS
+           SELECT ws.id, ws.date, ex.exercise, ws.weight, ws.reps, ws.workout_duration,
+                  ws.day, ws.reps_count, ws.amrap
+           FROM workout_sets ws
+           JOIN exercises ex ON ex.id = ws.exercise_id"""
+    )
+
+
+def _replan(c: sqlite3.Cursor, exercise: str, training_max: float) -> None:
+    """Replaces an exercise's rows in cycle_plan with a cycle planned from its training max."""
+    c.execute("""DELETE FROM cycle_plan WHERE exercise = ?""", (exercise,))
+    c.executemany(
+        """INSERT INTO cycle_plan
+               (exercise, week, kind, set_number, percentage, weight, reps, plates, training_max)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        plan_cycle(exercise, training_max),
+    )
+
+
+def _rebuild_cycle_plan(c: sqlite3.Cursor) -> None:
+    """Recomputes cycle_plan from scratch for every exercise with a training max."""
+    c.execute("""DELETE FROM cycle_plan""")
+    c.execute("""SELECT exercise, training_max FROM training_maxes WHERE training_max IS NOT NULL""")
+    for exercise, training_max in c.fetchall():
+        _replan(c, exercise, training_max)
+
+
+def _migration_cycle_plan(c: sqlite3.Cursor) -> None:
+    """
+    Adds the precomputed cycle plan (see planner.plan_cycle()) and plans a cycle for every
+    current training max.
+    """
+    c.execute(
+        """CREATE TABLE IF NOT EXISTS cycle_plan (
+               exercise TEXT,
+               week INTEGER,
+               kind TEXT,
+               set_number INTEGER,
+               percentage REAL,
+               weight REAL,
+               reps TEXT,
+               plates TEXT,
+               training_max REAL,
+               PRIMARY KEY (exercise, week, kind, set_number)
+           ) WITHOUT ROWID"""
+    )
+    _rebuild_cycle_plan(c)
+
+
+def _migration_training_max_day(c: sqlite3.Cursor) -> None:
+    """
+    Adds a typed day column (days since EPOCH) to training_maxes_history, backfilled from
+    the TEXT date, and indexes it per exercise for the training max timeline.
+    """
+    c.execute("""PRAGMA table_info(training_maxes_history)""")
+    if "day" not in [row[1] for row in c.fetchall()]:
+        c.execute("""ALTER TABLE training_maxes_history ADD COLUMN day INTEGER""")
+
+    # 2440587.5 is the Julian day of EPOCH at midnight
+    c.execute(
+        """UPDATE training_maxes_history
+           SET day = CAST(julianday(substr(date, 1, 10)) - 2440587.5 AS INTEGER)"""
+    )
+    c.execute(
+        """CREATE INDEX IF NOT EXISTS idx_training_maxes_history_exercise_day
+           ON training_maxes_history (exercise, day)"""
+    )
+
+
+# Moves one set from workout_sets to workout_sets_archive, or back; see _move_sets()
+_ARCHIVE_COLUMNS = "id, date, exercise_id, weight, reps, workout_duration, day, reps_count, amrap"
+
+
+def _move_sets(c: sqlite3.Cursor, source: str, dest: str, ids: List[Tuple[int]]) -> None:
+    """Moves the sets with the given ids between workout_sets and workout_sets_archive."""
+    c.executemany(
+        f"""INSERT INTO {dest} ({_ARCHIVE_COLUMNS}) SELECT {_ARCHIVE_COLUMNS} FROM {source} WHERE id = ?""",
+        ids,
+    )
+    c.executemany(f"""DELETE FROM {source} WHERE id = ?""", ids)
+
+
+def _refresh_rollups(c: sqlite3.Cursor, keys: Iterable[Tuple[int, int]]) -> None:
+    """
+    Recomputes the workout_weekly_rollup rows for the given (exercise_id, week_day) pairs
+    from the archived sets of that exercise and week.
+    """
+    keys = list(set(keys))
+
+    c.executemany(
+        """DELETE FROM workout_weekly_rollup WHERE exercise_id = ? AND week_day = ?""", keys
+    )
+    c.executemany(
+        """INSERT INTO workout_weekly_rollup (exercise_id, week_day, sets, reps, tonnage, top_weight)
+            SELECT exercise_id, ?2, COUNT(*), SUM(reps_count), SUM(weight * reps_count), MAX(weight)
+            FROM workout_sets_archive
+            WHERE exercise_id = ?1 AND day BETWEEN ?2 AND ?2 + 6
+            GROUP BY exercise_id""",
+        keys,
+    )
+
+
+def _unarchive(c: sqlite3.Cursor, record_id: int) -> None:
+    """Moves an archived set back to workout_sets, so it can be edited or deleted there."""
+    c.execute(
+        """SELECT exercise_id, day FROM workout_sets_archive WHERE id = ?""", (record_id,)
+    )
+    row: Optional[Tuple[int, int]] = c.fetchone()
+    if row is None:
+        return
+
+    _move_sets(c, "workout_sets_archive", "workout_sets", [(record_id,)])
+    _refresh_rollups(c, [(row[0], week_start(row[1]))])
+
+
+def _migration_archive(c: sqlite3.Cursor) -> None:
+    """
+    Adds cold storage for old sets (see Database.archive_history()). workout_sets_archive
+    holds archived sets with their original ids and fewer indexes than workout_sets, and
+    workout_weekly_rollup summarizes them per exercise and Monday-to-Sunday week.
+    workout_history becomes the union of the hot and archived sets, so reads through it
+    see every set wherever it is stored.
+    """
+    c.execute(
+        """CREATE TABLE IF NOT EXISTS workout_sets_archive (
+               id INTEGER PRIMARY KEY,
+               date TEXT,
+               exercise_id INTEGER NOT NULL REFERENCES exercises (id),
+               weight REAL,
+               reps TEXT,
+               workout_duration INTEGER,
+               day INTEGER,
+               reps_count INTEGER,
+               amrap INTEGER NOT NULL DEFAULT 0
+           )"""
+    )
+    c.execute(
+        """CREATE INDEX IF NOT EXISTS idx_workout_sets_archive_date_id
+           ON workout_sets_archive (date, id)"""
+    )
+    c.execute(
+        """CREATE INDEX IF NOT EXISTS idx_workout_sets_archive_day
+           ON workout_sets_archive (day)"""
+    )
+    c.execute(
+        """CREATE INDEX IF NOT EXISTS idx_workout_sets_archive_exercise_day
+           ON workout_sets_archive (exercise_id, day)"""
+    )
+
+    c.execute(
+        """CREATE TABLE IF NOT EXISTS workout_weekly_rollup (
+               exercise_id INTEGER NOT NULL REFERENCES exercises (id),
+               week_day INTEGER,
+               sets INTEGER,
+               reps INTEGER,
+               tonnage REAL,
+               top_weight REAL,
+               PRIMARY KEY (exercise_id, week_day)
+           ) WITHOUT ROWID"""
+    )
+    c.execute(
+        """CREATE INDEX IF NOT EXISTS idx_workout_weekly_rollup_week
+           ON workout_weekly_rollup (week_day)"""
+    )
+
+    c.execute("""DROP VIEW IF EXISTS workout_history""")
+    c.execute(
+        """CREATE VIEW workout_history AS
+           SELECT ws.id, ws.date, ex.exercise, ws.weight, ws.reps, ws.workout_duration,
+                  ws.day, ws.reps_count, ws.amrap
+           FROM workout_sets ws
+           JOIN exercises ex ON ex.id = ws.exercise_id
+           UNION ALL
+           SELECT wa.id, wa.date, ex.exercise, wa.weight, wa.reps, wa.workout_duration,
+                  wa.day, wa.reps_count, wa.amrap
+           FROM workout_sets_archive wa
+           JOIN exercises ex ON ex.id = wa.exercise_id"""
+    )
+
+
+def _count_usage(c: sqlite3.Cursor, rows: Iterable[Tuple[Any, ...]], exercise_ids: Dict[str, int]) -> None:
+    """
+    Adds newly logged (date, exercise, ...) sets to the set_count and last_day of their
+    exercises, as used by Database.search_exercises().
+    """
+    usage: Dict[int, List[Any]] = {}
+    for row in rows:
+        entry: List[Any] = usage.setdefault(exercise_ids[row[1]], [0, None])
+        entry[0] += 1
+        day: Optional[int] = day_number(row[0])
+        if day is not None and (entry[1] is None or day > entry[1]):
+            entry[1] = day
+
+    # MAX() is NULL if either side is, so fall back to whichever day is known
+    c.executemany(
+        """UPDATE exercises SET set_count = set_count + ?1,
+               last_day = COALESCE(MAX(last_day, ?2), last_day, ?2)
+           WHERE id = ?3""",
+        [(count, day, exercise_id) for exercise_id, (count, day) in usage.items()],
+    )
+
+
+def _refresh_usage(c: sqlite3.Cursor, exercises: Iterable[str]) -> None:
+    """Recomputes set_count and last_day for the given exercises from their hot and archived sets."""
+    c.executemany(
+        """UPDATE exercises SET
+               set_count = (SELECT COUNT(*) FROM workout_history WHERE exercise = ?1),
+               last_day = (SELECT MAX(day) FROM workout_history WHERE exercise = ?1)
+           WHERE exercise = ?1""",
+        [(exercise,) for exercise in set(exercises)],
+    )
+
+
+def _release_usage(c: sqlite3.Cursor, exercise: str, day: Optional[int]) -> None:
+    """
+    Takes a deleted set off its exercise's set_count. last_day is only looked up again if
+    the set was from that day, with a MAX() on each table's (exercise_id, day) index.
+    """
+    c.execute(
+        """UPDATE exercises SET set_count = set_count - 1 WHERE exercise = ?""", (exercise,)
+    )
+    c.execute(
+        """UPDATE exercises SET last_day = (
+               SELECT MAX(day) FROM (
+                   SELECT MAX(day) AS day FROM workout_sets WHERE exercise_id = exercises.id
+                   UNION ALL
+                   SELECT MAX(day) AS day FROM workout_sets_archive WHERE exercise_id = exercises.id
+               )
+           )
+           WHERE exercise = ? AND last_day = ?""",
+        (exercise, day),
+    )
+
+
+def _migration_exercise_usage(c: sqlite3.Cursor) -> None:
+    """
+    Adds each exercise's number of logged sets and last training day, kept up to date as
+    sets are logged and deleted, and a case-insensitive name index for prefix search (see
+    Database.search_exercises()).
+    """
+    c.execute("""PRAGMA table_info(exercises)""")
+    columns: List[str] = [row[1] for row in c.fetchall()]
+
+    if "set_count" not in columns:
+        c.execute("""ALTER TABLE exercises ADD COLUMN set_count INTEGER NOT NULL DEFAULT 0""")
+    if "last_day" not in columns:
+        c.execute("""ALTER TABLE exercises ADD COLUMN last_day INTEGER""")
+
+    c.execute("""SELECT exercise FROM exercises""")
+    _refresh_usage(c, [row[0] for row in c.fetchall()])
+
+    c.execute(
+        """CREATE INDEX IF NOT EXISTS idx_exercises_name_nocase
+           ON exercises (exercise COLLATE NOCASE)"""
+    )
+
+
+def _migration_amrap_from_reps(c: sqlite3.Cursor) -> None:
+    """
+    Makes amrap agree with the reps as logged, which are the source of truth: a set is
+    AMRAP exactly when its reps end in "+". This clears the flags that version 6 guessed for
+    plain-number sets from before "+" was logged, and the flags that correcting an AMRAP
+    set's reps to a plain number used to leave behind.
+    """
+    for table in ("workout_sets", "workout_sets_archive"):
+        c.execute(
+            f"""UPDATE {table} SET amrap = trim(reps) GLOB '*+'
+                WHERE amrap IS NOT (trim(reps) GLOB '*+')"""
+        )
+
+
+# Sets per exercise and week (Monday's day number) between two days, from the hot sets, the
+# archived sets of partly covered weeks and the rollups of fully covered archived weeks; see
+# _weekly_sets_params()
+_WEEKLY_SETS = """
+    SELECT day - (day + 3) % 7 AS week_day, exercise_id, COUNT(*) AS sets
+    FROM workout_sets
+    WHERE day BETWEEN ? AND ?
+    GROUP BY week_day, exercise_id
+    UNION ALL
+    SELECT day - (day + 3) % 7 AS week_day, exercise_id, COUNT(*) AS sets
+    FROM workout_sets_archive
+    WHERE day BETWEEN ? AND ? OR day BETWEEN ? AND ?
+    GROUP BY week_day, exercise_id
+    UNION ALL
+    SELECT week_day, exercise_id, sets
+    FROM workout_weekly_rollup
+    WHERE week_day BETWEEN ? AND ?"""
+
+
+# The accessory sets of the ?6 - 2 most recent sessions (days with accessory work) before ?5,
+# plus the session after them. The recursive CTE seeds with ?5 and steps back one session at
+# a time: each step walks each table's (date, id) index down from the previous session to
+# the next accessory set, so only the sessions returned are read.
+_ACCESSORY_SESSIONS = """
+    WITH RECURSIVE sessions (date) AS (
+        SELECT ?5
+        UNION ALL
+        SELECT (
+            SELECT MAX(date) FROM (
+                SELECT (SELECT date FROM workout_sets
+                        WHERE date < sessions.date
+                          AND exercise_id NOT IN (SELECT id FROM exercises WHERE exercise IN (?1, ?2, ?3, ?4))
+                        ORDER BY date DESC LIMIT 1) AS date
+                UNION ALL
+                SELECT (SELECT date FROM workout_sets_archive
+                        WHERE date < sessions.date
+                          AND exercise_id NOT IN (SELECT id FROM exercises WHERE exercise IN (?1, ?2, ?3, ?4))
+                        ORDER BY date DESC LIMIT 1)
+            )
+        )
+        FROM sessions
+        WHERE sessions.date IS NOT NULL
+        LIMIT ?6
+    )
+    SELECT wh.id, wh.date, wh.exercise, wh.weight, wh.reps, wh.workout_duration
+    FROM sessions
+    JOIN workout_history wh ON wh.date = sessions.date
+    WHERE sessions.date < ?5 AND wh.exercise NOT IN (?1, ?2, ?3, ?4)
+    ORDER BY wh.date DESC, wh.id"""
+
+
+def _weekly_sets_params(start_day: int, end_day: int) -> Tuple[int, ...]:
+    """
+    Returns the _WEEKLY_SETS parameters for a range of days: whole weeks inside the range
+    are read from the rollups, and the days of the partial weeks at either end from the
+    archived sets.
+    """
+    first_week: int = week_start(start_day + 6)
+    last_week: int = week_start(end_day + 1) - 7
+    if first_week > last_week:
+        return (start_day, end_day, start_day, end_day, 1, 0, 1, 0)
+    return (start_day, end_day, start_day, first_week - 1, last_week + 7, end_day, first_week, last_week)
+
+
+# Ordered schema migrations as (version, description, step). Steps must be idempotent and
+# new ones are only ever appended.
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Cursor], None]]] = [
+    (1, "base tables", _migration_base_tables),
+    (2, "workout_history.workout_duration", _migration_workout_duration),
+    (3, "history indexes", _migration_history_indexes),
+    (4, "exercise_daily_best", _migration_daily_best),
+    (5, "exercise_records", _migration_records),
+    (6, "workout_history typed columns", _migration_typed_columns),
+    (7, "exercise ids", _migration_exercise_ids),
+    (8, "cycle_plan", _migration_cycle_plan),
+    (9, "training_maxes_history.day", _migration_training_max_day),
+    (10, "workout history archive", _migration_archive),
+    (11, "exercise usage", _migration_exercise_usage),
+    (12, "amrap from reps", _migration_amrap_from_reps),
+]
+
+# Representative SQL for the hot read paths, checked by Database.check_query_plans().
+HOT_QUERIES: Dict[str, Tuple[str, Tuple[Any, ...]]] = {
+    "get_workout_history_by_exercise": (
+        """SELECT date, exercise, weight, reps, workout_duration FROM workout_history
+           WHERE exercise = ? ORDER BY date""",
+        ("Squat",),
+    ),
+    "get_daily_best": (
+        """SELECT date, weight, reps FROM exercise_daily_best
+           WHERE exercise = ? AND date BETWEEN ? AND ? ORDER BY date""",
+        ("Squat", "0000-00-00", "9999-99-99"),
+    ),
+    "get_records": (
+        """SELECT exercise, reps, weight, date FROM exercise_records
+           WHERE exercise = ? ORDER BY exercise, reps""",
+        ("Squat",),
+    ),
+    "get_all_exercises": (
+        """SELECT exercise FROM exercises ORDER BY exercise""",
+        (),
+    ),
+    "get_past_accessory_exercises": (
+        """SELECT exercise FROM exercises WHERE exercise NOT IN (?, ?, ?, ?) ORDER BY exercise""",
+        MAIN_LIFTS,
+    ),
+    "search_exercises": (
+        """SELECT exercise, body_part, set_count, last_day FROM exercises
+           WHERE exercise LIKE ? ESCAPE '\\' AND exercise NOT IN (?, ?, ?, ?)""",
+        ("Cur%", *MAIN_LIFTS),
+    ),
+    "get_accessory_sessions": (
+        _ACCESSORY_SESSIONS,
+        (*MAIN_LIFTS, "9999-99-99", 7),
+    ),
+    "get_weekly_volume_by_body_part": (
+        f"""SELECT ex.body_part, SUM(weekly.sets) FROM ({_WEEKLY_SETS}) weekly
+            JOIN exercises ex ON ex.id = weekly.exercise_id
+            WHERE ex.body_part IS NOT NULL
+            GROUP BY ex.body_part""",
+        _weekly_sets_params(19723, 19729),
+    ),
+    "get_volume_by_week": (
+        f"""SELECT weekly.week_day, ex.body_part, SUM(weekly.sets) FROM ({_WEEKLY_SETS}) weekly
+            JOIN exercises ex ON ex.id = weekly.exercise_id
+            WHERE ex.body_part IS NOT NULL
+            GROUP BY weekly.week_day, ex.body_part""",
+        _weekly_sets_params(19723, 20088),
+    ),
+    "get_tonnage": (
+        """SELECT day, SUM(tonnage) FROM (
+               SELECT day, SUM(weight * reps_count) AS tonnage FROM workout_sets
+               WHERE day BETWEEN ?1 AND ?2 GROUP BY day
+               UNION ALL
+               SELECT day, SUM(weight * reps_count) AS tonnage FROM workout_sets_archive
+               WHERE day BETWEEN ?1 AND ?2 GROUP BY day
+           )
+           GROUP BY day ORDER BY day""",
+        (19723, 20088),
+    ),
+    "get_tonnage[exercise]": (
+        """SELECT day, SUM(weight * reps_count) FROM workout_history
+           WHERE exercise = ? AND day BETWEEN ? AND ? GROUP BY day ORDER BY day""",
+        ("Squat", 19723, 20088),
+    ),
+    "get_cycle_plan": (
+        """SELECT exercise, week, kind, set_number, percentage, weight, reps, plates, training_max
+           FROM cycle_plan
+           WHERE exercise IN (?, ?, ?, ?) AND kind IN ('main', ?)
+           ORDER BY exercise, week, kind = 'main' DESC, kind, set_number""",
+        (*MAIN_LIFTS, "bbb"),
+    ),
+    "get_cycle_plan[week]": (
+        """SELECT exercise, week, kind, set_number, percentage, weight, reps, plates, training_max
+           FROM cycle_plan
+           WHERE exercise IN (?) AND week = ? AND kind IN ('main', ?)
+           ORDER BY exercise, week, kind = 'main' DESC, kind, set_number""",
+        ("Squat", 1, "bbb"),
+    ),
+    "get_training_max_timeline": (
+        """SELECT exercise, date, one_rm, training_max,
+                  training_max - LAG(training_max) OVER (PARTITION BY exercise ORDER BY day, rowid)
+           FROM training_maxes_history
+           WHERE exercise IN (?, ?, ?, ?)
+           ORDER BY exercise, day, rowid""",
+        MAIN_LIFTS,
+    ),
+    "get_current_training_maxes": (
+        """SELECT exercise, one_rm, training_max FROM training_maxes WHERE exercise IN (?, ?, ?, ?)""",
+        MAIN_LIFTS,
+    ),
+    "get_training_max_history": (
+        """SELECT date, exercise, one_rm, training_max FROM training_maxes_history
+           ORDER BY date DESC""",
+        (),
+    ),
+    "get_workout_history_page": (
+        """SELECT id, date, exercise, weight, reps, workout_duration FROM workout_history
+           WHERE (date, id) < (?, ?) ORDER BY date DESC, id DESC LIMIT ?""",
+        ("2024-01-01", 0, 51),
+    ),
+}
+
+
+def _is_subquery_scan(plan_line: str, plan: List[str]) -> bool:
+    """
+    Returns True for an EXPLAIN QUERY PLAN line that scans a subquery rather than a table,
+    including a view, derived table or CTE that `plan` materializes or runs as a co-routine,
+    or a FROM-less SELECT (a constant row).
+    """
+    if plan_line.startswith(("SCAN (subquery", "SCAN SUBQUERY")) or plan_line == "SCAN CONSTANT ROW":
+        return True
+    name: str = plan_line[len("SCAN "):]
+    return f"MATERIALIZE {name}" in plan or f"CO-ROUTINE {name}" in plan
+
+
+# Called with (sql, seconds, executions) for every statement; see TimedCursor
+QueryListener = Callable[[str, float, int], None]
+
+
+class TimedCursor(sqlite3.Cursor):
+    """
+    A cursor that reports each statement and its execution time to the connection's
+    query listener. Time spent fetching rows is reported against the statement that
+    produced them, with an execution count of zero.
+    """
+
+    _sql: str = ""
+
+    def _report(self, sql: str, start: float, executions: int) -> None:
+        listener: Optional[QueryListener] = getattr(self.connection, "on_query", None)
+        if listener is not None:
+            listener(sql, time.perf_counter() - start, executions)
+
+    def execute(self, sql: str, parameters: Any = ()) -> "TimedCursor":
+        start: float = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._sql = sql
+            self._report(sql, start, 1)
+
+    def executemany(self, sql: str, seq_of_parameters: Iterable[Any]) -> "TimedCursor":
+        start: float = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._sql = sql
+            self._report(sql, start, 1)
+
+    def fetchone(self) -> Any:
+        start: float = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            self._report(self._sql, start, 0)
+
+    def fetchmany(self, size: int = -1) -> List[Any]:
+        start: float = time.perf_counter()
+        try:
+            return super().fetchmany(size if size >= 0 else self.arraysize)
+        finally:
+            self._report(self._sql, start, 0)
+
+    def fetchall(self) -> List[Any]:
+        start: float = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            self._report(self._sql, start, 0)
+
+
+class TimedConnection(sqlite3.Connection):
+    """
+    A connection whose cursors, including those created by execute(), are TimedCursors.
+    """
+
+    on_query: Optional[QueryListener] = None
+
+    def cursor(self, factory: Any = TimedCursor) -> sqlite3.Cursor:
+        return super().cursor(factory)
+
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        return self.cursor().execute(sql, parameters)
+
+
+class ConnectionPool:
+    """
+    A bounded, thread-safe pool of SQLite connections.
+
+    Connections are opened lazily up to `size`, use WAL journaling so readers run in
+    parallel with a writer, and wait on a busy timeout rather than failing with
+    "database is locked". A thread that already holds a connection gets the same one
+    back from nested calls, so a method can call another without exhausting the pool.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        size: int = 8,
+        timeout: float = 30.0,
+        on_query: Optional[QueryListener] = None,
+        synchronous: str = "NORMAL",
+    ) -> None:
+        """
+        Args:
+            path (str): Path to the SQLite database file.
+            size (int): Maximum number of connections checked out at once.
+            timeout (float): Seconds to wait for a free connection or a database lock.
+            on_query (Optional[QueryListener]): Called with (sql, seconds, executions) for
+                every statement. Connections are only instrumented when it is set.
+            synchronous (str): SQLite's synchronous setting. NORMAL may lose the last
+                commits on power loss; FULL syncs the WAL on every commit.
+        """
+        self.path: str = path
+        self.size: int = size
+        self.timeout: float = timeout
+        self.on_query: Optional[QueryListener] = on_query
+        self.synchronous: str = synchronous
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._slots: threading.BoundedSemaphore = threading.BoundedSemaphore(size)
+        self._local: threading.local = threading.local()
+        self._closed: bool = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """Opens and configures a new connection."""
+        # isolation_level=None puts the connection in autocommit mode; Database._write()
+        # manages write transactions explicitly. `timeout` sets SQLite's busy timeout.
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.timeout,
+            isolation_level=None,
+            check_same_thread=False,
+            factory=TimedConnection if self.on_query is not None else sqlite3.Connection,
+        )
+        if self.on_query is not None:
+            conn.on_query = self.on_query
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        Checks out a connection for the duration of the `with` block.
+
+        Raises:
+            sqlite3.OperationalError: If the pool is closed or no connection frees up in time.
+        """
+        held: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if held is not None:
+            yield held
+            return
+
+        if self._closed:
+            raise sqlite3.OperationalError("connection pool is closed")
+        if not self._slots.acquire(timeout=self.timeout):
+            raise sqlite3.OperationalError("timed out waiting for a database connection")
+
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+
+            self._local.conn = conn
+            try:
+                yield conn
+            finally:
+                self._local.conn = None
+                if conn.in_transaction:
+                    conn.rollback()
+                if self._closed:
+                    conn.close()
+                else:
+                    self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def holds_connection(self) -> bool:
+        """Returns True if the current thread has a connection checked out."""
+        return getattr(self._local, "conn", None) is not None
+
+    def close(self) -> None:
+        """Closes all idle connections and any checked-out ones as they are released."""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+# A write queued on a GroupCommitWriter: (future, method, args, kwargs)
+PendingWrite = Tuple[Future, Callable[..., Any], Tuple[Any, ...], Dict[str, Any]]
+
+
+class GroupCommitWriter:
+    """
+    A writer thread that applies queued write methods in shared transactions.
+
+    Callers block in submit() until the transaction holding their write has committed.
+    The thread takes the first pending write, waits up to `window` seconds for more (at
+    most GROUP_COMMIT_MAX_BATCH), and runs them in one transaction with a savepoint around
+    each, so a failing write is rolled back and reported to its caller alone. One commit,
+    and one WAL sync, then covers every write in the group.
+    """
+
+    def __init__(self, database: "Database", window: float) -> None:
+        """
+        Args:
+            database (Database): The database the writes run against.
+            window (float): Seconds to wait for more writes after the first one arrives.
+        """
+        self.database: "Database" = database
+        self.window: float = window
+        self._queue: "queue.Queue[Optional[PendingWrite]]" = queue.Queue()
+        self._lock: threading.Lock = threading.Lock()
+        self._closed: bool = False
+        self._thread: threading.Thread = threading.Thread(
+            target=self._run, name=f"group-commit-{os.path.basename(database.path)}", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Queues fn(*args, **kwargs) and waits until it has been committed.
+
+        Returns:
+            What fn returned.
+
+        Raises:
+            sqlite3.OperationalError: If the writer has been closed.
+            Exception: Whatever fn, or the commit, raised.
+        """
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise sqlite3.OperationalError("database is closed")
+            self._queue.put((future, fn, args, kwargs))
+        return future.result()
+
+    def _run(self) -> None:
+        """Collects and commits groups of writes until close() queues the stop marker."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            batch: List[PendingWrite] = [item]
+            deadline: float = time.monotonic() + self.window
+            stopping: bool = False
+            while len(batch) < GROUP_COMMIT_MAX_BATCH:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._commit(batch)
+            if stopping:
+                return
+
+    def _commit(self, batch: List[PendingWrite]) -> None:
+        """Runs a group of writes in one transaction and acknowledges them once it commits."""
+        outcomes: List[Tuple[Future, Any, Optional[BaseException]]] = []
+
+        try:
+            with self.database._write() as c:
+                for future, fn, args, kwargs in batch:
+                    c.execute("SAVEPOINT group_commit")
+                    try:
+                        outcomes.append((future, fn(*args, **kwargs), None))
+                    except Exception as e:
+                        c.execute("ROLLBACK TO group_commit")
+                        outcomes.append((future, None, e))
+                    c.execute("RELEASE group_commit")
+        except BaseException as e:
+            # The whole group was rolled back; keep the thread alive for later writes
+            for future, _, _, _ in batch:
+                future.set_exception(e)
+            return
+
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def close(self) -> None:
+        """Commits every write queued so far, then stops the thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join()
+
+
+def _group_committed(method: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Runs a Database write method through the group-commit writer, if there is one.
+
+    Calls made inside another transaction (including from the writer thread itself) run
+    directly, joining that transaction.
+    """
+
+    @wraps(method)
+    def wrapper(self: "Database", *args: Any, **kwargs: Any) -> Any:
+        writer: Optional[GroupCommitWriter] = self._writer
+        if writer is None or self.pool.holds_connection():
+            return method(self, *args, **kwargs)
+        return writer.submit(method, self, *args, **kwargs)
+
+    return wrapper
 
 
 class Database:
@@ -15,235 +1301,993 @@ class Database:
     A class to handle database operations for storing and managing workout data.
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        path: str = "workout.db",
+        pool_size: int = 8,
+        on_query: Optional[QueryListener] = None,
+        group_commit: Optional[float] = None,
+        synchronous: Optional[str] = None,
+    ) -> None:
+        """
+        Initialize the Database object with a pool of connections to the SQLite database
+        and create or upgrade the tables if necessary.
+
+        Args:
+            path (str): Path to the SQLite database file.
+            pool_size (int): Maximum number of concurrently open connections.
+            on_query (Optional[QueryListener]): Called with (sql, seconds, executions) for
+                every statement, to record query counts and times.
+            group_commit (Optional[float]): If set, logging, editing and deleting sets and
+                setting training maxes run on a GroupCommitWriter that commits them in
+                groups, waiting this many seconds to gather each group.
+            synchronous (Optional[str]): SQLite's synchronous setting (see ConnectionPool).
+                Defaults to FULL with group commit, so every acknowledged write is on disk,
+                and NORMAL without it.
+        """
+        self.path: str = path
+        if synchronous is None:
+            synchronous = "FULL" if group_commit is not None else "NORMAL"
+        self.pool: ConnectionPool = ConnectionPool(path, size=pool_size, on_query=on_query, synchronous=synchronous)
+        self._writer: Optional[GroupCommitWriter] = None
+        self.create_tables()
+        if group_commit is not None:
+            self._writer = GroupCommitWriter(self, group_commit)
+
+    # -----------------------------------------------------------------------------
+
+    @contextmanager
+    def _read(self) -> Iterator[sqlite3.Cursor]:
+        """
+        Yields a cursor for reading. Connections are in autocommit mode, so each SELECT
+        runs in its own short read transaction and never holds up writers.
+        """
+        with self.pool.connection() as conn:
+            yield conn.cursor()
+
+    # -----------------------------------------------------------------------------
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Cursor]:
+        """
+        Yields a cursor inside a write transaction that is committed on success and rolled
+        back on error. Nested calls on the same thread join the outer transaction.
+
+        A transaction that changes any rows also bumps the data version, so every write
+        method invalidates cached pages (see get_data_version()).
+        """
+        with self.pool.connection() as conn:
+            if conn.in_transaction:
+                yield conn.cursor()
+                return
+
+            # IMMEDIATE takes the write lock up front, so concurrent writers wait on the
+            # busy timeout instead of failing when upgrading a read lock.
+            conn.execute("BEGIN IMMEDIATE")
+            changes_before: int = conn.total_changes
+            try:
+                yield conn.cursor()
+                if conn.total_changes != changes_before:
+                    conn.execute("""UPDATE data_version SET version = version + 1""")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    # -----------------------------------------------------------------------------
+
+    def close(self) -> None:
+        """
+        Commits any queued group-commit writes, then closes every pooled connection.
+        Connections still in use are closed when released.
+        """
+        if self._writer is not None:
+            self._writer.close()
+        self.pool.close()
+
+    # -----------------------------------------------------------------------------
+
+    def backup(self, path: str, pages: int = BACKUP_PAGES, pause: float = BACKUP_PAUSE) -> None:
+        """
+        Writes a consistent snapshot of the live database to `path` and verifies it with
+        PRAGMA integrity_check. The copy proceeds `pages` pages at a time with a pause
+        between steps, so requests keep reading and writing while it runs (see
+        backups.copy_database()).
+
+        Args:
+            path (str): The snapshot file to create (replaced if it exists).
+            pages (int): Pages copied per step.
+            pause (float): Seconds to sleep between steps.
+
+        Raises:
+            sqlite3.DatabaseError: If the snapshot fails the integrity check; it is not kept.
+        """
+        with self.pool.connection() as conn:
+            copy_database(conn, path, pages, pause)
+
+    # -----------------------------------------------------------------------------
+
+    def restore(self, path: str, pages: int = BACKUP_PAGES, pause: float = BACKUP_PAUSE) -> None:
+        """
+        Replaces the database's contents with a snapshot taken by backup(). The snapshot is
+        verified first and copied in through a pooled connection, so the database stays
+        online and other connections and processes see the restored data on their next read.
+
+        Afterwards any migrations newer than the snapshot are applied, and the data version
+        is moved past its value before the restore so no cached page outlives it.
+
+        Args:
+            path (str): The snapshot to restore.
+            pages (int): Pages copied per step.
+            pause (float): Seconds to sleep between steps.
+
+        Raises:
+            sqlite3.DatabaseError: If the snapshot fails the integrity check.
+        """
+        problems: List[str] = verify_snapshot(path)
+        if problems:
+            raise sqlite3.DatabaseError(f"Snapshot {path} failed the integrity check: {'; '.join(problems[:5])}")
+
+        version: int = self.get_data_version()
+        with self.pool.connection() as conn:
+            restore_database(path, conn, pages, pause)
+
+        self.create_tables()
+        with self._write() as c:
+            c.execute("""UPDATE data_version SET version = MAX(version, ?) + 1""", (version,))
+
+    # -----------------------------------------------------------------------------
+
+    def create_tables(self) -> None:
+        """
+        Creates or upgrades the schema by applying any pending migrations.
+
+        Each migration in MIGRATIONS runs in its own transaction and is recorded in the
+        schema_version table, so it is applied exactly once per database file.
+        """
+        with self._write() as c:
+            c.execute(
+                """CREATE TABLE IF NOT EXISTS schema_version (
+                       version INTEGER PRIMARY KEY,
+                       description TEXT,
+                       applied_at TEXT
+                   )"""
+            )
+
+            # Single-row counter bumped by every write transaction; lives in the database
+            # so all worker processes agree on it
+            c.execute(
+                """CREATE TABLE IF NOT EXISTS data_version (
+                       id INTEGER PRIMARY KEY CHECK (id = 0),
+                       version INTEGER NOT NULL
+                   )"""
+            )
+            c.execute("""INSERT OR IGNORE INTO data_version (id, version) VALUES (0, 0)""")
+
+        for version, description, migration in MIGRATIONS:
+            # The write transaction serializes workers that start at the same time; the
+            # version is re-read inside it so only one of them applies each step.
+            with self._write() as c:
+                c.execute("""SELECT 1 FROM schema_version WHERE version = ?""", (version,))
+                if c.fetchone() is None:
+                    migration(c)
+                    c.execute(
+                        """INSERT INTO schema_version (version, description, applied_at)
+                           VALUES (?, ?, ?)""",
+                        (version, description, datetime.now().isoformat(timespec="seconds")),
+                    )
+
+    # -----------------------------------------------------------------------------
+
+    def get_schema_version(self) -> int:
+        """
+        Retrieves the version of the most recently applied migration.
+
+        Returns:
+            The schema version, or 0 if no migrations have been applied.
+        """
+        with self._read() as c:
+            c.execute("""SELECT COALESCE(MAX(version), 0) FROM schema_version""")
+            return c.fetchone()[0]
+
+    # -----------------------------------------------------------------------------
+
+    def get_data_version(self) -> int:
+        """
+        Retrieves the data version, a counter that increases with every committed write.
+        Anything derived from the data can be cached for as long as this stays the same.
+
+        Returns:
+            The current data version.
+        """
+        with self._read() as c:
+            c.execute("""SELECT version FROM data_version WHERE id = 0""")
+            return c.fetchone()[0]
+
+    # -----------------------------------------------------------------------------
+
+    def check_query_plans(self) -> Dict[str, List[str]]:
+        """
+        Runs EXPLAIN QUERY PLAN over the hot read queries and reports any that scan a table
+        without an index.
+
+        Returns:
+            A dictionary mapping the name of each offending query to its plan lines.
+            An empty dictionary means every hot query is served by an index.
+        """
+        with self._read() as c:
+            failures: Dict[str, List[str]] = {}
+
+            for name, (sql, params) in HOT_QUERIES.items():
+                c.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                plan: List[str] = [row[3] for row in c.fetchall()]
+
+                # Scanning a subquery's rows (e.g. the output of a window function, or
+                # of a union of hot and archived sets) reads no table, so only table
+                # scans count
+                if any(
+                    line.startswith("SCAN") and " USING " not in line and not _is_subquery_scan(line, plan)
+                    for line in plan
+                ):
+                    failures[name] = plan
+
+            return failures
+
+    # -----------------------------------------------------------------------------
+
+    @_group_committed
+    def set_training_max(
+        self, exercise: str, one_rm: float, training_max: float, date_value: Any = None
+    ) -> None:
+        """
+        Sets or updates the training max for a given exercise.
+
+        Args:
+            exercise (str): Name of the exercise.
+            one_rm (float): One-repetition maximum.
+            training_max (float): Calculated training max (typically 90% of 1RM).
+            date_value (Any): Date recorded in the history; defaults to today.
+        """
+        with self._write() as c:
+            c.execute(
+                """REPLACE INTO training_maxes (exercise, one_rm, training_max)
+                   VALUES (?, ?, ?)""",
+                (exercise, one_rm, training_max),
+            )
+
+            date_value = date_value or datetime.now().date()
+            c.execute(
+                """INSERT INTO training_maxes_history (date, exercise, one_rm, training_max, day)
+                   VALUES (?, ?, ?, ?, ?)""",
+                (date_value, exercise, one_rm, training_max, day_number(date_value)),
+            )
+
+            _replan(c, exercise, training_max)
+
+    # -----------------------------------------------------------------------------
+
+    @_group_committed
+    def advance_cycle(
+        self, increments: Optional[Dict[str, float]] = None, date_value: Any = None
+    ) -> Dict[str, Tuple[float, float]]:
+        """
+        Starts the next cycle: raises the training max of every lift that has one by its
+        per-cycle increment, records the new maxes in the history and replans the cycle,
+        all in one transaction. One-rep maxes are left as they are.
+
+        Args:
+            increments (Optional[Dict[str, float]]): Training max increase per lift; defaults
+                to planner.CYCLE_INCREMENTS (+5 lb upper body, +10 lb lower body).
+            date_value (Any): Date recorded in the history; defaults to today.
+
+        Returns:
+            The lifts that were advanced, mapped to (old training max, new training max).
+        """
+        increments = increments if increments is not None else CYCLE_INCREMENTS
+        date_value = date_value or datetime.now().date()
+        exercises: List[str] = list(increments)
+        placeholders: str = ", ".join("?" * len(exercises))
+
+        with self._write() as c:
+            c.execute(
+                f"""SELECT exercise, training_max FROM training_maxes
+                    WHERE exercise IN ({placeholders}) AND training_max IS NOT NULL""",
+                exercises,
+            )
+            old: Dict[str, float] = dict(c.fetchall())
+
+            c.executemany(
+                """UPDATE training_maxes SET training_max = training_max + ? WHERE exercise = ?""",
+                [(increments[exercise], exercise) for exercise in old],
+            )
+            c.execute(
+                f"""INSERT INTO training_maxes_history (date, exercise, one_rm, training_max, day)
+                    SELECT ?, exercise, one_rm, training_max, ? FROM training_maxes
+                    WHERE exercise IN ({placeholders}) AND training_max IS NOT NULL""",
+                [date_value, day_number(date_value), *exercises],
+            )
+
+            advanced: Dict[str, Tuple[float, float]] = {}
+            for exercise in exercises:
+                if exercise in old:
+                    advanced[exercise] = (old[exercise], old[exercise] + increments[exercise])
+                    _replan(c, exercise, advanced[exercise][1])
+
+        return advanced
+
+    # -----------------------------------------------------------------------------
+
+    def get_current_training_maxes(self, exercise: Optional[str] = None) -> Dict[str, Tuple[float, float]]:
+        """
+        Retrieves the current one-rep and training maxes.
+
+        Args:
+            exercise (Optional[str]): Restrict to one lift; defaults to all main lifts.
+
+        Returns:
+            A dictionary mapping each lift with a training max to (one_rm, training_max).
+        """
+        exercises: Tuple[str, ...] = (exercise,) if exercise is not None else MAIN_LIFTS
+
+        with self._read() as c:
+            c.execute(
+                f"""SELECT exercise, one_rm, training_max FROM training_maxes
+                    WHERE exercise IN ({", ".join("?" * len(exercises))})""",
+                exercises,
+            )
+            return {row[0]: (row[1], row[2]) for row in c.fetchall()}
+
+    # -----------------------------------------------------------------------------
+
+    def get_training_max_timeline(
+        self,
+        exercise: Optional[str] = None,
+        start_date: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[str, str, float, float, Optional[float]]]:
+        """
+        Retrieves the training max timeline of each lift, oldest first, with the change from
+        the lift's previous entry. Served by the (exercise, day) index.
+
+        Args:
+            exercise (Optional[str]): Restrict to one lift; defaults to all main lifts.
+            start_date (Optional[str]): Earliest date to include, in ISO format (YYYY-MM-DD).
+                Changes are still computed against earlier entries.
+            limit (Optional[int]): Keep only the most recent `limit` entries of each lift.
+
+        Returns:
+            A list of (exercise, date, one_rm, training_max, change) tuples, ordered by
+            exercise and date; change is None for a lift's first entry.
+        """
+        exercises: Tuple[str, ...] = (exercise,) if exercise is not None else MAIN_LIFTS
+        params: List[Any] = list(exercises)
+        conditions: List[str] = []
+
+        if start_date:
+            conditions.append("day >= ?")
+            params.append(day_number(start_date))
+
+        if limit is not None:
+            conditions.append("recency <= ?")
+            params.append(limit)
+
+        where: str = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self._read() as c:
+            c.execute(
+                f"""SELECT exercise, date, one_rm, training_max, change FROM (
+                        SELECT exercise, date, one_rm, training_max, day, rowid AS seq,
+                               training_max - LAG(training_max) OVER (
+                                   PARTITION BY exercise ORDER BY day, rowid
+                               ) AS change,
+                               ROW_NUMBER() OVER (
+                                   PARTITION BY exercise ORDER BY day DESC, rowid DESC
+                               ) AS recency
+                        FROM training_maxes_history
+                        WHERE exercise IN ({", ".join("?" * len(exercises))})
+                    )
+                    {where}
+                    ORDER BY exercise, day, seq""",
+                params,
+            )
+            return c.fetchall()
+
+    # -----------------------------------------------------------------------------
+
+    def get_training_max_history(self) -> List[Tuple[Any, ...]]:
+        """
+        Retrieves the entire training max history for all exercises.
+
+        Returns:
+            A list of tuples containing date, exercise, one_rm, and training_max.
+        """
+        with self._read() as c:
+            c.execute(
+                """SELECT date, exercise, one_rm, training_max 
+                   FROM training_maxes_history 
+                   ORDER BY date DESC"""
+            )
+
+            return c.fetchall()
+
+    # -----------------------------------------------------------------------------
+
+    def iter_training_max_history(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        exercise: Optional[str] = None,
+        batch_size: int = 500,
+    ) -> Iterator[Tuple[Any, ...]]:
+        """
+        Streams the training max history oldest first, fetching `batch_size` rows at a time
+        so memory use does not depend on the size of the history.
+
+        Args:
+            start_date (Optional[str]): Earliest date to include, in ISO format (YYYY-MM-DD).
+            end_date (Optional[str]): Latest date to include, in ISO format (YYYY-MM-DD).
+            exercise (Optional[str]): Restrict the rows to a single exercise.
+            batch_size (int): Number of rows fetched from SQLite per round trip.
+
+        Yields:
+            Tuples of (date, exercise, one_rm, training_max).
+        """
+        yield from self._iter_rows(
+            "training_maxes_history",
+            TRAINING_MAX_HISTORY_COLUMNS,
+            "date",
+            start_date,
+            end_date,
+            exercise,
+            batch_size,
+        )
+
+    # -----------------------------------------------------------------------------
+
+    def get_training_max(self, exercise: str) -> Optional[float]:
+        """
+        Retrieves the current training max for a specific exercise.
+
+        Args:
+            exercise (str): The exercise name.
+
+        Returns:
+            The training max as a float if found; otherwise, None.
+        """
+        with self._read() as c:
+            c.execute(
+                """SELECT training_max FROM training_maxes WHERE exercise=?""", (exercise,)
+            )
+
+            result = c.fetchone()
+            return result[0] if result else None
+
+    # -----------------------------------------------------------------------------
+
+    def log_workout(
+        self, date_value: Any, exercise: str, weight: float, reps: str, workout_duration: Optional[int] = None
+    ) -> Optional[PersonalRecord]:
         """
-        Initialize the Database object by connecting to the SQLite database and
-        creating necessary tables if they do not exist.
+        Logs a workout session for the given exercise, weight, and reps.
+
+        Args:
+            date_value (Any): The date of the workout.
+            exercise (str): The exercise name.
+            weight (float): The weight used.
+            reps (str): The number of repetitions (as a string).
+            workout_duration (Optional[int]): Duration of workout in seconds.
+
+        Returns:
+            The new personal record, if the set is one (see log_workouts()).
         """
-        self.conn: sqlite3.Connection = sqlite3.connect(
-            "workout.db", check_same_thread=False
-        )
-        self.create_tables()
+        records: List[PersonalRecord] = self.log_workouts([(date_value, exercise, weight, reps, workout_duration)])
+        return records[0] if records else None
 
     # -----------------------------------------------------------------------------
 
-    def create_tables(self) -> None:
+    @_group_committed
+    def log_workouts(
+        self, rows: List[WorkoutRow], new_exercises: Optional[Dict[str, str]] = None
+    ) -> List[PersonalRecord]:
         """
-        Creates tables for training maxes, training max history, workout history, and exercises.
+        Logs a batch of sets in a single transaction, so either all of them are saved or none.
+
+        Each set is checked against the exercise's rep records as it is logged. It is a
+        personal record if it beats the best weight previously lifted for the same reps, or
+        if its estimated 1RM beats every earlier set of the exercise. Sets of an exercise
+        with no records before this batch are not reported, since there is nothing to beat.
+
+        Args:
+            rows (List[WorkoutRow]): Sets as (date, exercise, weight, reps, workout_duration).
+            new_exercises (Optional[Dict[str, str]]): Exercises to register in the same
+                transaction, mapping exercise name to primary body part.
+
+        Returns:
+            The personal records set by the batch, in logging order.
         """
-        c = self.conn.cursor()
+        records: List[PersonalRecord] = []
 
-        c.execute(
-            """CREATE TABLE IF NOT EXISTS training_maxes (
-                   exercise TEXT PRIMARY KEY, 
-                   one_rm REAL, 
-                   training_max REAL
-               )"""
-        )
+        with self._write() as c:
+            if new_exercises:
+                c.executemany(
+                    """INSERT INTO exercises (exercise, body_part) VALUES (?, ?)
+                       ON CONFLICT (exercise) DO UPDATE SET body_part = excluded.body_part""",
+                    list(new_exercises.items()),
+                )
 
-        c.execute(
-            """CREATE TABLE IF NOT EXISTS training_maxes_history (
-                   date TEXT, 
-                   exercise TEXT, 
-                   one_rm REAL, 
-                   training_max REAL
-               )"""
-        )
+            ids: Dict[str, int] = _exercise_ids(c, (row[1] for row in rows))
+            c.executemany(_INSERT_WORKOUT, [_typed_row(row, ids) for row in rows])
+            _count_usage(c, rows, ids)
 
-        c.execute(
-            """CREATE TABLE IF NOT EXISTS workout_history (
-                   id INTEGER PRIMARY KEY AUTOINCREMENT,
-                   date TEXT, 
-                   exercise TEXT, 
-                   weight REAL, 
-                   reps TEXT,
-                   workout_duration INTEGER
-               )"""
-        )
+            # str() matches how sqlite3 stores date objects (ISO format)
+            _refresh_daily_best(c, ((row[1], str(row[0])) for row in rows))
 
-        c.execute(
-            """CREATE TABLE IF NOT EXISTS exercises (
-                   exercise TEXT PRIMARY KEY, 
-                   body_part TEXT
-               )"""
-        )
+            candidates: List[RecordRow] = [r for r in map(_record_row, rows) if r is not None]
+            had_records: Dict[str, bool] = {}
 
-        # Add workout_duration column if it doesn't exist (for migration)
-        try:
-            c.execute("ALTER TABLE workout_history ADD COLUMN workout_duration INTEGER")
-        except sqlite3.OperationalError:
-            # Column already exists or other error, ignore
-            pass
+            for candidate in candidates:
+                exercise, reps, weight, _ = candidate
+                c.execute(
+                    """SELECT reps, weight FROM exercise_records WHERE exercise = ?""",
+                    (exercise,),
+                )
+                existing: Dict[int, float] = dict(c.fetchall())
 
-        self.conn.commit()
+                if had_records.setdefault(exercise, bool(existing)):
+                    previous: Optional[float] = existing.get(reps)
+                    previous_best: Optional[float] = best_e1rm(existing.items())
+                    e1rm: float = epley(weight, reps)
+                    e1rm_pr: bool = previous_best is not None and e1rm > previous_best
+
+                    if (previous is not None and weight > previous) or e1rm_pr:
+                        records.append(PersonalRecord(exercise, reps, weight, previous, e1rm, e1rm_pr))
+
+                c.execute(_RECORD_UPSERT, candidate)
+
+        return records
 
     # -----------------------------------------------------------------------------
 
-    def set_training_max(self, exercise: str, one_rm: float, training_max: float) -> None:
+    def import_workouts(self, rows: Iterable[ImportRow], chunk_size: int = 5000) -> int:
         """
-        Sets or updates the training max for a given exercise.
+        Bulk-inserts historical sets, consuming `rows` lazily and committing one
+        executemany transaction per `chunk_size` rows.
+
+        Exercises not yet in the exercises table are registered in the same transaction as
+        their chunk; for exercises other than the main lifts, a body part from the import
+        fills in a missing one but never overwrites an existing one.
 
         Args:
-            exercise (str): Name of the exercise.
-            one_rm (float): One-repetition maximum.
-            training_max (float): Calculated training max (typically 90% of 1RM).
+            rows (Iterable[ImportRow]): Sets as (date, exercise, weight, reps,
+                workout_duration, body_part).
+            chunk_size (int): Number of rows per transaction.
+
+        Returns:
+            The number of rows imported.
         """
-        c = self.conn.cursor()
+        imported: int = 0
+        chunk: List[ImportRow] = []
 
-        c.execute(
-            """REPLACE INTO training_maxes (exercise, one_rm, training_max)
-               VALUES (?, ?, ?)""",
-            (exercise, one_rm, training_max),
-        )
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                self._import_chunk(chunk)
+                imported += len(chunk)
+                chunk = []
 
-        c.execute(
-            """INSERT INTO training_maxes_history (date, exercise, one_rm, training_max)
-               VALUES (?, ?, ?, ?)""",
-            (datetime.now().date(), exercise, one_rm, training_max),
-        )
+        if chunk:
+            self._import_chunk(chunk)
+            imported += len(chunk)
 
-        self.conn.commit()
+        return imported
 
     # -----------------------------------------------------------------------------
 
-    def get_training_max_history(self) -> List[Tuple[Any, ...]]:
+    def _import_chunk(self, chunk: List[ImportRow]) -> None:
+        """Writes one chunk of import_workouts() in a single transaction."""
+        exercises: Dict[str, Optional[str]] = {}
+        for row in chunk:
+            if row[1] not in MAIN_LIFTS and exercises.get(row[1]) is None:
+                exercises[row[1]] = row[5]
+
+        with self._write() as c:
+            c.executemany(
+                """INSERT INTO exercises (exercise, body_part) VALUES (?, ?)
+                   ON CONFLICT (exercise) DO UPDATE
+                   SET body_part = COALESCE(exercises.body_part, excluded.body_part)""",
+                list(exercises.items()),
+            )
+
+            ids: Dict[str, int] = _exercise_ids(c, (row[1] for row in chunk))
+            c.executemany(_INSERT_WORKOUT, [_typed_row(row, ids) for row in chunk])
+            _count_usage(c, chunk, ids)
+
+            _refresh_daily_best(c, ((row[1], str(row[0])) for row in chunk))
+            c.executemany(_RECORD_UPSERT, [r for r in map(_record_row, chunk) if r is not None])
+
+    # -----------------------------------------------------------------------------
+
+    def get_workout_history(self) -> List[Tuple[Any, ...]]:
         """
-        Retrieves the entire training max history for all exercises.
+        Retrieves the complete workout history sorted by date in descending order.
 
         Returns:
-            A list of tuples containing date, exercise, one_rm, and training_max.
+            A list of tuples representing workout history records.
+        """
+        with self._read() as c:
+            c.execute(
+                """SELECT id, date, exercise, weight, reps, workout_duration 
+                   FROM workout_history 
+                   ORDER BY date DESC, id DESC"""
+            )
+
+            return c.fetchall()
+
+    # -----------------------------------------------------------------------------
+
+    def iter_workout_history(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        exercise: Optional[str] = None,
+        batch_size: int = 500,
+    ) -> Iterator[Tuple[Any, ...]]:
         """
-        c = self.conn.cursor()
+        Streams the workout history oldest first, fetching `batch_size` rows at a time so
+        memory use does not depend on the size of the history.
 
-        c.execute(
-            """SELECT date, exercise, one_rm, training_max 
-               FROM training_maxes_history 
-               ORDER BY date DESC"""
+        Args:
+            start_date (Optional[str]): Earliest date to include, in ISO format (YYYY-MM-DD).
+            end_date (Optional[str]): Latest date to include, in ISO format (YYYY-MM-DD).
+            exercise (Optional[str]): Restrict the rows to a single exercise.
+            batch_size (int): Number of rows fetched from SQLite per round trip.
+
+        Yields:
+            Tuples of (id, date, exercise, weight, reps, workout_duration).
+        """
+        yield from self._iter_rows(
+            "workout_history",
+            WORKOUT_HISTORY_COLUMNS,
+            "date, id",
+            start_date,
+            end_date,
+            exercise,
+            batch_size,
         )
 
-        return c.fetchall()
+    # -----------------------------------------------------------------------------
+
+    def _iter_rows(
+        self,
+        table: str,
+        columns: Tuple[str, ...],
+        order_by: str,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        exercise: Optional[str],
+        batch_size: int,
+    ) -> Iterator[Tuple[Any, ...]]:
+        """
+        Streams rows of a history table filtered by date range and exercise, in batches.
+        The pooled connection is held until the iterator is exhausted or closed.
+        """
+        conditions: List[str] = []
+        params: List[Any] = []
+
+        if start_date:
+            conditions.append("date >= ?")
+            params.append(start_date)
+
+        if end_date:
+            conditions.append("date <= ?")
+            params.append(end_date)
+
+        if exercise:
+            conditions.append("exercise = ?")
+            params.append(exercise)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self._read() as c:
+            c.execute(
+                f"""SELECT {', '.join(columns)} FROM {table} {where} ORDER BY {order_by}""",
+                params,
+            )
+
+            while True:
+                rows: List[Tuple[Any, ...]] = c.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
 
     # -----------------------------------------------------------------------------
 
-    def get_training_max(self, exercise: str) -> Optional[float]:
+    def get_workout_entry(self, record_id: int) -> Optional[Tuple[Any, ...]]:
         """
-        Retrieves the current training max for a specific exercise.
+        Retrieves a single workout entry by its ID.
 
         Args:
-            exercise (str): The exercise name.
+            record_id (int): The ID of the workout entry.
 
         Returns:
-            The training max as a float if found; otherwise, None.
+            A tuple of (id, date, exercise, weight, reps, workout_duration) if found; otherwise, None.
         """
-        c = self.conn.cursor()
-
-        c.execute(
-            """SELECT training_max FROM training_maxes WHERE exercise=?""", (exercise,)
-        )
+        with self._read() as c:
+            c.execute(
+                """SELECT id, date, exercise, weight, reps, workout_duration
+                   FROM workout_history
+                   WHERE id = ?""",
+                (record_id,),
+            )
 
-        result = c.fetchone()
-        return result[0] if result else None
+            return c.fetchone()
 
     # -----------------------------------------------------------------------------
 
-    def log_workout(
-        self, date_value: Any, exercise: str, weight: float, reps: str, workout_duration: Optional[int] = None
-    ) -> None:
+    def get_workout_history_page(
+        self,
+        exercise_type: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        exercise: Optional[str] = None,
+        before: Optional[Tuple[str, int]] = None,
+        after: Optional[Tuple[str, int]] = None,
+        page_size: int = 50,
+    ) -> HistoryPage:
         """
-        Logs a workout session for the given exercise, weight, and reps.
+        Retrieves one page of workout history, newest first, with all filtering done in SQL.
+
+        Pagination is keyset-based on (date, id): pass the previous page's next_cursor as
+        `before` to move to older rows, or its prev_cursor as `after` to move to newer rows.
 
         Args:
-            date_value (Any): The date of the workout.
-            exercise (str): The exercise name.
-            weight (float): The weight used.
-            reps (str): The number of repetitions (as a string).
-            workout_duration (Optional[int]): Duration of workout in seconds.
+            exercise_type (Optional[str]): 'main' for the main lifts, 'accessory' for everything else.
+            start_date (Optional[str]): Earliest date to include, in ISO format (YYYY-MM-DD).
+            end_date (Optional[str]): Latest date to include, in ISO format (YYYY-MM-DD).
+            exercise (Optional[str]): Restrict the page to a single exercise.
+            before (Optional[Tuple[str, int]]): Only return rows older than this (date, id).
+            after (Optional[Tuple[str, int]]): Only return rows newer than this (date, id).
+            page_size (int): Maximum number of rows to return.
+
+        Returns:
+            A HistoryPage with the rows and the cursors for the neighbouring pages.
         """
-        c = self.conn.cursor()
+        with self._read() as c:
+            conditions: List[str] = []
+            params: List[Any] = []
+
+            if exercise_type == "main":
+                conditions.append("exercise IN (?, ?, ?, ?)")
+                params.extend(MAIN_LIFTS)
+            elif exercise_type == "accessory":
+                conditions.append("exercise NOT IN (?, ?, ?, ?)")
+                params.extend(MAIN_LIFTS)
+
+            if exercise:
+                conditions.append("exercise = ?")
+                params.append(exercise)
+
+            if start_date:
+                conditions.append("date >= ?")
+                params.append(start_date)
+
+            if end_date:
+                conditions.append("date <= ?")
+                params.append(end_date)
+
+            if after is not None:
+                conditions.append("(date, id) > (?, ?)")
+                params.extend(after)
+                order = "ASC"
+            else:
+                if before is not None:
+                    conditions.append("(date, id) < (?, ?)")
+                    params.extend(before)
+                order = "DESC"
+
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+            # Fetch one extra row to find out whether another page exists in this direction
+            c.execute(
+                f"""SELECT id, date, exercise, weight, reps, workout_duration
+                    FROM workout_history
+                    {where}
+                    ORDER BY date {order}, id {order}
+                    LIMIT ?""",
+                (*params, page_size + 1),
+            )
 
-        c.execute(
-            """INSERT INTO workout_history (date, exercise, weight, reps, workout_duration)
-               VALUES (?, ?, ?, ?, ?)""",
-            (date_value, exercise, weight, reps, workout_duration),
-        )
+            rows: List[Tuple[Any, ...]] = c.fetchall()
+            has_more: bool = len(rows) > page_size
+            rows = rows[:page_size]
+
+            if after is not None:
+                rows.reverse()
+                has_newer, has_older = has_more, True
+            else:
+                has_newer, has_older = before is not None, has_more
 
-        self.conn.commit()
+            if not rows:
+                return HistoryPage(rows, None, None)
+
+            next_cursor = (rows[-1][1], rows[-1][0]) if has_older else None
+            prev_cursor = (rows[0][1], rows[0][0]) if has_newer else None
+            return HistoryPage(rows, next_cursor, prev_cursor)
 
     # -----------------------------------------------------------------------------
 
-    def get_workout_history(self) -> List[Tuple[Any, ...]]:
+    def get_accessory_sessions(self, limit: int = 5, before: Optional[str] = None) -> SessionPage:
         """
-        Retrieves the complete workout history sorted by date in descending order.
+        Retrieves the most recent accessory sessions (days with any set of an exercise other
+        than the main lifts), newest first, with their accessory sets. Finding the sessions
+        and their sets is done in SQL (see _ACCESSORY_SESSIONS), so the cost depends on
+        `limit`, not on the size of the history.
+
+        Args:
+            limit (int): Maximum number of sessions to return.
+            before (Optional[str]): Only return sessions before this date (a next_cursor).
 
         Returns:
-            A list of tuples representing workout history records.
+            A SessionPage with the sessions and the cursor for older ones.
         """
-        c = self.conn.cursor()
+        # Two extra CTE rows: the seed, and one more session to find out whether older ones exist
+        with self._read() as c:
+            c.execute(_ACCESSORY_SESSIONS, (*MAIN_LIFTS, before or "9999-99-99", limit + 2))
+            rows: List[Tuple[Any, ...]] = c.fetchall()
+
+        sessions: List[Tuple[str, List[Tuple[Any, ...]]]] = []
+        for row in rows:
+            if not sessions or sessions[-1][0] != row[1]:
+                sessions.append((row[1], []))
+            sessions[-1][1].append(row)
+
+        if len(sessions) > limit:
+            sessions = sessions[:limit]
+            return SessionPage(sessions, sessions[-1][0])
+        return SessionPage(sessions, None)
 
-        c.execute(
-            """SELECT id, date, exercise, weight, reps, workout_duration 
-               FROM workout_history 
-               ORDER BY date DESC, id DESC"""
-        )
+    # -----------------------------------------------------------------------------
+
+    def get_past_accessory_exercises(self) -> List[str]:
+        """
+        Retrieves the accessory exercises (every exercise other than the main lifts) from
+        the exercises table, without touching the history.
+
+        Returns:
+            A list of exercise names in alphabetical order.
+        """
+        with self._read() as c:
+            c.execute(
+                """SELECT exercise FROM exercises WHERE exercise NOT IN (?, ?, ?, ?) ORDER BY exercise""",
+                MAIN_LIFTS,
+            )
 
-        return c.fetchall()
+            exercises = [row[0] for row in c.fetchall()]
+            return exercises
 
     # -----------------------------------------------------------------------------
 
-    def get_past_accessory_exercises(self) -> List[str]:
+    def search_exercises(
+        self,
+        prefix: str = "",
+        limit: int = 10,
+        exercise_type: Optional[str] = None,
+        today: Optional[date] = None,
+    ) -> List[ExerciseMatch]:
         """
-        Retrieves a list of distinct accessory exercises that are not part of the main lifts.
+        Finds exercises whose names start with a prefix, ignoring case, for autocomplete.
+
+        Matches come from a range scan of the case-insensitive name index and are ranked by
+        how often and how recently each exercise was done: its logged sets, halved for every
+        SEARCH_HALF_LIFE_DAYS since it was last done. Set counts and last days are kept on
+        the exercises table as sets are logged, so the history is never read.
+
+        Args:
+            prefix (str): The start of the exercise name; "" matches every exercise.
+            limit (int): Maximum number of matches to return.
+            exercise_type (Optional[str]): 'main' for the main lifts, 'accessory' for everything else.
+            today (Optional[date]): The date recency is measured from; defaults to today.
 
         Returns:
-            A list of exercise names.
+            The best matches, best first. Exercises never logged come last, alphabetically.
         """
-        c = self.conn.cursor()
-        main_lifts: Tuple[str, str, str, str] = ("Squat", "Bench Press", "Deadlift", "Press")
+        conditions: List[str] = ["exercise LIKE ? ESCAPE '\\'"]
+        params: List[Any] = [prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"]
 
-        c.execute(
-            """SELECT DISTINCT exercise FROM workout_history
-               WHERE exercise NOT IN (?, ?, ?, ?)""",
-            main_lifts,
-        )
+        if exercise_type == "main":
+            conditions.append("exercise IN (?, ?, ?, ?)")
+            params.extend(MAIN_LIFTS)
+        elif exercise_type == "accessory":
+            conditions.append("exercise NOT IN (?, ?, ?, ?)")
+            params.extend(MAIN_LIFTS)
+
+        with self._read() as c:
+            c.execute(
+                f"""SELECT exercise, body_part, set_count, last_day FROM exercises
+                    WHERE {' AND '.join(conditions)}""",
+                params,
+            )
+            rows: List[Tuple[str, Optional[str], int, Optional[int]]] = c.fetchall()
+
+        today_day: int = day_number(today or date.today())
+
+        def score(row: Tuple[str, Optional[str], int, Optional[int]]) -> Tuple[float, str]:
+            exercise, _, sets, last_day = row
+            if last_day is None:
+                return 0.0, exercise.lower()
+            age: int = max(0, today_day - last_day)
+            return -sets * 0.5 ** (age / SEARCH_HALF_LIFE_DAYS), exercise.lower()
 
-        exercises = [row[0] for row in c.fetchall()]
-        return exercises
+        return [
+            ExerciseMatch(exercise, body_part, sets, day_to_iso(last_day) if last_day is not None else None)
+            for exercise, body_part, sets, last_day in sorted(rows, key=score)[:limit]
+        ]
 
     # -----------------------------------------------------------------------------
 
+    @_group_committed
     def update_workout_entry_by_id(
-        self, record_id: int, new_weight: Optional[float] = None, new_reps: Optional[int] = None
+        self, record_id: int, new_weight: Optional[float] = None, new_reps: Optional[Union[int, str]] = None
     ) -> None:
         """
-        Updates the weight and/or reps for a specific workout entry.
+        Updates the weight and/or reps for a specific workout entry. An AMRAP set stays
+        AMRAP when its reps are corrected: its "+" is kept even if the new reps omit it, so
+        the reps as logged and the amrap column agree. An archived set moves back to
+        workout_sets.
 
         Args:
             record_id (int): The ID of the workout entry.
             new_weight (Optional[float]): New weight value.
-            new_reps (Optional[int]): New repetitions value.
+            new_reps (Optional[Union[int, str]]): New repetitions value, such as 8 or "8+".
         """
-        c = self.conn.cursor()
-
-        if new_weight is not None and new_reps is not None:
-            c.execute(
-                """UPDATE workout_history SET weight = ?, reps = ? WHERE id = ?""",
-                (new_weight, new_reps, record_id),
-            )
-        elif new_weight is not None:
-            c.execute(
-                """UPDATE workout_history SET weight = ? WHERE id = ?""",
-                (new_weight, record_id),
-            )
-        elif new_reps is not None:
+        with self._write() as c:
+            _unarchive(c, record_id)
             c.execute(
-                """UPDATE workout_history SET reps = ? WHERE id = ?""",
-                (new_reps, record_id),
+                """SELECT date, exercise, weight, reps FROM workout_history WHERE id = ?""",
+                (record_id,),
             )
-
-        self.conn.commit()
+            old: Optional[Tuple[Any, ...]] = c.fetchone()
+
+            if new_reps is not None:
+                new_reps = str(new_reps).strip(" ")
+                if old is not None and parse_reps(old[3])[1] and not new_reps.endswith("+"):
+                    new_reps += "+"
+                reps_count, amrap = parse_reps(new_reps)
+
+            if new_weight is not None and new_reps is not None:
+                c.execute(
+                    """UPDATE workout_sets
+                       SET weight = ?, reps = ?, reps_count = ?, amrap = ?
+                       WHERE id = ?""",
+                    (new_weight, new_reps, reps_count, amrap, record_id),
+                )
+            elif new_weight is not None:
+                c.execute(
+                    """UPDATE workout_sets SET weight = ? WHERE id = ?""",
+                    (new_weight, record_id),
+                )
+            elif new_reps is not None:
+                c.execute(
+                    """UPDATE workout_sets SET reps = ?, reps_count = ?, amrap = ?
+                       WHERE id = ?""",
+                    (new_reps, reps_count, amrap, record_id),
+                )
+
+            if old is not None:
+                _refresh_daily_best(c, [(old[1], old[0])])
+                _release_record(c, _record_row(old))
+
+                c.execute(
+                    """SELECT date, exercise, weight, reps FROM workout_history WHERE id = ?""",
+                    (record_id,),
+                )
+                new: Optional[RecordRow] = _record_row(c.fetchone())
+                if new is not None:
+                    c.execute(_RECORD_UPSERT, new)
 
     # -----------------------------------------------------------------------------
 
+    @_group_committed
     def delete_workout_entry_by_id(self, record_id: int) -> None:
         """
         Deletes a workout entry from the workout_history table based on the specified ID.
@@ -251,11 +2295,21 @@ class Database:
         Args:
             record_id (int): The ID of the workout entry to delete.
         """
-        c = self.conn.cursor()
+        with self._write() as c:
+            _unarchive(c, record_id)
+            c.execute(
+                """SELECT date, exercise, weight, reps FROM workout_history WHERE id = ?""",
+                (record_id,),
+            )
+            old: Optional[Tuple[Any, ...]] = c.fetchone()
 
-        c.execute("""DELETE FROM workout_history WHERE id = ?""", (record_id,))
-        self.conn.commit()
-        print("Workout entry deleted successfully.")
+            c.execute("""DELETE FROM workout_sets WHERE id = ?""", (record_id,))
+
+            if old is not None:
+                _refresh_daily_best(c, [(old[1], old[0])])
+                _release_record(c, _record_row(old))
+                _release_usage(c, old[1], day_number(old[0]))
+            print("Workout entry deleted successfully.")
 
     # -----------------------------------------------------------------------------
 
@@ -269,14 +2323,14 @@ class Database:
         Returns:
             The body part as a string if found; otherwise, None.
         """
-        c = self.conn.cursor()
-
-        c.execute("""SELECT body_part FROM exercises WHERE exercise=?""", (exercise,))
-        result = c.fetchone()
-        return result[0] if result else None
+        with self._read() as c:
+            c.execute("""SELECT body_part FROM exercises WHERE exercise=?""", (exercise,))
+            result = c.fetchone()
+            return result[0] if result else None
 
     # -----------------------------------------------------------------------------
 
+    @_group_committed
     def add_exercise(self, exercise: str, body_part: str) -> None:
         """
         Adds a new exercise and its associated body part to the exercises table.
@@ -285,22 +2339,21 @@ class Database:
             exercise (str): The exercise name.
             body_part (str): The primary body part targeted by the exercise.
         """
-        c = self.conn.cursor()
-
-        c.execute(
-            """INSERT OR REPLACE INTO exercises (exercise, body_part)
-               VALUES (?, ?)""",
-            (exercise, body_part),
-        )
-
-        self.conn.commit()
+        with self._write() as c:
+            # An upsert rather than INSERT OR REPLACE, which would give the exercise a new id
+            c.execute(
+                """INSERT INTO exercises (exercise, body_part) VALUES (?, ?)
+                   ON CONFLICT (exercise) DO UPDATE SET body_part = excluded.body_part""",
+                (exercise, body_part),
+            )
 
     # -----------------------------------------------------------------------------
 
     def get_weekly_volume_by_body_part(self, start_date: str, end_date: str) -> Dict[str, int]:
         """
         Calculates weekly volume by body part within a specified date range,
-        measured in total sets per body part.
+        measured in total sets per body part. Archived weeks are counted from their
+        rollups (see archive_history()).
 
         Args:
             start_date (str): The start date in ISO format (YYYY-MM-DD).
@@ -309,41 +2362,118 @@ class Database:
         Returns:
             A dictionary mapping body parts to set counts.
         """
-        c = self.conn.cursor()
+        with self._read() as c:
+            c.execute(
+                f"""
+                SELECT ex.body_part, SUM(weekly.sets) as set_count
+                FROM ({_WEEKLY_SETS}) weekly
+                JOIN exercises ex ON ex.id = weekly.exercise_id
+                WHERE ex.body_part IS NOT NULL
+                GROUP BY ex.body_part
+                """,
+                _weekly_sets_params(day_number(start_date), day_number(end_date)),
+            )
 
-        c.execute(
-            """
-            SELECT ex.body_part, COUNT(*) as set_count
-            FROM workout_history wh
-            JOIN exercises ex ON wh.exercise = ex.exercise
-            WHERE date(wh.date) BETWEEN ? AND ?
-            GROUP BY ex.body_part
-            """,
-            (start_date, end_date),
-        )
+            records: List[Tuple[str, int]] = c.fetchall()
+            volume_by_body_part: Dict[str, int] = {}
+
+            for body_part, set_count in records:
+                volume_by_body_part[body_part] = set_count
+
+            return volume_by_body_part
+
+    # -----------------------------------------------------------------------------
+
+    def get_volume_by_week(self, start_date: str, end_date: str) -> Dict[str, Dict[str, int]]:
+        """
+        Calculates volume by body part for every Monday-to-Sunday week in a date range in a
+        single grouped query, measured in total sets per body part. Archived weeks are
+        counted from their rollups (see archive_history()).
+
+        Args:
+            start_date (str): The start date in ISO format (YYYY-MM-DD).
+            end_date (str): The end date in ISO format (YYYY-MM-DD).
+
+        Returns:
+            A dictionary mapping each week's Monday (ISO format) to a dictionary of body
+            parts and set counts. Weeks without any sets are omitted.
+        """
+        with self._read() as c:
+            # The range predicates use the day indexes, and the week bucket is plain
+            # integer arithmetic on the day number (see week_start()).
+            c.execute(
+                f"""
+                SELECT weekly.week_day,
+                       ex.body_part,
+                       SUM(weekly.sets) AS set_count
+                FROM ({_WEEKLY_SETS}) weekly
+                JOIN exercises ex ON ex.id = weekly.exercise_id
+                WHERE ex.body_part IS NOT NULL
+                GROUP BY weekly.week_day, ex.body_part
+                """,
+                _weekly_sets_params(day_number(start_date), day_number(end_date)),
+            )
 
-        records: List[Tuple[str, int]] = c.fetchall()
-        volume_by_body_part: Dict[str, int] = {}
+            volume_by_week: Dict[str, Dict[str, int]] = {}
 
-        for body_part, set_count in records:
-            volume_by_body_part[body_part] = set_count
+            for week_day, body_part, set_count in c.fetchall():
+                volume_by_week.setdefault(day_to_iso(week_day), {})[body_part] = set_count
 
-        return volume_by_body_part
+            return volume_by_week
 
     # -----------------------------------------------------------------------------
 
-    def get_all_exercises(self) -> List[str]:
+    def get_tonnage(
+        self, start_date: str, end_date: str, exercise: Optional[str] = None
+    ) -> List[Tuple[str, float]]:
         """
-        Retrieves a list of all exercises from the workout history.
+        Calculates tonnage (weight x reps, summed over sets) per training day in a date
+        range, entirely in SQLite on the typed day and reps_count columns. Sets without a
+        whole number of reps are left out.
+
+        Args:
+            start_date (str): The start date in ISO format (YYYY-MM-DD).
+            end_date (str): The end date in ISO format (YYYY-MM-DD).
+            exercise (Optional[str]): Only count this exercise.
 
         Returns:
-            A list of distinct exercise names.
+            A list of (date, tonnage) tuples ordered by date. Days without sets are omitted.
+        """
+        with self._read() as c:
+            if exercise is None:
+                c.execute(
+                    """SELECT day, SUM(tonnage) FROM (
+                           SELECT day, SUM(weight * reps_count) AS tonnage FROM workout_sets
+                           WHERE day BETWEEN ?1 AND ?2 GROUP BY day
+                           UNION ALL
+                           SELECT day, SUM(weight * reps_count) AS tonnage FROM workout_sets_archive
+                           WHERE day BETWEEN ?1 AND ?2 GROUP BY day
+                       )
+                       GROUP BY day ORDER BY day""",
+                    (day_number(start_date), day_number(end_date)),
+                )
+            else:
+                c.execute(
+                    """SELECT day, SUM(weight * reps_count) FROM workout_history
+                       WHERE exercise = ? AND day BETWEEN ? AND ? GROUP BY day ORDER BY day""",
+                    (exercise, day_number(start_date), day_number(end_date)),
+                )
+
+            return [(day_to_iso(day), tonnage or 0.0) for day, tonnage in c.fetchall()]
+
+    # -----------------------------------------------------------------------------
+
+    def get_all_exercises(self) -> List[str]:
         """
-        c = self.conn.cursor()
+        Retrieves every exercise from the exercises table, without touching the history.
 
-        c.execute("""SELECT DISTINCT exercise FROM workout_history""")
-        exercises: List[str] = [row[0] for row in c.fetchall()]
-        return exercises
+        Returns:
+            A list of exercise names in alphabetical order.
+        """
+        with self._read() as c:
+            c.execute("""SELECT exercise FROM exercises ORDER BY exercise""")
+            exercises: List[str] = [row[0] for row in c.fetchall()]
+            return exercises
 
     # -----------------------------------------------------------------------------
 
@@ -357,12 +2487,170 @@ class Database:
         Returns:
             A list of tuples representing the workout records for the exercise.
         """
-        c = self.conn.cursor()
+        with self._read() as c:
+            c.execute(
+                """SELECT date, exercise, weight, reps, workout_duration FROM workout_history
+                   WHERE exercise = ? ORDER BY date""",
+                (exercise,),
+            )
 
-        c.execute(
-            """SELECT date, exercise, weight, reps, workout_duration FROM workout_history
-               WHERE exercise = ? ORDER BY date""",
-            (exercise,),
-        )
+            return c.fetchall()
+
+    # -----------------------------------------------------------------------------
+
+    def get_daily_best(
+        self, exercise: str, start_date: Optional[str] = None, end_date: Optional[str] = None
+    ) -> List[Tuple[str, float, int]]:
+        """
+        Retrieves the heaviest set per day for an exercise from the materialized
+        exercise_daily_best table. Sets whose reps are not a plain integer are ignored.
+
+        Args:
+            exercise (str): The exercise name.
+            start_date (Optional[str]): Earliest date to include, in ISO format (YYYY-MM-DD).
+            end_date (Optional[str]): Latest date to include, in ISO format (YYYY-MM-DD).
+
+        Returns:
+            A list of (date, weight, reps) tuples sorted by date.
+        """
+        with self._read() as c:
+            c.execute(
+                """SELECT date, weight, reps FROM exercise_daily_best
+                   WHERE exercise = ? AND date BETWEEN ? AND ?
+                   ORDER BY date""",
+                (exercise, start_date or "0000-00-00", end_date or "9999-99-99"),
+            )
+
+            return c.fetchall()
+
+    # -----------------------------------------------------------------------------
+
+    def rebuild_daily_best(self) -> None:
+        """
+        Recomputes the exercise_daily_best table from the full workout history.
+        """
+        with self._write() as c:
+            _rebuild_daily_best(c)
+
+    # -----------------------------------------------------------------------------
+
+    def get_records(self, exercise: Optional[str] = None) -> List[RecordRow]:
+        """
+        Retrieves the rep records: the heaviest set at each rep count, per exercise. The
+        table is maintained as sets are logged, edited and deleted, so this reads one small
+        row per (exercise, reps) rather than the history.
+
+        Args:
+            exercise (Optional[str]): Only return this exercise's records.
+
+        Returns:
+            A list of (exercise, reps, weight, date) tuples ordered by exercise and reps.
+        """
+        with self._read() as c:
+            if exercise is None:
+                c.execute(
+                    """SELECT exercise, reps, weight, date FROM exercise_records
+                       ORDER BY exercise, reps"""
+                )
+            else:
+                c.execute(
+                    """SELECT exercise, reps, weight, date FROM exercise_records
+                       WHERE exercise = ? ORDER BY exercise, reps""",
+                    (exercise,),
+                )
+            return c.fetchall()
+
+    # -----------------------------------------------------------------------------
+
+    def rebuild_records(self) -> None:
+        """
+        Recomputes the exercise_records table from the full workout history.
+        """
+        with self._write() as c:
+            _rebuild_records(c)
+
+    # -----------------------------------------------------------------------------
+
+    def get_cycle_plan(
+        self, exercise: Optional[str] = None, week: Optional[int] = None, supplemental: Optional[str] = None
+    ) -> List[PlannedSet]:
+        """
+        Retrieves the planned cycle, precomputed when each training max was set.
+
+        Args:
+            exercise (Optional[str]): Restrict the plan to one lift; defaults to all main lifts.
+            week (Optional[int]): Restrict the plan to one week (1-3, or 4 for the deload).
+            supplemental (Optional[str]): Include this supplemental template's sets ('bbb' or 'fsl').
+
+        Returns:
+            Planned sets ordered by exercise and week, main sets before supplemental ones.
+        """
+        exercises: Tuple[str, ...] = (exercise,) if exercise is not None else MAIN_LIFTS
+        params: List[Any] = list(exercises)
+        week_filter: str = ""
+        if week is not None:
+            week_filter = "AND week = ?"
+            params.append(week)
+        params.append(supplemental)
+
+        with self._read() as c:
+            c.execute(
+                f"""SELECT exercise, week, kind, set_number, percentage, weight, reps, plates, training_max
+                    FROM cycle_plan
+                    WHERE exercise IN ({", ".join("?" * len(exercises))}) {week_filter}
+                      AND kind IN ('main', ?)
+                    ORDER BY exercise, week, kind = 'main' DESC, kind, set_number""",
+                params,
+            )
+            return [PlannedSet(*row) for row in c.fetchall()]
+
+    # -----------------------------------------------------------------------------
+
+    def rebuild_cycle_plan(self) -> None:
+        """
+        Recomputes the cycle_plan table from the current training maxes.
+        """
+        with self._write() as c:
+            _rebuild_cycle_plan(c)
+
+    # -----------------------------------------------------------------------------
+
+    def archive_history(
+        self, weeks: int = ARCHIVE_AFTER_WEEKS, today: Optional[date] = None, batch_size: int = ARCHIVE_BATCH
+    ) -> int:
+        """
+        Moves sets from weeks that ended more than `weeks` weeks ago out of workout_sets into
+        workout_sets_archive and updates their weekly rollups, so the hot table (and its
+        indexes) only holds recent cycles. Reads through workout_history and the volume and
+        tonnage queries include archived sets, so nothing disappears from the app.
+
+        Sets are moved `batch_size` at a time, each batch in its own short transaction, so
+        logging is never blocked for long. Archived sets that are edited or deleted move
+        back to workout_sets, and are archived again by the next run.
 
-        return c.fetchall()
+        Args:
+            weeks (int): Keep this many whole weeks before the current one in workout_sets.
+            today (Optional[date]): The current date; defaults to today.
+            batch_size (int): Sets moved per transaction.
+
+        Returns:
+            The number of sets archived.
+        """
+        cutoff: int = week_start(day_number(today or date.today())) - 7 * weeks
+        archived: int = 0
+
+        while True:
+            with self._write() as c:
+                c.execute(
+                    """SELECT id, exercise_id, day FROM workout_sets
+                       WHERE day < ? ORDER BY day LIMIT ?""",
+                    (cutoff, batch_size),
+                )
+                rows: List[Tuple[int, int, int]] = c.fetchall()
+                if not rows:
+                    return archived
+
+                _move_sets(c, "workout_sets", "workout_sets_archive", [(row[0],) for row in rows])
+                _refresh_rollups(c, ((row[1], week_start(row[2])) for row in rows))
+
+            archived += len(rows)